@@ -1,14 +1,14 @@
 from django.contrib import admin
 from django.utils import timezone
 from django.contrib import messages
-from .models import InstallationClient, ActiveSubscriber
+from .admin_mixins import FastChangeListMixin
+from .models import InstallationClient, ActiveSubscriber, Order
 from datetime import timedelta
 
 @admin.register(InstallationClient)
-class InstallationClientAdmin(admin.ModelAdmin):
+class InstallationClientAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ['name', 'contact', 'installation_type', 'installation_date', 'has_invoice']
     list_filter = ['installation_type', 'installation_date']
-    search_fields = ['name', 'contact', 'email', 'notes']
     date_hierarchy = 'installation_date'
     
     fieldsets = (
@@ -27,11 +27,10 @@ class InstallationClientAdmin(admin.ModelAdmin):
     has_invoice.admin_order_field = 'invoice'
 
 @admin.register(ActiveSubscriber)
-class ActiveSubscriberAdmin(admin.ModelAdmin):
+class ActiveSubscriberAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ['name', 'contact', 'kit_type', 'last_subscription_date', 
                    'next_subscription_date', 'subscription_status']
     list_filter = ['kit_type', 'is_active', 'next_subscription_date']
-    search_fields = ['name', 'contact', 'email']
     date_hierarchy = 'next_subscription_date'
     actions = ['send_reminder_emails']
     
@@ -62,4 +61,22 @@ class ActiveSubscriberAdmin(admin.ModelAdmin):
             # Logic to send reminder email
             pass
         self.message_user(request, f"Reminders sent to {queryset.count()} subscribers.")
-    send_reminder_emails.short_description = "Send subscription reminders"
\ No newline at end of file
+    send_reminder_emails.short_description = "Send subscription reminders"
+
+@admin.register(Order)
+class OrderAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ['name', 'phone', 'order_date', 'created_at']
+    list_filter = ['order_date']
+    date_hierarchy = 'order_date'
+    search_fields = ['^name', '^phone_digits']
+    search_help_text = 'Start of a name or phone number'
+    email_search_field = None
+    
+    fieldsets = (
+        ('Customer', {
+            'fields': ('name', 'phone')
+        }),
+        ('Order', {
+            'fields': ('order_details', 'order_date')
+        }),
+    )
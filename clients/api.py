@@ -0,0 +1,350 @@
+"""
+Versioned JSON API (``/api/v1/``) for installations, subscribers and orders.
+
+Reads come straight from ``values()`` (no model instances) with keyset
+cursor pagination and ``?fields=`` selection. Every GET carries an ETag
+derived from the rows' ``updated_at``, so a client that sends it back in
+``If-None-Match`` gets an empty 304 when nothing changed. Writes are batched:
+one request and one transaction per batch, validated with the same forms
+as the HTML pages.
+
+``/api/v1/changes/`` is a delta feed over all three resources: rows whose
+``updated_at`` moved past the client's cursor, plus tombstones for deleted
+rows, so offline copies can sync incrementally.
+"""
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta
+from django.conf import settings
+from functools import wraps
+from django.db import transaction
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from .forms import InstallationClientForm, ActiveSubscriberForm, OrderForm
+from .models import InstallationClient, ActiveSubscriber, Order, Tombstone
+from .payments import record_payments
+
+API_VERSION = 'v1'
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 500
+DELETED_STREAM = 'deleted'
+
+RESOURCES = {
+    'installations': {
+        'model': InstallationClient,
+        'form': InstallationClientForm,
+        'fields': ('id', 'name', 'contact', 'email', 'installation_type', 'installation_date',
+                   'invoice', 'notes', 'created_at', 'updated_at'),
+    },
+    'subscribers': {
+        'model': ActiveSubscriber,
+        'form': ActiveSubscriberForm,
+        'fields': ('id', 'name', 'contact', 'email', 'kit_type', 'last_subscription_date',
+                   'next_subscription_date', 'is_active', 'auto_notify', 'is_deactivated',
+                   'deactivated_at', 'deactivation_reason', 'created_at', 'updated_at'),
+    },
+    'orders': {
+        'model': Order,
+        'form': OrderForm,
+        'fields': ('id', 'name', 'order_details', 'phone', 'order_date', 'created_at', 'updated_at'),
+    },
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def api_view(view_func):
+    """JSON 401 instead of the login redirect, and ApiError as a JSON error response"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'success': False, 'error': str(e), **e.extra}, status=e.status)
+    return wrapper
+
+
+def selected_fields(request, resource):
+    """Fields from ?fields=a,b (all by default); unknown names are an error"""
+    allowed = RESOURCES[resource]['fields']
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(allowed)
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f'Unknown field(s): {", ".join(unknown)}')
+    return fields
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise ApiError('Invalid cursor')
+
+
+def rows_etag(rows, fields, has_more=False):
+    """
+    Weak validator over the ids and updated_at of the rows and the selected
+    fields; for a page, ``has_more`` too, so a new row past its end changes it
+    """
+    digest = hashlib.md5(','.join(fields).encode())
+    if has_more:
+        digest.update(b'+more;')
+    for row in rows:
+        digest.update(f"{row['id']}:{row['updated_at'].isoformat()};".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def conditional_json(request, data, etag):
+    """304 if the client's ETag still matches, otherwise the JSON body with the ETag"""
+    response = get_conditional_response(request, etag=etag) or JsonResponse(data)
+    response['ETag'] = etag
+    # Always revalidate; the ETag makes that cheap
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError('Request body must be JSON')
+    return data
+
+
+def batch_items(data):
+    """The list under "items" (a bare list is accepted too), capped at MAX_BATCH_SIZE"""
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise ApiError('Expected a non-empty "items" list')
+    if len(items) > MAX_BATCH_SIZE:
+        raise ApiError(f'At most {MAX_BATCH_SIZE} items per batch')
+    return items
+
+
+@api_view
+@require_http_methods(['GET', 'POST'])
+def collection(request, resource):
+    """GET: cursor-paginated list; POST: batch create"""
+    if request.method == 'POST':
+        return batch_create(request, resource)
+
+    model = RESOURCES[resource]['model']
+    fields = selected_fields(request, resource)
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError('limit must be an integer')
+
+    # Keyset pagination on the primary key: every page is an index range scan
+    queryset = model.objects.order_by('pk')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(pk__gt=decode_cursor(cursor))
+    rows = list(queryset.values(*dict.fromkeys(fields + ['id', 'updated_at']))[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # next_cursor is in the body too: the validator must change when a next page appears
+    etag = rows_etag(rows, fields, has_more)
+    results = [{field: row[field] for field in fields} for row in rows]
+    return conditional_json(request, {
+        'success': True,
+        'version': API_VERSION,
+        'results': results,
+        'next_cursor': encode_cursor(rows[-1]['id']) if has_more else None,
+    }, etag)
+
+
+@api_view
+@require_GET
+def detail(request, resource, pk):
+    model = RESOURCES[resource]['model']
+    fields = selected_fields(request, resource)
+    row = model.objects.filter(pk=pk).values(*dict.fromkeys(fields + ['id', 'updated_at'])).first()
+    if row is None:
+        raise ApiError(f'No {resource[:-1]} with id {pk}', status=404)
+    return conditional_json(
+        request,
+        {'success': True, 'version': API_VERSION, 'result': {field: row[field] for field in fields}},
+        rows_etag([row], fields),
+    )
+
+
+def batch_create(request, resource):
+    config = RESOURCES[resource]
+    forms = [config['form'](item) for item in batch_items(parse_body(request))]
+    errors = {index: form.errors.get_json_data() for index, form in enumerate(forms) if not form.is_valid()}
+    if errors:
+        raise ApiError('Validation failed, nothing was created', errors=errors)
+
+    with transaction.atomic():
+        created = [form.save() for form in forms]
+    return JsonResponse({'success': True, 'count': len(created), 'ids': [obj.pk for obj in created]}, status=201)
+
+
+@api_view
+@require_POST
+def batch_update(request, resource):
+    """Partial updates: each item has an "id" plus only the fields to change"""
+    config = RESOURCES[resource]
+    items = batch_items(parse_body(request))
+    try:
+        ids = [int(item['id']) for item in items]
+    except (KeyError, TypeError, ValueError):
+        raise ApiError('Every item needs an integer "id"')
+    instances = config['model'].objects.in_bulk(ids)
+    missing = [pk for pk in ids if pk not in instances]
+    if missing:
+        raise ApiError(f'Unknown id(s): {", ".join(map(str, missing))}', status=404)
+
+    forms = []
+    for item in items:
+        instance = instances[int(item['id'])]
+        form_class = config['form']
+        data = model_to_dict(instance, fields=form_class._meta.fields)
+        data.update({key: value for key, value in item.items() if key != 'id'})
+        forms.append(form_class(data, instance=instance))
+    errors = {index: form.errors.get_json_data() for index, form in enumerate(forms) if not form.is_valid()}
+    if errors:
+        raise ApiError('Validation failed, nothing was updated', errors=errors)
+
+    with transaction.atomic():
+        for form in forms:
+            form.save()
+    return JsonResponse({'success': True, 'count': len(forms)})
+
+
+@api_view
+@require_POST
+def batch_pay(request):
+    """Record a payment for many subscribers: {"ids": [...], "payment_date": "YYYY-MM-DD", "months": 1}"""
+    data = parse_body(request)
+    if not isinstance(data, dict):
+        raise ApiError('Expected a JSON object')
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ApiError('Expected a non-empty "ids" list')
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ApiError('Every id must be an integer')
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ApiError(f'At most {MAX_BATCH_SIZE} ids per batch')
+    try:
+        months = int(data.get('months', 1))
+        payment_date = (datetime.strptime(data['payment_date'], '%Y-%m-%d').date()
+                        if data.get('payment_date') else timezone.now().date())
+    except (TypeError, ValueError):
+        raise ApiError('payment_date must be YYYY-MM-DD and months an integer')
+    if months < 1:
+        raise ApiError('months must be at least 1')
+
+    subscribers = record_payments(ActiveSubscriber.objects.filter(pk__in=ids, is_deactivated=False),
+                                  payment_date, months)
+    return JsonResponse({
+        'success': True,
+        'count': len(subscribers),
+        'ids': [subscriber.pk for subscriber in subscribers],
+        'next_subscription_date': payment_date + timedelta(days=30 * months),
+    })
+
+
+def encode_positions(positions):
+    payload = json.dumps({stream: [moment.isoformat(), pk] for stream, (moment, pk) in positions.items()})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_positions(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return {stream: (datetime.fromisoformat(moment), int(pk)) for stream, (moment, pk) in payload.items()}
+    except (ValueError, TypeError, AttributeError):
+        raise ApiError('Invalid cursor')
+
+
+def after(field, position):
+    """Rows strictly after (timestamp, id) in (field, id) order"""
+    moment, pk = position
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'pk__gt': pk})
+
+
+@api_view
+@require_GET
+def changes(request):
+    """
+    Rows changed and deleted since ?since=<ISO timestamp> or ?cursor=<next_cursor>.
+
+    Each resource (and the tombstones) is read in (updated_at, id) order from
+    the updated_at index, up to ?limit= rows per stream. Keep requesting with
+    next_cursor while has_more is true, then store it for the next sync.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError('limit must be an integer')
+
+    streams = list(RESOURCES) + [DELETED_STREAM]
+    if request.GET.get('cursor'):
+        positions = decode_positions(request.GET['cursor'])
+    else:
+        since = parse_datetime(request.GET.get('since', '')) if request.GET.get('since') else None
+        if request.GET.get('since') and since is None:
+            raise ApiError('since must be an ISO 8601 timestamp')
+        if since and timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        positions = {stream: (since, 0) for stream in streams} if since else {}
+
+    # Leave out the last moments, see CHANGE_FEED_SETTLE_SECONDS
+    settled = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+    has_more = False
+    changed = {}
+    for resource, config in RESOURCES.items():
+        queryset = config['model'].objects.filter(updated_at__lte=settled).order_by('updated_at', 'pk')
+        if resource in positions:
+            queryset = queryset.filter(after('updated_at', positions[resource]))
+        rows = list(queryset.values(*config['fields'])[:limit + 1])
+        has_more = has_more or len(rows) > limit
+        changed[resource] = rows[:limit]
+        if changed[resource]:
+            positions[resource] = (changed[resource][-1]['updated_at'], changed[resource][-1]['id'])
+
+    tombstones = Tombstone.objects.filter(deleted_at__lte=settled).order_by('deleted_at', 'pk')
+    if DELETED_STREAM in positions:
+        tombstones = tombstones.filter(after('deleted_at', positions[DELETED_STREAM]))
+    deleted = list(tombstones.values('id', 'resource', 'object_id', 'deleted_at')[:limit + 1])
+    has_more = has_more or len(deleted) > limit
+    deleted = deleted[:limit]
+    if deleted:
+        positions[DELETED_STREAM] = (deleted[-1]['deleted_at'], deleted[-1]['id'])
+
+    return JsonResponse({
+        'success': True,
+        'version': API_VERSION,
+        'changes': changed,
+        'deleted': [
+            {'resource': row['resource'], 'id': row['object_id'], 'deleted_at': row['deleted_at']}
+            for row in deleted
+        ],
+        'has_more': has_more,
+        'next_cursor': encode_positions(positions),
+    })
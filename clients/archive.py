@@ -0,0 +1,100 @@
+"""
+Hot/cold archival.
+
+Deactivated subscribers and old orders are moved in batches from their hot
+tables into compact archive tables (``ArchivedSubscriber``,
+``ArchivedOrder``): the original pk, the name and phone digits for lookups,
+and the rest of the row as JSON. The hot tables and their indexes only hold
+rows the day-to-day pages need.
+
+Archived rows stay reachable: detail pages and the customer lookup fall back
+to the archive, and ``restore`` puts a row back with its original pk (e.g.
+when a subscriber is reactivated).
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from .admin_mixins import prefix_upper_bound
+from .models import ActiveSubscriber, ArchivedOrder, ArchivedSubscriber, Order
+
+ARCHIVES = {
+    ActiveSubscriber: ArchivedSubscriber,
+    Order: ArchivedOrder,
+}
+
+
+def archive_candidates(model, days=None, now=None):
+    """Rows of ``model`` older than ``days`` (default from settings), ready to archive"""
+    now = now or timezone.now()
+    if model is ActiveSubscriber:
+        days = settings.ARCHIVE_SUBSCRIBERS_AFTER_DAYS if days is None else days
+        return ActiveSubscriber.objects.filter(is_deactivated=True,
+                                               deactivated_at__lte=now - timedelta(days=days))
+    days = settings.ARCHIVE_ORDERS_AFTER_DAYS if days is None else days
+    return Order.objects.filter(order_date__lte=now.date() - timedelta(days=days))
+
+
+def _row_data(instance):
+    return {
+        field.attname: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields if not field.primary_key
+    }
+
+
+def archive_batch(model, queryset, batch_size=500):
+    """Move up to ``batch_size`` rows of ``queryset`` into the archive; returns the number moved"""
+    archive_model = ARCHIVES[model]
+    with transaction.atomic():
+        batch = list(queryset.order_by('pk')[:batch_size])
+        if not batch:
+            return 0
+        archive_model.objects.bulk_create([
+            archive_model(id=row.pk, name=row.name, phone_digits=row.phone_digits, data=_row_data(row))
+            for row in batch
+        ])
+        # A real delete, so the change feed records tombstones for API clients
+        model.objects.filter(pk__in=[row.pk for row in batch]).delete()
+    return len(batch)
+
+
+def archived_instance(model, pk):
+    """Unsaved ``model`` instance rebuilt from the archive, or None"""
+    archived = ARCHIVES[model].objects.filter(pk=pk).first()
+    return _from_archive(model, archived) if archived else None
+
+
+def _from_archive(model, archived):
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    values = {name: fields[name].to_python(value) for name, value in archived.data.items() if name in fields}
+    instance = model(pk=archived.pk, **values)
+    instance.archived_at = archived.archived_at
+    return instance
+
+
+def restore(model, pk):
+    """Move an archived row back into its hot table with its original pk and timestamps"""
+    with transaction.atomic():
+        archived = ARCHIVES[model].objects.select_for_update().get(pk=pk)
+        instance = _from_archive(model, archived)
+        created_at = instance.created_at
+        instance.save(force_insert=True)
+        # auto_now_add overwrote created_at on insert
+        model.objects.filter(pk=pk).update(created_at=created_at)
+        archived.delete()
+    instance.refresh_from_db()
+    return instance
+
+
+def search_archive(model, phone_digits=None, name=None, limit=50):
+    """Archived rows by exact phone digits and/or name prefix, newest archive first"""
+    queryset = ARCHIVES[model].objects.all()
+    if phone_digits:
+        queryset = queryset.filter(phone_digits=phone_digits)
+    if name:
+        prefix = name.lower()
+        queryset = queryset.alias(name_lower=Lower('name')).filter(
+            name_lower__gte=prefix, name_lower__lt=prefix_upper_bound(prefix),
+        )
+    return [_from_archive(model, archived) for archived in queryset.order_by('-archived_at')[:limit]]
@@ -0,0 +1,37 @@
+"""
+Per-process cache of authenticated users.
+
+``login_required`` makes every request load ``request.user``. With
+``CachedModelBackend`` that is a dictionary lookup after the first request;
+a saved or deleted user is dropped from the cache (see signals.py), and
+entries expire after ``USER_CACHE_SECONDS`` so changes made by other
+processes or by ``QuerySet.update()`` are picked up.
+"""
+import copy
+import time
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+_users = {}
+
+
+def forget_user(user_id):
+    _users.pop(user_id, None)
+
+
+def clear_user_cache():
+    _users.clear()
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        cached = _users.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            user = cached[0]
+        else:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            _users[user_id] = (user, time.monotonic() + settings.USER_CACHE_SECONDS)
+        # Each request gets its own copy, so per-request state (e.g. permission caches) is not shared
+        return copy.copy(user)
@@ -0,0 +1,222 @@
+"""
+In-process view benchmark harness.
+
+Requests every GET-able URL in ``clients/urls.py`` through Django's test
+``Client`` as a logged-in user, recording latency and query count, and
+compares the results with a saved baseline JSON file.
+
+``run_throughput`` sends the same concurrent load through the WSGI handler
+(a fixed pool of worker threads) and the ASGI handler (one event loop) to
+compare requests per second.
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from .models import InstallationClient, ActiveSubscriber, Order
+from .replica import REPLICA_ALIAS, replica_available
+from .urls import app_name, urlpatterns
+
+BASELINE_FILE = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+BENCHMARK_USERNAME = 'benchmark'
+
+# Views that log the user out or only accept POST
+SKIPPED_URLS = {
+    'logout', 'deactivate_subscriber', 'reactivate_subscriber', 'bulk_deactivate_subscribers',
+    'bulk_notify_subscribers', 'api_subscriber_batch_pay', 'api_installation_batch_update',
+    'api_subscriber_batch_update', 'api_order_batch_update', 'resolve_duplicates',
+}
+
+PK_MODELS = {
+    'installation': InstallationClient,
+    'subscriber': ActiveSubscriber,
+    'order': Order,
+}
+
+
+def benchmark_urls():
+    """Resolve every benchmarkable URL name to a concrete path"""
+    urls = {}
+    for pattern in urlpatterns:
+        if pattern.name in SKIPPED_URLS:
+            continue
+        kwargs = {}
+        for param in pattern.pattern.converters:
+            if param == 'pk':
+                model = next(model for prefix, model in PK_MODELS.items() if prefix in pattern.name)
+                pk = model.objects.order_by('pk').values_list('pk', flat=True).first()
+                if pk is None:
+                    break
+                kwargs['pk'] = pk
+            elif param == 'installation_type':
+                kwargs[param] = 'starlink'
+        else:
+            urls[pattern.name] = reverse(f'{app_name}:{pattern.name}', kwargs=kwargs)
+    return urls
+
+
+class _QueryCounter:
+    """Count queries on every usable database alias at once"""
+
+    def __init__(self):
+        self.count = 0
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        for alias in connections:
+            if alias != REPLICA_ALIAS or replica_available():
+                self.stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    def __len__(self):
+        return self.count
+
+
+@contextmanager
+def _logged_in_client():
+    """A test Client logged in as the benchmark user; the session and any user created here are removed afterwards"""
+    user, created = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    client = Client()
+    client.force_login(user)
+    try:
+        yield client
+    finally:
+        # Flushes the session from the cache and the django_session table
+        client.logout()
+        if created:
+            user.delete()
+
+
+def run_benchmarks(repeat=5):
+    """Return {url_name: {path, status, queries, median_ms, max_ms}}"""
+    with _logged_in_client() as client:
+        return _run_benchmarks(client, repeat)
+
+
+def _run_benchmarks(client, repeat):
+    results = {}
+    for name, path in benchmark_urls().items():
+        # Warm-up request also gives the query count
+        with _QueryCounter() as queries:
+            response = client.get(path)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            'path': path,
+            'status': response.status_code,
+            'queries': len(queries),
+            'median_ms': round(statistics.median(timings), 2),
+            'max_ms': round(max(timings), 2),
+        }
+    return results
+
+
+def _summary(timings, elapsed):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings),
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 2),
+    }
+
+
+def _wsgi_throughput(paths, total, workers, cookies):
+    local = threading.local()
+
+    def fetch(path):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+            local.client.cookies = cookies
+        start = time.perf_counter()
+        local.client.get(path)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        timings = list(executor.map(fetch, (paths[i % len(paths)] for i in range(total))))
+    return _summary(timings, time.perf_counter() - start)
+
+
+async def _asgi_throughput(paths, total, concurrency, cookies):
+    client = AsyncClient()
+    client.cookies = cookies
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(path):
+        async with slots:
+            start = time.perf_counter()
+            await client.get(path)
+            return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    timings = await asyncio.gather(*(fetch(paths[i % len(paths)]) for i in range(total)))
+    return _summary(timings, time.perf_counter() - start)
+
+
+def run_throughput(url_names, total=200, concurrency=50, workers=4):
+    """Return {'wsgi': {...}, 'asgi': {...}} for the same mix of GET requests"""
+    paths = [reverse(f'{app_name}:{name}') for name in url_names]
+    with _logged_in_client() as client:
+        # Warm up both handlers (URL resolver, template and connection setup)
+        for path in paths:
+            client.get(path)
+        return {
+            'wsgi': _wsgi_throughput(paths, total, workers, client.cookies),
+            'asgi': asyncio.run(_asgi_throughput(paths, total, concurrency, client.cookies)),
+        }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """List regressions: more queries than the baseline, or median latency beyond tolerance"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {expected['queries']})")
+        if result['median_ms'] > expected['median_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: {result['median_ms']}ms median (baseline {expected['median_ms']}ms)")
+    return regressions
+
+
+def query_changes(results, baseline):
+    """{url_name: (baseline queries, queries)} for every URL whose query count differs"""
+    return {
+        name: (baseline[name]['queries'], result['queries'])
+        for name, result in results.items()
+        if name in baseline and result['queries'] != baseline[name]['queries']
+    }
+
+
+def load_baseline(path=BASELINE_FILE):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,119 @@
+"""
+Conditional GET for the list and detail pages.
+
+Each page gets an ETag and Last-Modified from one small query, so a browser
+revalidating an unchanged page gets a 304 without the view running or the
+template rendering. List pages pay one aggregate query for it
+(``MAX(updated_at)``, row count and the latest deletion); detail pages load
+their row for the validator and the view reuses it, so they pay nothing. Responses are ``Cache-Control: private, no-cache``:
+only the browser stores them, and it always revalidates.
+"""
+import hashlib
+import time
+from datetime import datetime, time as dt_time
+from functools import wraps
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max, Subquery
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .models import Tombstone
+from .signals import TOMBSTONE_RESOURCES
+
+# Pages cached before a deploy must not survive a template change
+_BOOT_ID = str(time.time())
+
+
+def _today_start():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min))
+
+
+def _page_etag(request, *parts):
+    """Tie the validator to the user, CSRF token, URL and day as well as the data"""
+    key = '|'.join(map(str, (
+        _BOOT_ID, request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(), timezone.localdate(), *parts,
+    )))
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def _has_pending_messages(request):
+    # len() loads the messages without marking them as shown
+    return len(messages.get_messages(request)) > 0
+
+
+def conditional_page(state_func):
+    """
+    Wrap a GET view with ETag/Last-Modified from ``state_func(request, *args, **kwargs)``.
+
+    ``state_func`` returns (last_modified, *etag_parts), or None to skip the
+    conditional check (e.g. the row does not exist, so the view can 404).
+    """
+    def state(request, *args, **kwargs):
+        # Computed once per request and shared by both validators
+        if not hasattr(request, '_page_state'):
+            request._page_state = (
+                None if _has_pending_messages(request) else state_func(request, *args, **kwargs)
+            )
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        return _page_etag(request, *page_state) if page_state else None
+
+    def last_modified(request, *args, **kwargs):
+        page_state = state(request, *args, **kwargs)
+        if not page_state:
+            return None
+        # Statuses like due soon and overdue change at midnight without any write
+        return max(filter(None, [page_state[0], _today_start()]))
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def list_state(model):
+    """Validator for a full-table list page: latest change, row count and latest deletion"""
+    resource = TOMBSTONE_RESOURCES[model]
+
+    def state_func(request, *args, **kwargs):
+        latest_deletion = (Tombstone.objects.filter(resource=resource)
+                           .order_by('-deleted_at').values('deleted_at')[:1])
+        result = model.objects.order_by().aggregate(
+            last=Max('updated_at'),
+            count=Count('id'),
+            deleted=Max(Subquery(latest_deletion)),
+        )
+        last_modified = max(filter(None, [result['last'], result['deleted']]), default=None)
+        return last_modified, result['last'], result['count'], result['deleted']
+    return state_func
+
+
+def detail_state(model, *related):
+    """
+    Validator for a single-row page: the row's updated_at. The row itself
+    (with ``related`` select_related) is kept for the view, see ``page_object``.
+    """
+    def state_func(request, pk, *args, **kwargs):
+        row = model.objects.select_related(*related).filter(pk=pk).first()
+        request._page_object = row
+        if row is None:
+            return None
+        return row.updated_at, pk, row.updated_at
+    return state_func
+
+
+def page_object(request, queryset, pk):
+    """The row ``detail_state`` loaded for this request (None if it does not exist), else a lookup"""
+    if hasattr(request, '_page_object'):
+        return request._page_object
+    return queryset.filter(pk=pk).first()
@@ -0,0 +1,281 @@
+"""
+Asyncio notification fan-out over email, SMS and WhatsApp.
+
+Each channel has its own backend, concurrency limit, token-bucket rate limit
+and retry queue (configured in ``settings.NOTIFICATION_CHANNELS``), so a
+campaign keeps every provider at its allowed rate instead of sending one
+message at a time.
+
+Backends:
+    ``email``    Django's configured email backend (blocking calls run in a thread)
+    ``webhook``  POSTs the message as JSON to a provider or gateway URL
+    ``file``     appends each message as a JSON line to a local file
+    ``stub``     keeps messages in memory, for tests
+
+A request can only wait for a few messages at the channels' rates, so larger
+selections are queued (``queue_reminders``) and ``run_notifier`` sends them
+with ``send_queued_reminders``.
+"""
+import asyncio
+import json
+import time
+import urllib.request
+from collections import defaultdict
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from .models import QueuedReminder
+
+FROM_EMAIL = 'notifications@starspace.com'
+
+
+class NotificationMessage:
+    def __init__(self, channel, recipient, body, subject='', reference=None):
+        self.channel = channel
+        self.recipient = recipient
+        self.body = body
+        self.subject = subject
+        self.reference = reference
+        self.attempts = 0
+
+    def as_dict(self):
+        return {
+            'channel': self.channel,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'body': self.body,
+            'reference': self.reference,
+        }
+
+
+class TokenBucket:
+    """Allow ``rate`` sends per second with bursts of up to ``capacity``"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Backends
+
+class StubBackend:
+    sent = []
+
+    def __init__(self, **options):
+        self.fail_first = options.get('FAIL_FIRST', 0)
+
+    async def send(self, message):
+        if message.attempts <= self.fail_first:
+            raise ConnectionError('Stub backend simulated failure')
+        StubBackend.sent.append(message.as_dict())
+
+
+class FileBackend:
+    def __init__(self, **options):
+        self.path = options['PATH']
+
+    async def send(self, message):
+        record = dict(message.as_dict(), sent_at=timezone.now().isoformat())
+        await asyncio.to_thread(self._append, json.dumps(record))
+
+    def _append(self, line):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+class WebhookBackend:
+    def __init__(self, **options):
+        self.url = options['URL']
+        self.token = options.get('TOKEN')
+        self.timeout = options.get('TIMEOUT', 10)
+
+    async def send(self, message):
+        await asyncio.to_thread(self._post, json.dumps(message.as_dict()).encode('utf-8'))
+
+    def _post(self, payload):
+        request = urllib.request.Request(self.url, data=payload, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 400:
+                raise ConnectionError(f'Provider returned HTTP {response.status}')
+
+
+class EmailBackend:
+    def __init__(self, **options):
+        self.from_email = options.get('FROM_EMAIL', FROM_EMAIL)
+
+    async def send(self, message):
+        email = EmailMessage(message.subject, message.body, self.from_email, [message.recipient])
+        await asyncio.to_thread(self._send, email)
+
+    def _send(self, email):
+        with get_connection() as connection:
+            connection.send_messages([email])
+
+
+BACKENDS = {
+    'stub': StubBackend,
+    'file': FileBackend,
+    'webhook': WebhookBackend,
+    'email': EmailBackend,
+}
+
+
+class Channel:
+    def __init__(self, name, config):
+        options = {key: value for key, value in config.items()
+                   if key not in ('BACKEND', 'RATE', 'BURST', 'CONCURRENCY', 'MAX_RETRIES', 'RETRY_DELAY')}
+        self.name = name
+        self.backend = BACKENDS[config['BACKEND']](**options)
+        self.rate = config.get('RATE', 1)
+        self.burst = config.get('BURST')
+        self.concurrency = config.get('CONCURRENCY', 1)
+        self.max_retries = config.get('MAX_RETRIES', 3)
+        self.retry_delay = config.get('RETRY_DELAY', 2)
+
+
+class Dispatcher:
+    """Send a batch of messages concurrently, respecting each channel's limits"""
+
+    def __init__(self, channels=None):
+        config = channels if channels is not None else settings.NOTIFICATION_CHANNELS
+        self.channels = {name: Channel(name, channel_config) for name, channel_config in config.items()}
+
+    async def dispatch(self, messages):
+        """Returns {'sent': [...], 'failed': [...]} of NotificationMessage objects"""
+        results = {'sent': [], 'failed': []}
+        queues = {}
+        for message in messages:
+            if message.channel not in self.channels:
+                results['failed'].append(message)
+                continue
+            queues.setdefault(message.channel, []).append(message)
+        await asyncio.gather(*(
+            self._run_channel(self.channels[name], channel_messages, results)
+            for name, channel_messages in queues.items()
+        ))
+        return results
+
+    async def _run_channel(self, channel, messages, results):
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        bucket = TokenBucket(channel.rate, channel.burst)
+        pending = {'count': len(messages)}
+
+        async def worker():
+            while pending['count']:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=0.1)
+                except asyncio.TimeoutError:
+                    continue
+                await bucket.acquire()
+                message.attempts += 1
+                try:
+                    await channel.backend.send(message)
+                except Exception:
+                    if message.attempts <= channel.max_retries:
+                        # Back off, then go to the end of the retry queue
+                        asyncio.get_running_loop().call_later(
+                            channel.retry_delay * 2 ** (message.attempts - 1), queue.put_nowait, message
+                        )
+                        continue
+                    results['failed'].append(message)
+                else:
+                    results['sent'].append(message)
+                pending['count'] -= 1
+
+        await asyncio.gather(*(worker() for _ in range(channel.concurrency)))
+
+
+def international_phone(phone_digits):
+    """Local number to the international form used by SMS and WhatsApp providers"""
+    code = settings.NOTIFICATION_COUNTRY_CODE
+    if phone_digits.startswith('0'):
+        return code + phone_digits[1:]
+    if not phone_digits.startswith(code):
+        return code + phone_digits
+    return phone_digits
+
+
+def reminder_text(subscriber):
+    """Same wording as the WhatsApp button on the subscriber list"""
+    days_left = subscriber.days_until_due() or 0
+    due_date = subscriber.next_subscription_date.strftime('%Y-%m-%d')
+    if days_left < 0:
+        return (f'Hello {subscriber.name}, your Starlink subscription was due on {due_date} '
+                f'and is now overdue by {abs(days_left)} days. Please make payment.')
+    if 0 < days_left <= 7:
+        return (f'Hello {subscriber.name}, your Starlink subscription is due in {days_left} days '
+                f'on {due_date}. Please ensure payment.')
+    return f'Hello {subscriber.name}, your Starlink subscription is due on {due_date}. Please ensure payment.'
+
+
+def reminder_messages(subscribers, channels):
+    messages = []
+    for subscriber in subscribers:
+        text = reminder_text(subscriber)
+        for channel in channels:
+            if channel == 'email':
+                if subscriber.email:
+                    messages.append(NotificationMessage(
+                        'email', subscriber.email, text,
+                        subject='Star Space - Subscription Reminder', reference=subscriber.pk,
+                    ))
+            elif subscriber.phone_digits:
+                messages.append(NotificationMessage(
+                    channel, international_phone(subscriber.phone_digits), text, reference=subscriber.pk,
+                ))
+    return messages
+
+
+def send_reminders(subscribers, channels):
+    """Synchronous entry point for views and commands"""
+    return asyncio.run(Dispatcher().dispatch(reminder_messages(subscribers, channels)))
+
+
+def queue_reminders(subscriber_ids, channels):
+    """Queue reminders for run_notifier to send; returns how many were queued"""
+    return len(QueuedReminder.objects.bulk_create([
+        QueuedReminder(subscriber_id=pk, channels=','.join(channels)) for pk in subscriber_ids
+    ]))
+
+
+def send_queued_reminders(batch_size=100):
+    """
+    Send the queued reminders a batch at a time; returns {'sent': [...], 'failed': [...]}.
+    A batch leaves the queue once it has been sent, so a crash sends it again
+    rather than dropping it.
+    """
+    results = {'sent': [], 'failed': []}
+    while True:
+        batch = list(QueuedReminder.objects.select_related('subscriber').order_by('pk')[:batch_size])
+        if not batch:
+            return results
+        by_channels = defaultdict(list)
+        for queued in batch:
+            if not queued.subscriber.is_deactivated:
+                by_channels[queued.channels].append(queued)
+        for channels, queued in by_channels.items():
+            sent = send_reminders([item.subscriber for item in queued], channels.split(','))
+            results['sent'] += sent['sent']
+            results['failed'] += sent['failed']
+            QueuedReminder.objects.filter(pk__in=[item.pk for item in queued]).delete()
+        # Deactivated since they were queued
+        QueuedReminder.objects.filter(pk__in=[queued.pk for queued in batch]).delete()
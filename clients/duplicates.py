@@ -0,0 +1,339 @@
+"""
+Duplicate customer detection and merging.
+
+The same customer is often typed in more than once, in different tables and
+with variations ("Jean Uwimana" / "Uwimana jean", "(078) 776-8637" /
+"0787768637"). Comparing every record with every other is quadratic, so
+records are first grouped by blocking keys and only records that share a
+key are compared:
+
+- phone: the number in international form (``international_phone``);
+- email: lowercased;
+- name: MinHash band signatures over the character trigrams of the name
+  (words sorted), so names with a few typos or reordered words land in the
+  same block with high probability.
+
+Blocks bigger than ``DUPLICATE_MAX_BLOCK_SIZE`` (a very common name, a
+shared office number) say little about any one pair and are skipped.
+Candidate pairs are scored on name similarity (``difflib``, after the cheap
+``quick_ratio`` upper bounds) and on the best contact match: the same email,
+the same phone, or a phone one typo away, which is what the name blocks are
+for. A shared name alone is not enough. Pairs scoring at least
+``DUPLICATE_MIN_SCORE`` are stored as ``DuplicateCandidate`` rows for review.
+
+Merging makes both records carry the kept record's name, phone and email.
+Two subscriber records are one account, so the duplicate is deleted and a
+``SubscriberMerge`` row points its payments, which keep its pk, at the
+kept subscriber; installations and orders are separate jobs and sales and
+are only corrected. The candidate row keeps every value the merge
+overwrote or deleted (``replaced``), so a wrong merge can be undone by hand.
+"""
+import zlib
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+from itertools import combinations
+from operator import ne
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum, Value
+from django.utils import timezone
+from .dispatch import international_phone
+from .models import (ActiveSubscriber, DuplicateCandidate, InstallationClient, Order, PaymentSummary,
+                     SubscriberMerge)
+from .payments import account_payments
+
+# resource: (model, phone field, email field or None)
+SOURCES = {
+    'installations': (InstallationClient, 'contact', 'email'),
+    'subscribers': (ActiveSubscriber, 'contact', 'email'),
+    'orders': (Order, 'phone', None),
+}
+
+# Which record a merge keeps by default: an account over a job over a sale
+KEEP_ORDER = {'subscribers': 0, 'installations': 1, 'orders': 2}
+
+# Subscriber fields a merge may change on the kept record
+FOLDED_FIELDS = ['last_subscription_date', 'next_subscription_date', 'is_deactivated', 'deactivated_at',
+                 'deactivation_reason']
+
+# score = NAME_WEIGHT * name similarity + CONTACT_WEIGHT * best of phone and email
+NAME_WEIGHT = 0.6
+CONTACT_WEIGHT = 0.4
+# A phone number one typo away counts this much of an exact match
+TYPO_PHONE = 0.8
+
+BANDS = 6
+ROWS = 3
+# Multiply-shift hash family over the trigram's CRC32, one (a, b) per MinHash row
+_PRIME = (1 << 61) - 1
+_HASHES = [(2 * seed + 0x9E3779B1 * (seed + 1), 0x7F4A7C15 * (seed + 3)) for seed in range(BANDS * ROWS)]
+
+Record = namedtuple('Record', 'resource pk name name_key phone email')
+
+
+def name_key(name):
+    """Lowercased words of the name, sorted, so word order and punctuation do not matter"""
+    words = ''.join(ch if ch.isalnum() else ' ' for ch in name.lower()).split()
+    return ' '.join(sorted(words))
+
+
+def load_records():
+    """Every installation, subscriber and order as a Record (one values_list query per table)"""
+    records = []
+    for resource, (model, _, email_field) in SOURCES.items():
+        rows = model.objects.order_by().values_list(
+            'pk', 'name', 'phone_digits', email_field or Value(''),
+        )
+        for pk, name, phone_digits, email in rows.iterator(chunk_size=5000):
+            records.append(Record(
+                resource, pk, name, name_key(name),
+                international_phone(phone_digits) if phone_digits else '',
+                (email or '').strip().lower(),
+            ))
+    return records
+
+
+def _name_signature(key, signatures, grams):
+    """The MinHash band keys of a name; trigram hashes and signatures are computed once per run"""
+    signature = signatures.get(key)
+    if signature is None:
+        padded = f' {key} '
+        rows = []
+        for gram in {padded[i:i + 3] for i in range(len(padded) - 2)}:
+            hashes = grams.get(gram)
+            if hashes is None:
+                value = zlib.crc32(gram.encode())
+                hashes = grams[gram] = tuple((a * value + b) % _PRIME for a, b in _HASHES)
+            rows.append(hashes)
+        minimums = tuple(map(min, *rows)) if len(rows) > 1 else rows[0]
+        signature = signatures[key] = [('name', band, minimums[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+    return signature
+
+
+def candidate_pairs(records, max_block):
+    """Index pairs (i, j), i < j, of records sharing at least one blocking key"""
+    blocks = defaultdict(list)
+    signatures, grams = {}, {}
+    for index, record in enumerate(records):
+        if record.phone:
+            blocks['phone', record.phone].append(index)
+        if record.email:
+            blocks['email', record.email].append(index)
+        if record.name_key:
+            for key in _name_signature(record.name_key, signatures, grams):
+                blocks[key].append(index)
+
+    pairs = set()
+    skipped = 0
+    for members in blocks.values():
+        if len(members) > max_block:
+            skipped += 1
+        elif len(members) > 1:
+            pairs.update(combinations(members, 2))
+    return pairs, len(blocks), skipped
+
+
+def phone_similarity(left, right):
+    """1 for the same number, TYPO_PHONE for one wrong or two swapped digits, else 0"""
+    if not left or not right:
+        return 0
+    if left == right:
+        return 1
+    if len(left) != len(right):
+        return 0
+    # Counted in C: most pairs are rejected here
+    wrong = sum(map(ne, left, right))
+    if wrong == 1:
+        return TYPO_PHONE
+    if wrong == 2:
+        first = next(i for i in range(len(left)) if left[i] != right[i])
+        if first + 1 < len(left) and left[first] == right[first + 1] and left[first + 1] == right[first]:
+            return TYPO_PHONE
+    return 0
+
+
+def score(left, right, min_score=0):
+    """(score, reasons) for two records; (0, '') as soon as ``min_score`` is out of reach"""
+    phone = phone_similarity(left.phone, right.phone)
+    email = 1 if left.email and left.email == right.email else 0
+    base = CONTACT_WEIGHT * max(phone, email)
+    # A name alone (however close) never makes a duplicate: nothing to compare further
+    if base + NAME_WEIGHT < min_score:
+        return 0, ''
+
+    if left.name_key == right.name_key:
+        name = 1.0
+    else:
+        matcher = SequenceMatcher(None, left.name_key, right.name_key, autojunk=False)
+        # Each bound is cheaper than the next and at least as large
+        if (base + NAME_WEIGHT * matcher.real_quick_ratio() < min_score
+                or base + NAME_WEIGHT * matcher.quick_ratio() < min_score):
+            return 0, ''
+        name = matcher.ratio()
+
+    reasons = [reason for reason, matched in (
+        ('name', name == 1), ('similar name', 0 < name < 1), ('phone', phone == 1),
+        ('similar phone', 0 < phone < 1), ('email', email)) if matched]
+    return base + NAME_WEIGHT * name, ', '.join(reasons)
+
+
+def _same_customer(left, right):
+    """Two jobs or sales already recorded under identical details: nothing to review"""
+    if left.resource == right.resource == 'subscribers':
+        return False
+    return left.name_key == right.name_key and left.phone == right.phone and left.email == right.email
+
+
+def find_duplicates(min_score=None, max_block=None):
+    """
+    Score every pair of records that share a blocking key.
+
+    Returns (unsaved DuplicateCandidate list, stats dict). Pairs already
+    dismissed or merged are left out.
+    """
+    min_score = settings.DUPLICATE_MIN_SCORE if min_score is None else min_score
+    max_block = settings.DUPLICATE_MAX_BLOCK_SIZE if max_block is None else max_block
+    records = load_records()
+    # (resource, pk) order, so each pair has a single canonical form
+    records.sort(key=lambda record: (record.resource, record.pk))
+    pairs, block_count, skipped = candidate_pairs(records, max_block)
+
+    decided = set(DuplicateCandidate.objects.exclude(status='PENDING').values_list(
+        'left_resource', 'left_id', 'right_resource', 'right_id'))
+    candidates = []
+    for i, j in pairs:
+        left, right = records[i], records[j]
+        if _same_customer(left, right) or (left.resource, left.pk, right.resource, right.pk) in decided:
+            continue
+        total, reasons = score(left, right, min_score)
+        if total >= min_score:
+            candidates.append(DuplicateCandidate(
+                left_resource=left.resource, left_id=left.pk,
+                right_resource=right.resource, right_id=right.pk,
+                score=round(total, 4), reasons=reasons,
+            ))
+    stats = {'records': len(records), 'blocks': block_count, 'skipped_blocks': skipped,
+             'compared': len(pairs), 'found': len(candidates)}
+    return candidates, stats
+
+
+def replace_pending(candidates):
+    """Swap the pending review list for a fresh run's candidates in one transaction"""
+    with transaction.atomic():
+        DuplicateCandidate.objects.filter(status='PENDING').delete()
+        DuplicateCandidate.objects.bulk_create(candidates, batch_size=500, ignore_conflicts=True)
+
+
+def load_pairs(candidates):
+    """
+    Attach the two records to each candidate as ``left`` and ``right`` (one
+    ``in_bulk`` per table). Candidates whose records are gone are dropped.
+    """
+    candidates = list(candidates)
+    ids = defaultdict(set)
+    for candidate in candidates:
+        ids[candidate.left_resource].add(candidate.left_id)
+        ids[candidate.right_resource].add(candidate.right_id)
+    loaded = {resource: SOURCES[resource][0].objects.in_bulk(pks) for resource, pks in ids.items()}
+
+    pairs = []
+    for candidate in candidates:
+        candidate.left = loaded[candidate.left_resource].get(candidate.left_id)
+        candidate.right = loaded[candidate.right_resource].get(candidate.right_id)
+        if candidate.left and candidate.right:
+            pairs.append(candidate)
+    return pairs
+
+
+def suggested_keep(candidate):
+    """'left' or 'right': the subscriber over an installation over an order, then the older record"""
+    left = (KEEP_ORDER[candidate.left_resource], candidate.left_id)
+    right = (KEEP_ORDER[candidate.right_resource], candidate.right_id)
+    return 'left' if left <= right else 'right'
+
+
+def _values(instance, fields=None):
+    """{attname: value} of ``instance``'s concrete fields (all but the pk by default)"""
+    return {
+        field.attname: field.value_from_object(instance) for field in instance._meta.concrete_fields
+        if (field.attname in fields if fields else not field.primary_key)
+    }
+
+
+def _fold_subscriber(kept, other, candidate):
+    """
+    Map ``other``'s payments to ``kept``, take over its subscription dates, then
+    delete ``other``. Returns the values the fold replaced.
+    """
+    replaced = {f'subscribers:{other.pk}': _values(other), f'subscribers:{kept.pk}': _values(kept, FOLDED_FIELDS)}
+    # The ledger is not touched: other's payments keep its pk and resolve through the merge row
+    SubscriberMerge.objects.filter(kept_id=other.pk).update(kept_id=kept.pk)
+    SubscriberMerge.objects.create(merged_id=other.pk, kept=kept, candidate=candidate)
+    totals = account_payments(kept).aggregate(
+        lifetime_paid=Sum('amount'), payment_count=Count('pk'), last_paid_on=Max('paid_on'),
+    )
+    PaymentSummary.objects.filter(pk=other.pk).delete()
+    if totals['payment_count']:
+        PaymentSummary.objects.update_or_create(subscriber=kept, defaults=totals)
+
+    kept.last_subscription_date = max(kept.last_subscription_date, other.last_subscription_date)
+    kept.next_subscription_date = max(kept.next_subscription_date, other.next_subscription_date)
+    if kept.is_deactivated and not other.is_deactivated:
+        kept.is_deactivated = False
+        kept.deactivated_at = None
+        kept.deactivation_reason = None
+    kept.save()
+    other.delete()
+    return replaced
+
+
+def merge(candidate, keep=None):
+    """
+    Merge the pair of ``candidate``, keeping the ``keep`` side ('left' or 'right',
+    default ``suggested_keep``).
+
+    Returns the (resource, pk) of a record the merge deleted, or None. Raises
+    ValueError if either record no longer exists.
+    """
+    keep = keep or suggested_keep(candidate)
+    if keep not in ('left', 'right'):
+        raise ValueError(f'Unknown side: {keep}')
+    sides = {
+        'left': (candidate.left_resource, candidate.left_id),
+        'right': (candidate.right_resource, candidate.right_id),
+    }
+    kept_key, other_key = sides[keep], sides['right' if keep == 'left' else 'left']
+
+    with transaction.atomic():
+        records = {}
+        for resource, pk in (kept_key, other_key):
+            model = SOURCES[resource][0]
+            records[resource, pk] = model.objects.select_for_update().filter(pk=pk).first()
+            if records[resource, pk] is None:
+                raise ValueError(f'{model._meta.verbose_name.capitalize()} #{pk} no longer exists')
+        kept, other = records[kept_key], records[other_key]
+
+        if kept_key[0] == other_key[0] == 'subscribers':
+            replaced = _fold_subscriber(kept, other, candidate)
+            removed = other_key
+            DuplicateCandidate.objects.filter(
+                Q(left_resource=removed[0], left_id=removed[1]) | Q(right_resource=removed[0], right_id=removed[1]),
+                status='PENDING',
+            ).exclude(pk=candidate.pk).delete()
+        else:
+            _, kept_phone, kept_email = SOURCES[kept_key[0]]
+            _, other_phone, other_email = SOURCES[other_key[0]]
+            changed = ['name', other_phone] + ([other_email] if other_email else [])
+            replaced = {f'{other_key[0]}:{other.pk}': _values(other, changed)}
+            removed = None
+            other.name = kept.name
+            setattr(other, other_phone, getattr(kept, kept_phone))
+            if kept_email and other_email and getattr(kept, kept_email):
+                setattr(other, other_email, getattr(kept, kept_email))
+            other.save()
+
+        candidate.status = 'MERGED'
+        candidate.replaced = replaced
+        candidate.merged_at = timezone.now()
+        candidate.save(update_fields=['status', 'replaced', 'merged_at'])
+    return removed
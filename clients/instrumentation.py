@@ -0,0 +1,122 @@
+"""
+Per-request performance instrumentation.
+
+Enabled with ``PERF_INSTRUMENTATION = True``. Every request gets a
+``Server-Timing`` header with SQL and template timings, and a sample of
+requests is appended as JSON lines to ``PERF_LOG_FILE`` for ``perf_report``.
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils import timezone
+
+# Same statement repeated this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+_current_stats = ContextVar('perf_stats', default=None)
+_log_lock = threading.Lock()
+_template_render = DjangoTemplate.render
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = []
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    def record_query(self, sql, params, duration):
+        self.queries.append((sql, repr(params)))
+        self.sql_time += duration
+
+    def duplicate_count(self):
+        """Queries repeated with identical SQL and parameters"""
+        return sum(count - 1 for count in Counter(self.queries).values() if count > 1)
+
+    def n_plus_one(self):
+        """Statements issued many times with different parameters"""
+        statements = Counter(sql for sql, _ in self.queries)
+        return [
+            {'sql': sql[:200], 'count': count}
+            for sql, count in statements.most_common()
+            if count >= N_PLUS_ONE_THRESHOLD
+        ]
+
+
+def _instrumented_render(self, context=None, request=None):
+    stats = _current_stats.get()
+    if stats is None:
+        return _template_render(self, context, request)
+    start = time.perf_counter()
+    try:
+        return _template_render(self, context, request)
+    finally:
+        stats.template_time += time.perf_counter() - start
+
+
+class PerformanceInstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 1.0)
+        self.log_file = getattr(settings, 'PERF_LOG_FILE', None)
+        # Only the top-level render of each response goes through the backend template
+        DjangoTemplate.render = _instrumented_render
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.record_query(sql, params, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        total_time = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={stats.sql_time * 1000:.1f};desc="{len(stats.queries)} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ])
+
+        if self.log_file and random.random() < self.sample_rate:
+            match = request.resolver_match
+            self.write_record({
+                'ts': timezone.now().isoformat(),
+                'url_name': match.view_name if match else None,
+                'path': request.path,
+                'method': request.method,
+                'status': response.status_code,
+                'total_ms': round(total_time * 1000, 2),
+                'sql_ms': round(stats.sql_time * 1000, 2),
+                'query_count': len(stats.queries),
+                'duplicate_queries': stats.duplicate_count(),
+                'n_plus_one': stats.n_plus_one(),
+                'template_ms': round(stats.template_time * 1000, 2),
+            })
+        return response
+
+    def write_record(self, record):
+        line = json.dumps(record)
+        with _log_lock:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
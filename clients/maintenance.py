@@ -0,0 +1,188 @@
+"""
+SQLite housekeeping for db.sqlite3.
+
+Deletes and edits leave free pages behind and planner statistics drift as
+tables grow. ``run_maintenance`` runs these steps on its own connection,
+each within a time budget:
+
+- analyze: ``ANALYZE`` (sampled with ``analysis_limit``) of the tables that
+  have no statistics yet or have halved or doubled since they were last
+  analyzed. This is what ``PRAGMA optimize`` does, but before SQLite 3.46
+  optimize only looks at tables the current connection has queried, and a
+  maintenance connection has queried none;
+- vacuum: ``PRAGMA incremental_vacuum`` in small chunks, returning free
+  pages to the filesystem (needs ``auto_vacuum=INCREMENTAL``, migration
+  0016). Each chunk is its own short write transaction, so requests can
+  write in between;
+- check: ``PRAGMA quick_check``;
+- checkpoint: ``PRAGMA wal_checkpoint(PASSIVE)``, then ``TRUNCATE`` to
+  shrink the -wal file if no reader is in the way.
+
+A step that runs out of time is interrupted through SQLite's progress
+handler and waits at most its budget for a lock; work already committed is
+kept and the next run picks up the rest.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+
+STEPS = ('analyze', 'vacuum', 'check', 'checkpoint')
+AUTO_VACUUM_MODES = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}
+# Free pages released per incremental_vacuum transaction
+VACUUM_CHUNK_PAGES = 256
+# Re-analyze a table once its row count has doubled or halved
+ANALYZE_GROWTH = 2
+
+
+class StepTimeout(Exception):
+    pass
+
+
+def connect(path=None, timeout=None):
+    """Autocommit connection to the primary database; ``timeout`` caps lock waits"""
+    timeout = settings.DB_MAINTENANCE_STEP_SECONDS if timeout is None else timeout
+    return sqlite3.connect(path or settings.DATABASES['default']['NAME'], timeout=timeout, isolation_level=None)
+
+
+def _pragma(db, name):
+    return db.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def database_stats(db):
+    """Size, free pages and WAL size of the database behind ``db``"""
+    page_size, page_count, free_pages = (_pragma(db, name) for name in ('page_size', 'page_count', 'freelist_count'))
+    path = db.execute('PRAGMA database_list').fetchone()[2]
+    wal = Path(f'{path}-wal')
+    return {
+        'bytes': page_size * page_count,
+        'free_bytes': page_size * free_pages,
+        'fragmentation': free_pages / page_count if page_count else 0,
+        'wal_bytes': wal.stat().st_size if path and wal.exists() else 0,
+        'auto_vacuum': AUTO_VACUUM_MODES[_pragma(db, 'auto_vacuum')],
+    }
+
+
+@contextmanager
+def _time_box(db, seconds):
+    """Interrupt the running statement once ``seconds`` have passed"""
+    deadline = time.monotonic() + seconds
+    db.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+    try:
+        yield deadline
+    except sqlite3.OperationalError as e:
+        if 'interrupt' in str(e):
+            raise StepTimeout from e
+        raise
+    finally:
+        db.set_progress_handler(None, 0)
+
+
+def stale_tables(db):
+    """Tables without statistics, or whose row count moved ANALYZE_GROWTH-fold since the last ANALYZE"""
+    tables = [name for (name,) in db.execute(
+        "SELECT name FROM sqlite_schema WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    analyzed = {}
+    if db.execute("SELECT 1 FROM sqlite_schema WHERE name = 'sqlite_stat1'").fetchone():
+        # The first number of each stat row is the table's row count at ANALYZE time
+        for table, stat in db.execute('SELECT tbl, stat FROM sqlite_stat1'):
+            analyzed[table] = max(analyzed.get(table, 0), int(stat.split()[0]))
+
+    stale = []
+    for table in tables:
+        rows = db.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+        if table not in analyzed:
+            # ANALYZE records nothing for an empty table
+            if rows:
+                stale.append(table)
+        elif rows > analyzed[table] * ANALYZE_GROWTH or rows * ANALYZE_GROWTH < analyzed[table]:
+            stale.append(table)
+    return stale
+
+
+def analyze(db, full=False):
+    """ANALYZE stale tables (all of them, unsampled, with ``full``); one transaction per table"""
+    if full:
+        db.execute('PRAGMA analysis_limit=0')
+        db.execute('ANALYZE')
+        return 'all tables analyzed'
+    db.execute(f'PRAGMA analysis_limit={settings.DB_MAINTENANCE_ANALYSIS_LIMIT}')
+    tables = stale_tables(db)
+    for table in tables:
+        db.execute(f'ANALYZE "{table}"')
+    return f"{len(tables)} table(s) analyzed{': ' + ', '.join(tables) if tables else ''}"
+
+
+def incremental_vacuum(db, deadline):
+    """Release free pages a chunk at a time until there are none left or time is up"""
+    if _pragma(db, 'auto_vacuum') != 2:
+        return None
+    released = 0
+    while time.monotonic() < deadline:
+        free_pages = _pragma(db, 'freelist_count')
+        if not free_pages:
+            break
+        db.execute(f'PRAGMA incremental_vacuum({VACUUM_CHUNK_PAGES})').fetchall()
+        released += free_pages - _pragma(db, 'freelist_count')
+    return f'{released} page(s) released, {_pragma(db, "freelist_count")} left'
+
+
+def quick_check(db):
+    """None if the database is consistent, otherwise SQLite's first few complaints"""
+    problems = [row[0] for row in db.execute('PRAGMA quick_check(10)')]
+    return None if problems == ['ok'] else problems
+
+
+def checkpoint(db):
+    """Copy the WAL into the database without waiting; truncate it when every frame got through"""
+    if _pragma(db, 'journal_mode') != 'wal':
+        return None
+    busy, frames, done = db.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+    if busy or frames != done:
+        return f'{done} of {frames} frame(s) checkpointed, readers still on the rest'
+    timeout = _pragma(db, 'busy_timeout')
+    # TRUNCATE holds the write lock while it waits for readers: only try it if nobody is in the way
+    db.execute('PRAGMA busy_timeout=0')
+    try:
+        truncated = not db.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()[0]
+    finally:
+        db.execute(f'PRAGMA busy_timeout={timeout}')
+    return f"{frames} frame(s) checkpointed{', WAL truncated' if truncated else ''}"
+
+
+def run_maintenance(db, steps=STEPS, step_seconds=None, full_analyze=False):
+    """
+    Run ``steps`` in order; yields one result per step as it finishes:
+    {'step': ..., 'status': 'done' | 'timeout' | 'skipped' | 'failed', 'detail': ..., 'seconds': ...}
+    """
+    step_seconds = settings.DB_MAINTENANCE_STEP_SECONDS if step_seconds is None else step_seconds
+    for step in steps:
+        started = time.monotonic()
+        status, detail = 'done', ''
+        try:
+            with _time_box(db, step_seconds) as deadline:
+                if step == 'analyze':
+                    detail = analyze(db, full_analyze)
+                elif step == 'vacuum':
+                    detail = incremental_vacuum(db, deadline)
+                    if detail is None:
+                        status, detail = 'skipped', 'auto_vacuum is not INCREMENTAL (run migrate)'
+                elif step == 'check':
+                    problems = quick_check(db)
+                    if problems:
+                        status, detail = 'failed', '; '.join(problems)
+                    else:
+                        detail = 'ok'
+                elif step == 'checkpoint':
+                    detail = checkpoint(db)
+                    if detail is None:
+                        status, detail = 'skipped', 'not in WAL mode'
+                else:
+                    raise ValueError(f'Unknown maintenance step: {step}')
+        except StepTimeout:
+            status, detail = 'timeout', f'stopped at its {step_seconds:g}s budget'
+        except sqlite3.OperationalError as e:
+            # e.g. "database is locked" once the lock wait ran out
+            status, detail = 'failed', str(e)
+        yield {'step': step, 'status': status, 'detail': detail, 'seconds': time.monotonic() - started}
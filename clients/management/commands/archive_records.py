@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from clients.archive import archive_batch, archive_candidates
+from clients.models import ActiveSubscriber, Order
+
+class Command(BaseCommand):
+    help = 'Move long-deactivated subscribers and old orders into the archive tables (meant to run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers-days', type=int, default=settings.ARCHIVE_SUBSCRIBERS_AFTER_DAYS,
+                          help='Archive subscribers deactivated at least this many days ago '
+                               f'(default: {settings.ARCHIVE_SUBSCRIBERS_AFTER_DAYS})')
+        parser.add_argument('--orders-days', type=int, default=settings.ARCHIVE_ORDERS_AFTER_DAYS,
+                          help=f'Archive orders older than this many days (default: {settings.ARCHIVE_ORDERS_AFTER_DAYS})')
+        parser.add_argument('--batch-size', type=int, default=500,
+                          help='Rows moved per transaction (default: 500)')
+        parser.add_argument('--dry-run', action='store_true',
+                          help='Only report how many rows would be archived')
+
+    def handle(self, *args, **options):
+        days = {ActiveSubscriber: options['subscribers_days'], Order: options['orders_days']}
+        for model, label in ((ActiveSubscriber, 'subscribers'), (Order, 'orders')):
+            queryset = archive_candidates(model, days[model])
+            if options['dry_run']:
+                self.stdout.write(f"📊 {queryset.count()} {label} would be archived")
+                continue
+
+            total = 0
+            while True:
+                moved = archive_batch(model, queryset, options['batch_size'])
+                if not moved:
+                    break
+                total += moved
+                self.stdout.write(f"   {total} {label} archived...")
+            if total:
+                self.stdout.write(self.style.SUCCESS(f"✅ Archived {total} {label}"))
+            else:
+                self.stdout.write(f"⏭️ No {label} to archive")
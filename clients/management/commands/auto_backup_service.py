@@ -193,6 +193,17 @@ class Command(BaseCommand):
             error_msg = f"❌ Monthly backup failed: {str(e)}"
             self.stdout.write(self.style.ERROR(error_msg))
             self.log_to_file(log_file, error_msg)
+            return
+        
+        # Offsite copy, so a lost disk does not take the backups with it
+        try:
+            self.stdout.write("  ☁️ Shipping backups offsite...")
+            call_command('ship_backups', stdout=self.stdout)
+            self.log_to_file(log_file, "  ✅ Offsite copy completed")
+        except Exception as e:
+            error_msg = f"❌ Offsite copy failed (local backups are fine): {str(e)}"
+            self.stdout.write(self.style.ERROR(error_msg))
+            self.log_to_file(log_file, error_msg)
 
     def log_to_file(self, log_file, message):
         """Write message to log file"""
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment, teardown_test_environment
+from clients.benchmarks import run_throughput
+
+DEFAULT_URLS = 'subscriber_stats,subscriber_list_json'
+
+class Command(BaseCommand):
+    help = 'Compare WSGI and ASGI throughput for the same concurrent mix of requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--urls', type=str, default=DEFAULT_URLS,
+                          help=f'Comma-separated clients URL names to request (default: {DEFAULT_URLS})')
+        parser.add_argument('--requests', type=int, default=200,
+                          help='Total requests per handler (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=50,
+                          help='Requests in flight at once under ASGI (default: 50)')
+        parser.add_argument('--workers', type=int, default=4,
+                          help='WSGI worker threads, like a threaded server (default: 4)')
+
+    def handle(self, *args, **options):
+        url_names = [name.strip() for name in options['urls'].split(',') if name.strip()]
+
+        setup_test_environment()
+        try:
+            results = run_throughput(
+                url_names,
+                total=options['requests'],
+                concurrency=options['concurrency'],
+                workers=options['workers'],
+            )
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"📊 {options['requests']} requests over {', '.join(url_names)}")
+        self.stdout.write(f"{'handler':<8} {'req/s':>8} {'median ms':>10} {'p95 ms':>8}")
+        for handler, result in results.items():
+            self.stdout.write(
+                f"{handler:<8} {result['requests_per_second']:>8.1f} "
+                f"{result['median_ms']:>10.2f} {result['p95_ms']:>8.2f}"
+            )
+
+        ratio = results['asgi']['requests_per_second'] / results['wsgi']['requests_per_second']
+        self.stdout.write(self.style.SUCCESS(f"✅ ASGI throughput is {ratio:.2f}x WSGI"))
@@ -0,0 +1,119 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from clients.models import ActiveSubscriber
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent mark_subscriber_paid writes with default vs tuned SQLite settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8,
+                          help='Number of concurrent writers (default: 8)')
+        parser.add_argument('--writes', type=int, default=200,
+                          help='Payments recorded per writer (default: 200)')
+        parser.add_argument('--rows', type=int, default=1000,
+                          help='Subscribers in the scratch database (default: 1000)')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        writes = options['writes']
+        rows = options['rows']
+
+        profiles = [
+            # Python's sqlite3 defaults: rollback journal, deferred transactions, 5s timeout
+            ('default', {}, 'DEFERRED', 5),
+            # The live database gets WAL from a migration rather than per connection
+            ('tuned', {'journal_mode': 'WAL', **settings.SQLITE_PRAGMAS}, 'IMMEDIATE',
+             settings.DATABASES['default']['OPTIONS']['timeout']),
+        ]
+
+        self.stdout.write(f"📊 {threads} writers x {writes} payments over {rows} subscribers")
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, pragmas, transaction_mode, timeout in profiles:
+                path = Path(tmp) / f'{label}.sqlite3'
+                self.prepare_database(path, rows)
+                results[label] = self.run_writers(path, pragmas, transaction_mode, timeout, threads, writes, rows)
+                elapsed, done, locked = results[label]
+                self.stdout.write(
+                    f"  {label:<8} {done / elapsed:>9.1f} writes/s   "
+                    f"{done} ok, {locked} 'database is locked' in {elapsed:.2f}s"
+                )
+
+        default_rate = results['default'][1] / results['default'][0]
+        tuned_rate = results['tuned'][1] / results['tuned'][0]
+        if default_rate:
+            self.stdout.write(self.style.SUCCESS(f"✅ Tuned profile: {tuned_rate / default_rate:.1f}x write throughput"))
+
+    def prepare_database(self, path, rows):
+        """Create the subscriber table with the live schema and fill it with rows"""
+        with connection.schema_editor(collect_sql=True) as editor:
+            editor.create_model(ActiveSubscriber)
+        conn = sqlite3.connect(path)
+        for statement in editor.collected_sql:
+            conn.execute(statement.rstrip(';'))
+        now = timezone.now().isoformat()
+        today = date.today()
+        conn.executemany(
+            'INSERT INTO clients_activesubscriber (name, contact, phone_digits, email, created_at, updated_at, '
+            'kit_type, last_subscription_date, next_subscription_date, is_active, auto_notify, is_deactivated) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 1, 0)',
+            [
+                (f'Subscriber {i}', '0787768637', '0787768637', f'sub{i}@example.com', now, now,
+                 'STANDARD', today.isoformat(), (today + timedelta(days=30)).isoformat())
+                for i in range(rows)
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+    def run_writers(self, path, pragmas, transaction_mode, timeout, threads, writes, rows):
+        """Run concurrent read-modify-write payments, mirroring mark_subscriber_paid"""
+        counters = {'done': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def writer(offset):
+            conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+            for name, value in pragmas.items():
+                conn.execute(f'PRAGMA {name}={value}')
+            done = locked = 0
+            for i in range(writes):
+                pk = (offset * writes + i) % rows + 1
+                payment_date = date.today()
+                try:
+                    conn.execute(f'BEGIN {transaction_mode}')
+                    conn.execute('SELECT * FROM clients_activesubscriber WHERE id = ?', (pk,)).fetchone()
+                    conn.execute(
+                        'UPDATE clients_activesubscriber SET last_subscription_date = ?, '
+                        'next_subscription_date = ?, updated_at = ? WHERE id = ?',
+                        (payment_date.isoformat(), (payment_date + timedelta(days=30)).isoformat(),
+                         timezone.now().isoformat(), pk),
+                    )
+                    conn.execute('COMMIT')
+                    done += 1
+                except sqlite3.OperationalError as e:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            conn.close()
+            with lock:
+                counters['done'] += done
+                counters['locked'] += locked
+
+        workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        return elapsed, counters['done'], counters['locked']
@@ -0,0 +1,87 @@
+import time
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import get_template, render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from clients.models import InstallationClient, ActiveSubscriber
+
+DUMMY_FRAGMENTS = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure list page render time with and without the per-row fragment cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+                          help='Rows rendered per page (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=3,
+                          help='Renders per measurement; the best one is reported (default: 3)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        today = timezone.localdate()
+        subscribers = ActiveSubscriber.objects.order_by('pk')
+        pages = [
+            ('subscriber_list', '/subscribers/', {'subscribers': list(subscribers[:rows])}),
+            ('installation_list', '/installations/',
+             {'installations': list(InstallationClient.objects.order_by('pk')[:rows])}),
+            ('overdue', '/subscribers/overdue/',
+             {'subscribers': list(subscribers.filter(next_subscription_date__lt=today)[:rows])}),
+            ('due_soon', '/subscribers/due-soon/', {'subscribers': list(subscribers[:rows])}),
+        ]
+
+        user = User(username='benchmark')
+        self.stdout.write(f"📊 Render time per 1,000 rows (best of {options['repeat']})")
+        self.stdout.write(f"{'template':<20} {'rows':>6} {'uncached':>10} {'cold':>10} {'warm':>10}")
+        for name, path, context in pages:
+            count = len(next(iter(context.values())))
+            if not count:
+                self.stdout.write(f"⏭️ {name}: no rows, run seed_data first")
+                continue
+            request = RequestFactory().get(path)
+            request.user = user
+            template_name = f'clients/{name}.html'
+
+            def render():
+                return render_to_string(template_name, context, request=request)
+
+            with override_settings(CACHES=DUMMY_FRAGMENTS):
+                uncached = self._best(render, options['repeat'])
+            caches['fragments'].clear()
+            cold = self._best(render, 1)
+            warm = self._best(render, options['repeat'])
+
+            per_1k = 1000 / count
+            self.stdout.write(
+                f"{name:<20} {count:>6} {uncached * per_1k:>8.1f}ms {cold * per_1k:>8.1f}ms {warm * per_1k:>8.1f}ms"
+            )
+
+        self._report_parse_cost([f'clients/{name}.html' for name, _, _ in pages])
+
+    def _best(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    def _report_parse_cost(self, template_names):
+        """Compare compiling the templates from source with fetching them from the template loader"""
+        engine = engines['django'].engine
+        sources = [engine.find_template(name)[0].source for name in template_names]
+        parse = self._best(lambda: [engine.from_string(source) for source in sources], 5)
+        for name in template_names:
+            get_template(name)
+        load = self._best(lambda: [get_template(name) for name in template_names], 5)
+
+        cached = any(hasattr(loader, 'get_template_cache') for loader in engine.template_loaders)
+        self.stdout.write(f"📊 Parsing {len(template_names)} list templates: {parse:.2f}ms; "
+                          f"get_template: {load:.2f}ms ({'cached' if cached else 'not cached, DEBUG'} loader)")
+        self.stdout.write(self.style.SUCCESS("✅ Template benchmark complete"))
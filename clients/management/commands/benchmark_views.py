@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from clients.benchmarks import BASELINE_FILE, compare, load_baseline, query_changes, run_benchmarks, save_baseline
+
+class Command(BaseCommand):
+    help = 'Measure latency and query count of every clients URL and compare with a saved baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                          help='Timed requests per URL after one warm-up (default: 5)')
+        parser.add_argument('--baseline', type=str, default=BASELINE_FILE,
+                          help=f'Baseline JSON file (default: {BASELINE_FILE})')
+        parser.add_argument('--save-baseline', action='store_true',
+                          help='Write these results as the new baseline instead of comparing')
+        parser.add_argument('--accept-more-queries', nargs='+', default=[], metavar='URL_NAME',
+                          help='With --save-baseline: URL names whose query count may go up '
+                               '(explain each in the commit)')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                          help='Allowed median latency increase over baseline (default: 0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        # Allows the 'testserver' host and swaps in the in-memory email backend
+        setup_test_environment()
+        try:
+            results = run_benchmarks(repeat=options['repeat'])
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{'URL name':<30} {'status':>6} {'queries':>8} {'median ms':>10} {'max ms':>8}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<30} {result['status']:>6} {result['queries']:>8} "
+                f"{result['median_ms']:>10.2f} {result['max_ms']:>8.2f}"
+            )
+
+        if options['save_baseline']:
+            try:
+                previous = load_baseline(options['baseline'])
+            except FileNotFoundError:
+                previous = {}
+            changes = query_changes(results, previous)
+            for name, (before, after) in changes.items():
+                self.stdout.write(f'📊 {name}: {before} -> {after} queries')
+            # A saved baseline must not quietly absorb a regression
+            unaccepted = [name for name, (before, after) in changes.items()
+                          if after > before and name not in options['accept_more_queries']]
+            if unaccepted:
+                raise CommandError(f"More queries than the baseline for {', '.join(unaccepted)}; "
+                                   f"fix them or pass --accept-more-queries {' '.join(unaccepted)}")
+            save_baseline(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Baseline saved to {options['baseline']}"))
+            return
+
+        try:
+            baseline = load_baseline(options['baseline'])
+        except FileNotFoundError:
+            raise CommandError(f"No baseline at {options['baseline']}, run with --save-baseline first")
+
+        regressions = compare(results, baseline, options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"❌ {regression}"))
+            raise CommandError(f'{len(regressions)} performance regression(s) against baseline')
+        self.stdout.write(self.style.SUCCESS('✅ No regressions against baseline'))
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+from clients.models import InstallationClient, ActiveSubscriber, Order, DailyRollup, Payment
+
+INSTALLATION_FIELDS = {
+    'STARLINK': 'starlink_installations',
+    'CCTV': 'cctv_installations',
+    'NETWORKING': 'networking_installations',
+    'SOLAR': 'solar_installations',
+}
+
+STATUS_FIELDS = ['active_count', 'due_soon_count', 'overdue_count', 'deactivated_count', 'standard_count', 'mini_count']
+
+class Command(BaseCommand):
+    help = 'Fill DailyRollup rows for every day since the last run (meant to run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days-back', type=int, default=90,
+                          help='How far back the first run starts (default: 90 days)')
+        parser.add_argument('--include-today', action='store_true',
+                          help='Also roll up today, which is normally left for the next night')
+        parser.add_argument('--rebuild', action='store_true',
+                          help='Delete existing rollups and rebuild from --days-back')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        end = today if options['include_today'] else today - timedelta(days=1)
+
+        if options['rebuild']:
+            DailyRollup.objects.all().delete()
+
+        # The most recent row is always rebuilt: it may be a partial day (--include-today)
+        last_date = DailyRollup.objects.aggregate(last=Max('date'))['last']
+        start = last_date if last_date else today - timedelta(days=options['days_back'])
+
+        if start > end:
+            self.stdout.write("⏭️ Rollups already up to date")
+            return
+
+        # Status can only be read off the subscriber rows as they are now, so only the
+        # day that is ending gets it; rebuilt past days keep what they had
+        existing = {rollup.date: rollup for rollup in DailyRollup.objects.filter(date__range=(start, end))}
+        snapshot_day = end if end >= today - timedelta(days=1) else None
+        rollups = {}
+        day = start
+        while day <= end:
+            if day == snapshot_day:
+                status = self.subscriber_status(day)
+            elif day in existing:
+                status = {field: getattr(existing[day], field) for field in STATUS_FIELDS}
+            else:
+                status = {}
+            rollups[day] = DailyRollup(date=day, **status)
+            day += timedelta(days=1)
+
+        # Day-keyed activity comes from one grouped query per table for the whole range
+        for row in (InstallationClient.objects
+                    .filter(installation_date__range=(start, end))
+                    .values('installation_date', 'installation_type')
+                    .annotate(total=Count('id'))):
+            field = INSTALLATION_FIELDS.get(row['installation_type'])
+            if field:
+                setattr(rollups[row['installation_date']], field, row['total'])
+
+        for day, total in self.counts_by_day(Order.objects, 'order_date', start, end).items():
+            rollups[day].orders_count = total
+
+        # Payments come from the ledger; before it existed a payment only showed up
+        # as the subscriber's new last_subscription_date
+        first_payment = Payment.objects.aggregate(first=Min('paid_on'))['first']
+        for day, total in self.counts_by_day(ActiveSubscriber.objects, 'last_subscription_date', start, end).items():
+            if first_payment is None or day < first_payment:
+                rollups[day].payments_recorded = total
+        for row in (Payment.objects.filter(paid_on__range=(start, end))
+                    .values('paid_on').annotate(total=Count('id'), amount=Sum('amount'))):
+            rollups[row['paid_on']].payments_recorded = row['total']
+            rollups[row['paid_on']].revenue_collected = row['amount']
+
+        with transaction.atomic():
+            DailyRollup.objects.filter(date__range=(start, end)).delete()
+            DailyRollup.objects.bulk_create(rollups.values())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(rollups)} daily rollup(s) built for {start} to {end}"
+        ))
+
+    def counts_by_day(self, queryset, date_field, start, end):
+        counts = defaultdict(int)
+        for row in (queryset.filter(**{f'{date_field}__range': (start, end)})
+                    .values(date_field).annotate(total=Count('id'))):
+            counts[row[date_field]] = row['total']
+        return counts
+
+    def subscriber_status(self, day):
+        """Subscriber counts as they stand now, due dates compared with ``day``, in one aggregate query"""
+        active = Q(is_deactivated=False)
+        return ActiveSubscriber.objects.aggregate(
+            active_count=Count('id', filter=active & Q(next_subscription_date__gte=day)),
+            due_soon_count=Count('id', filter=active & Q(
+                next_subscription_date__gte=day,
+                next_subscription_date__lte=day + timedelta(days=7),
+            )),
+            overdue_count=Count('id', filter=active & Q(next_subscription_date__lt=day)),
+            deactivated_count=Count('id', filter=Q(is_deactivated=True)),
+            standard_count=Count('id', filter=active & Q(kit_type='STANDARD')),
+            mini_count=Count('id', filter=active & Q(kit_type='MINI')),
+        )
@@ -0,0 +1,94 @@
+import re
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from clients.staticfiles import IMAGE_FORMATS, IMAGE_VARIANTS, variant_name
+
+STATIC_DIR = Path(settings.BASE_DIR) / 'static'
+ICON_SPRITE = STATIC_DIR / 'vendor' / 'bootstrap-icons' / 'bootstrap-icons.svg'
+ICON_CSS = STATIC_DIR / 'vendor' / 'bootstrap-icons' / 'bootstrap-icons.css'
+
+# bi-name, plus names built in templates like bi-{% if ... %}check-circle{% else %}pencil{% endif %}-fill
+ICON_PATTERN = re.compile(r'\bbi-([a-z0-9]+(?:-[a-z0-9]+)*)')
+CONDITIONAL_ICON_PATTERN = re.compile(
+    r'bi-\{%\s*if [^%]*%\}([\w-]+)\{%\s*else\s*%\}([\w-]+)\{%\s*endif\s*%\}([\w-]*)'
+)
+
+ICON_CSS_HEADER = """/*!
+ * Bootstrap Icons (https://icons.getbootstrap.com/), MIT License
+ * Subset of the icons used in the templates, generated by build_static_assets.
+ */
+.bi::before{display:inline-block;content:"";width:1em;height:1em;vertical-align:-.125em;background-color:currentColor;-webkit-mask:var(--bi) no-repeat center/contain;mask:var(--bi) no-repeat center/contain}
+"""
+
+class Command(BaseCommand):
+    help = 'Regenerate the Bootstrap Icons subset stylesheet and WebP/AVIF image variants in static/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-icons', action='store_true',
+                          help='Do not rebuild the icon stylesheet')
+        parser.add_argument('--skip-images', action='store_true',
+                          help='Do not regenerate image variants')
+
+    def handle(self, *args, **options):
+        if not options['skip_icons']:
+            self.build_icons()
+        if not options['skip_images']:
+            self.build_images()
+
+    def used_icons(self):
+        icons = set()
+        for path in Path(settings.BASE_DIR).glob('templates/**/*.html'):
+            text = path.read_text(encoding='utf-8-sig')
+            for first, second, suffix in CONDITIONAL_ICON_PATTERN.findall(text):
+                icons.update({first + suffix, second + suffix})
+            icons.update(ICON_PATTERN.findall(text))
+        return icons
+
+    def build_icons(self):
+        if not ICON_SPRITE.exists():
+            raise CommandError(f'Icon sprite not found at {ICON_SPRITE}')
+        sprite = ICON_SPRITE.read_text(encoding='utf-8')
+        symbols = dict(re.findall(r'<symbol[^>]*id="([^"]+)"[^>]*>(.*?)</symbol>', sprite, flags=re.S))
+
+        rules = []
+        missing = []
+        for name in sorted(self.used_icons()):
+            if name not in symbols:
+                missing.append(name)
+                continue
+            svg = (f"<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 16 16'>"
+                   f"{symbols[name].replace(chr(34), chr(39)).strip()}</svg>")
+            svg = re.sub(r'\s+', ' ', svg).replace('#', '%23').replace('<', '%3C').replace('>', '%3E')
+            rules.append(f'.bi-{name}::before{{--bi:url("data:image/svg+xml,{svg}")}}')
+
+        ICON_CSS.write_text(ICON_CSS_HEADER + '\n'.join(rules) + '\n', encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(rules)} icon(s) written to {ICON_CSS}"))
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f"⏭️ bi-{name} is not in the sprite"))
+
+    def build_images(self):
+        try:
+            from PIL import Image, features
+        except ImportError:
+            raise CommandError('Pillow is required for image variants (pip install pillow)')
+
+        formats = [image_format for image_format in IMAGE_FORMATS if features.check(image_format)]
+        for image_format in set(IMAGE_FORMATS) - set(formats):
+            self.stdout.write(self.style.WARNING(f"⏭️ This Pillow build cannot write {image_format.upper()}"))
+
+        for image, widths in IMAGE_VARIANTS.items():
+            source = Image.open(STATIC_DIR / image)
+            original_size = (STATIC_DIR / image).stat().st_size
+            for width in widths:
+                resized = source.copy()
+                resized.thumbnail((width, source.height * width // source.width), Image.LANCZOS)
+                for image_format in formats:
+                    target = STATIC_DIR / variant_name(image, width, image_format)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    resized.save(target, image_format.upper(), quality=70 if image_format == 'webp' else 55)
+                    self.stdout.write(
+                        f"📊 {target.relative_to(STATIC_DIR)}: {target.stat().st_size // 1024} KB "
+                        f"(original {original_size // 1024} KB)"
+                    )
+        self.stdout.write(self.style.SUCCESS("✅ Image variants written"))
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from clients.maintenance import STEPS, connect, database_stats, run_maintenance
+
+MB = 1024 * 1024
+
+class Command(BaseCommand):
+    help = 'Keep db.sqlite3 healthy: ANALYZE stale tables, release free pages, quick_check and checkpoint the WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('steps', nargs='*', metavar='step',
+                          help=f"Steps to run, in order (default: all of {', '.join(STEPS)})")
+        parser.add_argument('--step-seconds', type=float, default=settings.DB_MAINTENANCE_STEP_SECONDS,
+                          help='Stop each step after this many seconds '
+                               f'(default: {settings.DB_MAINTENANCE_STEP_SECONDS})')
+        parser.add_argument('--full-analyze', action='store_true',
+                          help='ANALYZE every table without sampling instead of only the stale ones')
+        parser.add_argument('--interval', type=float, default=0,
+                          help='Keep running and repeat every N hours (default: run once)')
+
+    def handle(self, *args, **options):
+        unknown = set(options['steps']) - set(STEPS)
+        if unknown:
+            raise CommandError(f"Unknown step(s): {', '.join(sorted(unknown))}")
+        if not options['interval']:
+            if not self.run_once(options):
+                raise CommandError('quick_check found problems; restore from the latest backup')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Database maintenance every {options['interval']:g} hour(s)"))
+        try:
+            while True:
+                self.stdout.write(f"\n{datetime.now():%Y-%m-%d %H:%M:%S}")
+                self.run_once(options)
+                time.sleep(options['interval'] * 3600)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('🛑 Database maintenance stopped'))
+
+    def run_once(self, options):
+        """Run the steps once and log the file before and after; False if the integrity check failed"""
+        healthy = True
+        db = connect(timeout=options['step_seconds'])
+        try:
+            self.write_stats('Before', database_stats(db))
+            for result in run_maintenance(db, options['steps'] or STEPS, options['step_seconds'],
+                                          options['full_analyze']):
+                line = f"{result['step']}: {result['detail']} ({result['seconds']:.2f}s)"
+                if result['status'] == 'done':
+                    self.stdout.write(self.style.SUCCESS(f"✅ {line}"))
+                elif result['status'] in ('skipped', 'timeout'):
+                    self.stdout.write(f"⏭️ {line}")
+                else:
+                    self.stdout.write(self.style.ERROR(f"❌ {line}"))
+                    healthy = healthy and result['step'] != 'check'
+            self.write_stats('After', database_stats(db))
+        finally:
+            db.close()
+        return healthy
+
+    def write_stats(self, label, stats):
+        self.stdout.write(
+            f"📊 {label}: {stats['bytes'] / MB:.1f} MB, {stats['free_bytes'] / MB:.1f} MB free "
+            f"({stats['fragmentation']:.1%} fragmented), WAL {stats['wal_bytes'] / MB:.1f} MB, "
+            f"auto_vacuum {stats['auto_vacuum']}"
+        )
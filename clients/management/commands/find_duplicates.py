@@ -0,0 +1,37 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from clients.duplicates import find_duplicates, replace_pending
+
+class Command(BaseCommand):
+    help = 'Find installations, subscribers and orders that look like the same customer and list them for review'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-score', type=float, default=settings.DUPLICATE_MIN_SCORE,
+                          help=f'Lowest similarity (0-1) to list (default: {settings.DUPLICATE_MIN_SCORE})')
+        parser.add_argument('--max-block', type=int, default=settings.DUPLICATE_MAX_BLOCK_SIZE,
+                          help='Skip blocking keys shared by more records than this '
+                               f'(default: {settings.DUPLICATE_MAX_BLOCK_SIZE})')
+        parser.add_argument('--dry-run', action='store_true',
+                          help='Report what would be listed without replacing the pending review list')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        candidates, stats = find_duplicates(options['min_score'], options['max_block'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"📊 {stats['records']:,} records, {stats['blocks']:,} blocks ({stats['skipped_blocks']:,} too large), "
+            f"{stats['compared']:,} pairs compared in {elapsed:.2f}s"
+        )
+
+        if options['dry_run']:
+            for candidate in sorted(candidates, key=lambda candidate: -candidate.score)[:20]:
+                self.stdout.write(f"   {candidate} [{candidate.reasons}]")
+            self.stdout.write(f"📊 {len(candidates):,} possible duplicates would be listed")
+            return
+
+        replace_pending(candidates)
+        if candidates:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(candidates):,} possible duplicates listed for review"))
+        else:
+            self.stdout.write("⏭️ No duplicates found")
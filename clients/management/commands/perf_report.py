@@ -0,0 +1,69 @@
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+METRICS = ['total_ms', 'sql_ms', 'template_ms', 'query_count']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = 'Aggregate p50/p95/p99 timings per URL name from the request performance log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log-file', type=str, default=None,
+                          help='JSONL log to read (default: settings.PERF_LOG_FILE)')
+        parser.add_argument('--metric', choices=METRICS, default='total_ms',
+                          help='Metric to sort by (default: total_ms)')
+
+    def handle(self, *args, **options):
+        log_file = Path(options['log_file'] or getattr(settings, 'PERF_LOG_FILE', ''))
+        if not log_file.is_file():
+            raise CommandError(f'Performance log not found: {log_file}')
+
+        samples = defaultdict(lambda: defaultdict(list))
+        flagged = defaultdict(int)
+        with open(log_file, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                url_name = record.get('url_name') or record.get('path')
+                for metric in METRICS:
+                    samples[url_name][metric].append(record.get(metric, 0))
+                if record.get('duplicate_queries') or record.get('n_plus_one'):
+                    flagged[url_name] += 1
+
+        if not samples:
+            self.stdout.write(self.style.WARNING('No records in performance log'))
+            return
+
+        rows = []
+        for url_name, metrics in samples.items():
+            row = {'url_name': url_name, 'requests': len(metrics['total_ms']), 'flagged': flagged[url_name]}
+            for metric, values in metrics.items():
+                values.sort()
+                for pct in (50, 95, 99):
+                    row[f'{metric}_p{pct}'] = percentile(values, pct)
+            rows.append(row)
+        rows.sort(key=lambda row: row[f"{options['metric']}_p95"], reverse=True)
+
+        header = f"{'URL name':<40} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'sql p95':>9} {'tpl p95':>9} {'q p95':>6} {'N+1':>5}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{str(row['url_name'])[:40]:<40} {row['requests']:>6} "
+                f"{row['total_ms_p50']:>9.1f} {row['total_ms_p95']:>9.1f} {row['total_ms_p99']:>9.1f} "
+                f"{row['sql_ms_p95']:>9.1f} {row['template_ms_p95']:>9.1f} "
+                f"{row['query_count_p95']:>6} {row['flagged']:>5}"
+            )
@@ -0,0 +1,39 @@
+import json
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from clients.projections import project
+
+class Command(BaseCommand):
+    help = 'Project subscription renewals, overdue aging and churn-adjusted revenue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12,
+                          help='Number of 30-day periods to project (default: 12)')
+        parser.add_argument('--json', action='store_true',
+                          help='Print the raw projection as JSON')
+
+    def handle(self, *args, **options):
+        projection = project(months=options['months'])
+        
+        if options['json']:
+            self.stdout.write(json.dumps(projection, cls=DjangoJSONEncoder, indent=2))
+            return
+        
+        self.stdout.write(
+            f"📈 {projection['active_subscribers']:,} active subscribers, "
+            f"monthly churn {projection['monthly_churn_percent']}%"
+        )
+        self.stdout.write(f"{'Period':<26} {'Renewals':>9} {'Expected':>9} {'Revenue':>12} {'Expected':>12}")
+        for period in projection['periods']:
+            self.stdout.write(
+                f"{period['start']:%d %b} - {period['end']:%d %b %Y}".ljust(26)
+                + f" {period['renewals']:>9,} {period['expected_renewals']:>9,.0f}"
+                f" {period['revenue']:>12,.0f} {period['expected_revenue']:>12,.0f}"
+            )
+        self.stdout.write("Overdue aging:")
+        for bucket in projection['aging']:
+            self.stdout.write(f"  {bucket['label']:<12} {bucket['count']:>8,} {bucket['amount']:>12,.0f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {projection['total_expected_revenue']:,.0f} churn-adjusted revenue "
+            f"(computed in {projection['elapsed_ms']} ms)"
+        ))
@@ -0,0 +1,28 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from clients.replica import refresh_replica
+
+class Command(BaseCommand):
+    help = 'Refresh the read-only reporting replica from the primary database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                          help='Keep running and refresh every N minutes (default: refresh once)')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        
+        while True:
+            started = time.perf_counter()
+            if refresh_replica():
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ [{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Replica refreshed "
+                    f"in {time.perf_counter() - started:.2f}s"
+                ))
+            else:
+                self.stdout.write(self.style.WARNING("⏭️ Replica mirrors the primary, nothing to refresh"))
+            
+            if not interval:
+                break
+            time.sleep(interval * 60)
@@ -0,0 +1,72 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from clients.dispatch import send_queued_reminders
+from clients.notifications import next_notify_at, reschedule_all, send_due_reminders
+
+class Command(BaseCommand):
+    help = 'Long-running notifier for scheduled due-date reminders and reminders queued from the site'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-sleep', type=int, default=300,
+                          help='Longest sleep in seconds before re-checking the schedule (default: 300)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                          help='Reminders sent per batch (default: 100)')
+        parser.add_argument('--queue-poll', type=int, default=15,
+                          help='Longest wait in seconds before sending reminders queued from the site (default: 15)')
+        parser.add_argument('--reschedule', action='store_true',
+                          help='Recompute every subscriber\'s reminder time before starting')
+
+    def handle(self, *args, **options):
+        max_sleep = options['max_sleep']
+        
+        if options['reschedule']:
+            count = reschedule_all()
+            self.stdout.write(f"🗓️ Rescheduled reminders for {count} subscribers")
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"🔔 Notifier started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} (Ctrl+C to stop)"
+        ))
+        
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    sent = send_due_reminders(batch_size=options['batch_size'])
+                except Exception as e:
+                    # Unsent reminders keep their notify_at and are retried on the next wake-up
+                    self.stdout.write(self.style.ERROR(f"❌ Sending reminders failed: {str(e)}"))
+                    time.sleep(min(max_sleep, 60))
+                    continue
+                if sent:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"✅ [{datetime.now().strftime('%H:%M:%S')}] {len(sent)} reminder(s) sent"
+                    ))
+                
+                try:
+                    queued = send_queued_reminders(batch_size=options['batch_size'])
+                except Exception as e:
+                    # The batch stays queued and is sent on the next wake-up
+                    self.stdout.write(self.style.ERROR(f"❌ Sending queued reminders failed: {str(e)}"))
+                else:
+                    if queued['sent'] or queued['failed']:
+                        self.stdout.write(self.style.SUCCESS(
+                            f"✅ [{datetime.now().strftime('%H:%M:%S')}] {len(queued['sent'])} queued message(s) sent"
+                            + (f", {len(queued['failed'])} failed" if queued['failed'] else '')
+                        ))
+                
+                # Sleep until the earliest pending reminder; the cap picks up schedules
+                # changed by other processes, and the queue poll reminders queued from the site
+                upcoming = next_notify_at()
+                wake = min(max_sleep, options['queue_poll'])
+                if upcoming is None:
+                    sleep_seconds = wake
+                else:
+                    sleep_seconds = min(wake, max(0, (upcoming - timezone.now()).total_seconds()))
+                time.sleep(max(1, sleep_seconds))
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                f"\n🛑 Notifier stopped at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            ))
@@ -0,0 +1,146 @@
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from clients.models import InstallationClient, ActiveSubscriber, Order, normalize_phone
+from clients.notifications import notify_at_for
+
+PRESETS = {
+    'small': 10_000,
+    'medium': 100_000,
+    'large': 1_000_000,
+}
+
+FIRST_NAMES = ['Jean', 'Marie', 'Eric', 'Aline', 'Patrick', 'Grace', 'David', 'Claudine',
+               'Emmanuel', 'Diane', 'Olivier', 'Sandrine', 'Yvonne', 'Josiane', 'Samuel', 'Alice']
+LAST_NAMES = ['Uwimana', 'Mugisha', 'Habimana', 'Niyonzima', 'Mukamana', 'Nshimiyimana',
+              'Ingabire', 'Hakizimana', 'Uwase', 'Bizimana', 'Iradukunda', 'Ndayisaba']
+ORDER_ITEMS = ['Starlink Standard kit', 'Starlink Mini kit', '20m cable extension', 'Wall mount',
+               'Pipe adapter', 'Mesh router', '4-camera CCTV set', 'Solar panel 300W', 'Power bank']
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic installations, subscribers and orders for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=PRESETS, default='small',
+                          help='Rows per model: small=10k, medium=100k, large=1M (default: small)')
+        parser.add_argument('--installations', type=int, default=None, help='Override installation count')
+        parser.add_argument('--subscribers', type=int, default=None, help='Override subscriber count')
+        parser.add_argument('--orders', type=int, default=None, help='Override order count')
+        parser.add_argument('--days-back', type=int, default=730,
+                          help='Spread installation and order dates over this many past days (default: 730)')
+        parser.add_argument('--distribution', choices=['uniform', 'recent'], default='recent',
+                          help='Date distribution: uniform, or skewed towards recent days (default: recent)')
+        parser.add_argument('--overdue-ratio', type=float, default=0.15,
+                          help='Share of active subscribers already overdue (default: 0.15)')
+        parser.add_argument('--due-soon-ratio', type=float, default=0.10,
+                          help='Share of active subscribers due within 7 days (default: 0.10)')
+        parser.add_argument('--deactivated-ratio', type=float, default=0.05,
+                          help='Share of deactivated subscribers (default: 0.05)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+        parser.add_argument('--clear', action='store_true', help='Delete existing rows first')
+
+    def handle(self, *args, **options):
+        if options['overdue_ratio'] + options['due_soon_ratio'] > 1:
+            raise CommandError('--overdue-ratio and --due-soon-ratio cannot add up to more than 1')
+
+        size = PRESETS[options['preset']]
+        self.rng = random.Random(options['seed'])
+        self.today = timezone.now().date()
+        self.options = options
+
+        if options['clear']:
+            Order.objects.all().delete()
+            ActiveSubscriber.objects.all().delete()
+            InstallationClient.objects.all().delete()
+            self.stdout.write(self.style.WARNING('🧹 Existing rows deleted'))
+
+        for model, count, factory in (
+            (InstallationClient, options['installations'], self.make_installation),
+            (ActiveSubscriber, options['subscribers'], self.make_subscriber),
+            (Order, options['orders'], self.make_order),
+        ):
+            count = size if count is None else count
+            self.seed(model, count, factory)
+
+    def seed(self, model, count, factory):
+        batch_size = self.options['batch_size']
+        created = 0
+        while created < count:
+            batch = [factory() for _ in range(min(batch_size, count - created))]
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'✅ {created:,} {model._meta.verbose_name_plural} created'))
+
+    def past_date(self):
+        days_back = self.options['days_back']
+        if self.options['distribution'] == 'recent':
+            offset = int(self.rng.triangular(0, days_back, 0))
+        else:
+            offset = self.rng.randint(0, days_back)
+        return self.today - timedelta(days=offset)
+
+    def name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def phone(self):
+        """Random number in one of the three formats the validator accepts"""
+        digits = f'07{self.rng.choice("2389")}{self.rng.randint(0, 9_999_999):07d}'
+        style = self.rng.randint(0, 2)
+        if style == 0:
+            return f'({digits[:3]}) {digits[3:6]}-{digits[6:]}'
+        if style == 1:
+            return f'{digits[:3]}-{digits[3:6]}-{digits[6:]}'
+        return digits
+
+    def make_installation(self):
+        name = self.name()
+        contact = self.phone()
+        return InstallationClient(
+            name=name,
+            contact=contact,
+            phone_digits=normalize_phone(contact),
+            email=f'{name.lower().replace(" ", ".")}{self.rng.randint(1, 999)}@example.com',
+            installation_type=self.rng.choices(
+                ['STARLINK', 'CCTV', 'NETWORKING', 'SOLAR'], weights=[60, 15, 15, 10])[0],
+            installation_date=self.past_date(),
+        )
+
+    def make_subscriber(self):
+        name = self.name()
+        contact = self.phone()
+        roll = self.rng.random()
+        if roll < self.options['overdue_ratio']:
+            next_date = self.today - timedelta(days=self.rng.randint(1, 60))
+        elif roll < self.options['overdue_ratio'] + self.options['due_soon_ratio']:
+            next_date = self.today + timedelta(days=self.rng.randint(0, 7))
+        else:
+            next_date = self.today + timedelta(days=self.rng.randint(8, 30))
+        deactivated = self.rng.random() < self.options['deactivated_ratio']
+        subscriber = ActiveSubscriber(
+            name=name,
+            contact=contact,
+            phone_digits=normalize_phone(contact),
+            email=f'{name.lower().replace(" ", ".")}{self.rng.randint(1, 999)}@example.com',
+            kit_type=self.rng.choices(['STANDARD', 'MINI'], weights=[70, 30])[0],
+            last_subscription_date=next_date - timedelta(days=30),
+            next_subscription_date=next_date,
+            is_deactivated=deactivated,
+            deactivated_at=timezone.now() if deactivated else None,
+            deactivation_reason='Seeded' if deactivated else None,
+        )
+        # bulk_create skips the pre_save signal that normally schedules reminders
+        subscriber.notify_at = notify_at_for(subscriber)
+        return subscriber
+
+    def make_order(self):
+        phone = self.phone()
+        return Order(
+            name=self.name(),
+            order_details=', '.join(self.rng.sample(ORDER_ITEMS, self.rng.randint(1, 3))),
+            phone=phone,
+            phone_digits=normalize_phone(phone),
+            order_date=self.past_date(),
+        )
@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from clients.dispatch import send_reminders
+from clients.models import ActiveSubscriber
+
+class Command(BaseCommand):
+    help = 'Send a reminder campaign to a subscriber segment over one or more channels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segment', choices=['due-soon', 'overdue', 'all'], default='due-soon',
+                          help='Which active subscribers to remind (default: due-soon)')
+        parser.add_argument('--channels', type=str, default='whatsapp',
+                          help='Comma-separated channels, e.g. email,sms,whatsapp (default: whatsapp)')
+
+    def handle(self, *args, **options):
+        channels = [channel.strip() for channel in options['channels'].split(',') if channel.strip()]
+        unknown = [channel for channel in channels if channel not in settings.NOTIFICATION_CHANNELS]
+        if unknown:
+            raise CommandError(f"Unknown channel(s): {', '.join(unknown)}")
+        
+        today = timezone.now().date()
+        subscribers = ActiveSubscriber.objects.filter(is_deactivated=False)
+        if options['segment'] == 'due-soon':
+            subscribers = subscribers.filter(
+                next_subscription_date__gte=today,
+                next_subscription_date__lte=today + timedelta(days=7),
+            )
+        elif options['segment'] == 'overdue':
+            subscribers = subscribers.filter(next_subscription_date__lt=today)
+        
+        started = time.perf_counter()
+        results = send_reminders(subscribers, channels)
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(results['sent'])} message(s) sent over {', '.join(channels)} in {elapsed:.1f}s"
+        ))
+        for message in results['failed']:
+            self.stdout.write(self.style.ERROR(
+                f"❌ {message.channel} to {message.recipient} failed after {message.attempts} attempt(s)"
+            ))
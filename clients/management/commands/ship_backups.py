@@ -0,0 +1,58 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from clients.offsite import MB, MIN_PART_SIZE, backup_files, ship_backups
+
+class Command(BaseCommand):
+    help = 'Upload local backups to the offsite store (parallel multipart, resumable, throttled)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*',
+                          help='Backup files to ship (default: everything in the backups directory)')
+        parser.add_argument('--concurrency', type=int,
+                          help=f"Parts uploaded at once (default: {settings.OFFSITE_BACKUP.get('CONCURRENCY', 4)})")
+        parser.add_argument('--part-size-mb', type=int,
+                          help=f"Part size in MB, at least {MIN_PART_SIZE // MB} "
+                               f"(default: {settings.OFFSITE_BACKUP.get('PART_SIZE', 8 * MB) // MB})")
+        parser.add_argument('--limit-kbps', type=int,
+                          help='Bandwidth limit in KB/s for all parts together, 0 for none '
+                               f"(default: {settings.OFFSITE_BACKUP.get('MAX_BYTES_PER_SECOND', 0) // 1024})")
+        parser.add_argument('--dry-run', action='store_true',
+                          help='Only list the files that would be shipped')
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options['part_size_mb'] is not None and options['part_size_mb'] * MB < MIN_PART_SIZE:
+            raise CommandError(f'--part-size-mb must be at least {MIN_PART_SIZE // MB}')
+        if options['concurrency']:
+            overrides['CONCURRENCY'] = options['concurrency']
+        if options['part_size_mb']:
+            overrides['PART_SIZE'] = options['part_size_mb'] * MB
+        if options['limit_kbps'] is not None:
+            overrides['MAX_BYTES_PER_SECOND'] = options['limit_kbps'] * 1024
+
+        files = options['files'] or backup_files()
+        if options['dry_run']:
+            for path in files:
+                self.stdout.write(f"📦 {path}")
+            self.stdout.write(f"📊 {len(files)} file(s) would be shipped unless already offsite")
+            return
+
+        start = time.monotonic()
+        shipped = failed = 0
+        for path, result in ship_backups(files, **overrides):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"❌ {path}: {result} (sent parts are kept for the next run)"))
+            elif result['status'] == 'skipped':
+                self.stdout.write(f"⏭️ {path} is already offsite")
+            else:
+                shipped += 1
+                resumed = (f", resumed after {result['parts'] - result['sent_parts']} part(s)"
+                           if result['status'] == 'resumed' else '')
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {path}: {result['bytes'] / MB:.1f} MB in {result['sent_parts']} part(s){resumed}"
+                ))
+        self.stdout.write(f"📊 {shipped} shipped, {failed} failed in {time.monotonic() - start:.1f}s")
+        if failed:
+            raise CommandError(f'{failed} backup(s) could not be shipped offsite')
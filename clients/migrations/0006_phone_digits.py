@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activesubscriber',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='installationclient',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+    ]
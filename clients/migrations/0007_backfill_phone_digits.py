@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:50
+
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def backfill_phone_digits(apps, schema_editor):
+    """Populate phone_digits for existing rows in primary-key batches"""
+    for model_name, phone_field in (
+        ('InstallationClient', 'contact'),
+        ('ActiveSubscriber', 'contact'),
+        ('Order', 'phone'),
+    ):
+        model = apps.get_model('clients', model_name)
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', phone_field)[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for obj in batch:
+                obj.phone_digits = re.sub(r'\D', '', getattr(obj, phone_field) or '')
+            model.objects.bulk_update(batch, ['phone_digits'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_phone_digits'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_phone_digits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0007_backfill_phone_digits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('active_count', models.PositiveIntegerField(default=0)),
+                ('due_soon_count', models.PositiveIntegerField(default=0)),
+                ('overdue_count', models.PositiveIntegerField(default=0)),
+                ('deactivated_count', models.PositiveIntegerField(default=0)),
+                ('standard_count', models.PositiveIntegerField(default=0)),
+                ('mini_count', models.PositiveIntegerField(default=0)),
+                ('starlink_installations', models.PositiveIntegerField(default=0)),
+                ('cctv_installations', models.PositiveIntegerField(default=0)),
+                ('networking_installations', models.PositiveIntegerField(default=0)),
+                ('solar_installations', models.PositiveIntegerField(default=0)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('payments_recorded', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:10
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_reminders(apps, schema_editor):
+    """Give existing subscribers a notify_at, mirroring clients.notifications.notify_at_for"""
+    ActiveSubscriber = apps.get_model('clients', 'ActiveSubscriber')
+    hour, minute = map(int, settings.NOTIFY_TIME.split(':'))
+    today = timezone.localdate()
+    pending = ActiveSubscriber.objects.filter(
+        is_deactivated=False, is_active=True, auto_notify=True, next_subscription_date__gte=today,
+    )
+    last_pk = 0
+    while True:
+        batch = list(
+            pending.filter(pk__gt=last_pk).order_by('pk').only('pk', 'next_subscription_date')[:2000]
+        )
+        if not batch:
+            break
+        for subscriber in batch:
+            notify_day = subscriber.next_subscription_date - timedelta(days=settings.NOTIFY_DAYS_BEFORE)
+            subscriber.notify_at = timezone.make_aware(
+                datetime(notify_day.year, notify_day.month, notify_day.day, hour, minute)
+            )
+        ActiveSubscriber.objects.bulk_update(batch, ['notify_at'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0008_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activesubscriber',
+            name='last_notified_for',
+            field=models.DateField(blank=True, editable=False, help_text='Due date the last reminder was sent for', null=True),
+        ),
+        migrations.AddField(
+            model_name='activesubscriber',
+            name='notify_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(schedule_reminders, migrations.RunPython.noop),
+    ]
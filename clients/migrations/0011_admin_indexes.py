@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:41
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0010_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activesubscriber',
+            index=models.Index(fields=['-is_deactivated', 'next_subscription_date'], name='subscriber_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activesubscriber',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='subscriber_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installationclient',
+            index=models.Index(fields=['installation_date'], name='installation_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installationclient',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='installation_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_date', 'created_at'], name='order_ordering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='order_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:48
+
+import clients.models
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0011_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('phone_digits', models.CharField(blank=True, db_index=True, max_length=20)),
+                ('data', models.JSONField(encoder=clients.models.ArchiveJSONEncoder)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(django.db.models.functions.text.Lower('name'), name='archived_order_name_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSubscriber',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('phone_digits', models.CharField(blank=True, db_index=True, max_length=20)),
+                ('data', models.JSONField(encoder=clients.models.ArchiveJSONEncoder)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(django.db.models.functions.text.Lower('name'), name='archived_subscriber_name_idx')],
+            },
+        ),
+    ]
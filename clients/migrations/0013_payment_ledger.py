@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentSummary',
+            fields=[
+                ('subscriber', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='payment_summary', serialize=False, to='clients.activesubscriber')),
+                ('lifetime_paid', models.PositiveIntegerField(default=0)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('last_paid_on', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='revenue_collected',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paid_on', models.DateField(db_index=True)),
+                ('months', models.PositiveSmallIntegerField(default=1)),
+                ('amount', models.PositiveIntegerField()),
+                ('kit_type', models.CharField(choices=[('STANDARD', 'Standard'), ('MINI', 'Mini')], max_length=10)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('subscriber', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='payments', to='clients.activesubscriber')),
+            ],
+            options={
+                'ordering': ['-paid_on', '-id'],
+                'indexes': [models.Index(fields=['subscriber', '-paid_on'], name='payment_history_idx')],
+            },
+        ),
+    ]
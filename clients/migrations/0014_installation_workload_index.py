@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0013_payment_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='installationclient',
+            name='installation_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='installationclient',
+            index=models.Index(fields=['installation_date', 'installation_type'], name='installation_date_type_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0014_installation_workload_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('left_resource', models.CharField(choices=[('installations', 'Installation'), ('subscribers', 'Subscriber'), ('orders', 'Order')], max_length=20)),
+                ('left_id', models.BigIntegerField()),
+                ('right_resource', models.CharField(choices=[('installations', 'Installation'), ('subscribers', 'Subscriber'), ('orders', 'Order')], max_length=20)),
+                ('right_id', models.BigIntegerField()),
+                ('score', models.FloatField()),
+                ('reasons', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending review'), ('MERGED', 'Merged'), ('DISMISSED', 'Not a duplicate')], default='PENDING', max_length=10)),
+                ('found_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-score', 'id'],
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicate_review_idx')],
+                'constraints': [models.UniqueConstraint(fields=('left_resource', 'left_id', 'right_resource', 'right_id'), name='duplicate_pair_unique')],
+            },
+        ),
+    ]
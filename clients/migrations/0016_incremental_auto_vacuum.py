@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def set_auto_vacuum(mode):
+    def apply(apps, schema_editor):
+        """Switch SQLite's auto_vacuum mode; an existing database only picks it up on a full VACUUM"""
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA auto_vacuum')
+            if cursor.fetchone()[0] != mode:
+                cursor.execute(f'PRAGMA auto_vacuum={mode}')
+                cursor.execute('VACUUM')
+    return apply
+
+
+class Migration(migrations.Migration):
+    # VACUUM cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('clients', '0015_duplicate_candidates'),
+    ]
+
+    operations = [
+        # 2 = INCREMENTAL: free pages stay in the file until db_maintenance releases them
+        migrations.RunPython(set_auto_vacuum(2), set_auto_vacuum(0)),
+    ]
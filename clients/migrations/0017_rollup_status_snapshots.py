@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:38
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+STATUS_FIELDS = ['active_count', 'due_soon_count', 'overdue_count', 'deactivated_count', 'standard_count', 'mini_count']
+
+
+def forget_backfilled_status(apps, schema_editor):
+    """Rows built more than a day after their date had their status made up from later data"""
+    DailyRollup = apps.get_model('clients', 'DailyRollup')
+    backfilled = [
+        pk for pk, date, created_at in DailyRollup.objects.values_list('pk', 'date', 'created_at')
+        if created_at.date() > date + timedelta(days=1)
+    ]
+    DailyRollup.objects.filter(pk__in=backfilled).update(**dict.fromkeys(STATUS_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0016_incremental_auto_vacuum'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='active_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='deactivated_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='due_soon_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='mini_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='overdue_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='standard_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(forget_backfilled_status, migrations.RunPython.noop),
+    ]
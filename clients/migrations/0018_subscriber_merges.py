@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:42
+
+import clients.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0017_rollup_status_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='merged_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='replaced',
+            field=models.JSONField(blank=True, encoder=clients.models.ArchiveJSONEncoder, null=True),
+        ),
+        migrations.CreateModel(
+            name='SubscriberMerge',
+            fields=[
+                ('merged_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('merged_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('candidate', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='clients.duplicatecandidate')),
+                ('kept', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='merged_records', to='clients.activesubscriber')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def apply(apps, schema_editor):
+        """Switch SQLite's journal mode; it is kept in the database file, so this runs once, not per connection"""
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode={mode}')
+    return apply
+
+
+class Migration(migrations.Migration):
+    # The journal mode cannot change inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('clients', '0018_subscriber_merges'),
+    ]
+
+    operations = [
+        # WAL: readers no longer block the writer, and synchronous=NORMAL stays safe
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE')),
+    ]
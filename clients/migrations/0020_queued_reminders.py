@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0019_wal_journal_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channels', models.CharField(max_length=100)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_reminders', to='clients.activesubscriber')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -1,7 +1,16 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import RegexValidator
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+import re
+
+
+def normalize_phone(value):
+    """Reduce a phone number to its digits so every accepted format compares equal"""
+    return re.sub(r'\D', '', value or '')
+
 
 class Client(models.Model):
     # Base client fields - no installation type here as it's specific to InstallationClient
@@ -14,10 +23,17 @@ class Client(models.Model):
             message='Enter a valid phone number. Formats: (078) 776-8637, 078-776-8637, or 0787768637'
         )
     ])
+    # Digits-only copy of contact, kept in sync on save for indexed equality lookups
+    phone_digits = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
     
     email = models.EmailField()
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    # Indexed for the change feed (api/v1/changes/)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    def save(self, *args, **kwargs):
+        self.phone_digits = normalize_phone(self.contact)
+        super().save(*args, **kwargs)
     
     class Meta:
         abstract = True
@@ -40,6 +56,12 @@ class InstallationClient(Client):
     
     class Meta:
         ordering = ['-installation_date']
+        # Changelist ordering, prefix name search (see admin_mixins.py) and the workload
+        # calendar, which groups by date and type straight from this index (see workload.py)
+        indexes = [
+            models.Index(fields=['installation_date', 'installation_type'], name='installation_date_type_idx'),
+            models.Index(Lower('name'), name='installation_name_lower_idx'),
+        ]
 
 class ActiveSubscriber(Client):
     KIT_TYPES = [
@@ -58,6 +80,11 @@ class ActiveSubscriber(Client):
     deactivated_at = models.DateTimeField(null=True, blank=True)
     deactivation_reason = models.TextField(blank=True, null=True, help_text="Reason for deactivation")
     
+    # Reminder schedule, kept current by a pre_save signal (see clients/notifications.py)
+    notify_at = models.DateTimeField(null=True, blank=True, db_index=True, editable=False)
+    last_notified_for = models.DateField(null=True, blank=True, editable=False,
+                                         help_text="Due date the last reminder was sent for")
+    
     def __str__(self):
         status = " (Deactivated)" if self.is_deactivated else ""
         return f"{self.name} - {self.get_kit_type_display()} - Next sub: {self.next_subscription_date}{status}"
@@ -98,6 +125,10 @@ class ActiveSubscriber(Client):
     
     class Meta:
         ordering = ['-is_deactivated', 'next_subscription_date']
+        indexes = [
+            models.Index(fields=['-is_deactivated', 'next_subscription_date'], name='subscriber_ordering_idx'),
+            models.Index(Lower('name'), name='subscriber_name_lower_idx'),
+        ]
         
 class Order(models.Model):
     """Order model for My Space section"""
@@ -109,12 +140,198 @@ class Order(models.Model):
             message='Enter a valid phone number. Formats: (078) 776-8637, 078-776-8637, or 0787768637'
         )
     ])
+    phone_digits = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
     order_date = models.DateField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def __str__(self):
         return f"{self.name} - {self.order_details[:30]}..."
     
+    def save(self, *args, **kwargs):
+        self.phone_digits = normalize_phone(self.phone)
+        super().save(*args, **kwargs)
+    
+    class Meta:
+        ordering = ['-order_date', '-created_at']
+        indexes = [
+            models.Index(fields=['order_date', 'created_at'], name='order_ordering_idx'),
+            models.Index(Lower('name'), name='order_name_lower_idx'),
+        ]
+
+class DailyRollup(models.Model):
+    """Precomputed per-day subscriber, installation and payment counts for trend reports"""
+    date = models.DateField(unique=True)
+    
+    # Subscriber status snapshotted by the nightly run; NULL for backfilled days, whose
+    # status can no longer be told from today's rows
+    active_count = models.PositiveIntegerField(null=True, blank=True)
+    due_soon_count = models.PositiveIntegerField(null=True, blank=True)
+    overdue_count = models.PositiveIntegerField(null=True, blank=True)
+    deactivated_count = models.PositiveIntegerField(null=True, blank=True)
+    standard_count = models.PositiveIntegerField(null=True, blank=True)
+    mini_count = models.PositiveIntegerField(null=True, blank=True)
+    
+    # Activity recorded on the day
+    starlink_installations = models.PositiveIntegerField(default=0)
+    cctv_installations = models.PositiveIntegerField(default=0)
+    networking_installations = models.PositiveIntegerField(default=0)
+    solar_installations = models.PositiveIntegerField(default=0)
+    orders_count = models.PositiveIntegerField(default=0)
+    payments_recorded = models.PositiveIntegerField(default=0)
+    revenue_collected = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Rollup for {self.date}"
+    
+    @property
+    def installations_count(self):
+        return (self.starlink_installations + self.cctv_installations
+                + self.networking_installations + self.solar_installations)
+    
+    class Meta:
+        ordering = ['-date']
+
+class Payment(models.Model):
+    """One subscription payment. Append-only: rows are never updated or deleted (see clients/payments.py)"""
+    # No FK constraint or cascade: the ledger outlives archived subscribers
+    subscriber = models.ForeignKey(ActiveSubscriber, on_delete=models.DO_NOTHING, db_constraint=False,
+                                   related_name='payments')
+    paid_on = models.DateField(db_index=True)
+    months = models.PositiveSmallIntegerField(default=1)
+    amount = models.PositiveIntegerField()
+    kit_type = models.CharField(max_length=10, choices=ActiveSubscriber.KIT_TYPES)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Payment of {self.amount} by subscriber #{self.subscriber_id} on {self.paid_on}"
+    
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Payments are append-only')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Payments are append-only')
+    
+    class Meta:
+        ordering = ['-paid_on', '-id']
+        indexes = [models.Index(fields=['subscriber', '-paid_on'], name='payment_history_idx')]
+
+class PaymentSummary(models.Model):
+    """Running totals of a subscriber's payments, updated in the same transaction as the ledger"""
+    subscriber = models.OneToOneField(ActiveSubscriber, on_delete=models.DO_NOTHING, db_constraint=False,
+                                      primary_key=True, related_name='payment_summary')
+    lifetime_paid = models.PositiveIntegerField(default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+    last_paid_on = models.DateField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Subscriber #{self.subscriber_id}: {self.payment_count} payments, {self.lifetime_paid} total"
+
+class Tombstone(models.Model):
+    """Record of a deleted row, so change feed consumers can delete their copy"""
+    resource = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} deleted {self.deleted_at}"
+    
+    class Meta:
+        ordering = ['deleted_at', 'id']
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """Keeps the microseconds DjangoJSONEncoder drops, so restored timestamps compare equal"""
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+class ArchivedRecord(models.Model):
+    """Compact copy of a row moved out of its hot table (see clients/archive.py)"""
+    # Same pk as the original row, so links keep working and a restore reuses it
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    phone_digits = models.CharField(max_length=20, blank=True, db_index=True)
+    # Every other column of the original row
+    data = models.JSONField(encoder=ArchiveJSONEncoder)
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.name} (archived {self.archived_at:%Y-%m-%d})"
+    
+    class Meta:
+        abstract = True
+
+class ArchivedSubscriber(ArchivedRecord):
+    class Meta:
+        indexes = [models.Index(Lower('name'), name='archived_subscriber_name_idx')]
+
+class ArchivedOrder(ArchivedRecord):
+    class Meta:
+        indexes = [models.Index(Lower('name'), name='archived_order_name_idx')]
+
+class DuplicateCandidate(models.Model):
+    """Two customer records find_duplicates thinks are the same person (see clients/duplicates.py)"""
+    RESOURCES = [
+        ('installations', 'Installation'),
+        ('subscribers', 'Subscriber'),
+        ('orders', 'Order'),
+    ]
+    STATUSES = [
+        ('PENDING', 'Pending review'),
+        ('MERGED', 'Merged'),
+        ('DISMISSED', 'Not a duplicate'),
+    ]
+    
+    # The pair is stored in (resource, id) order, so each pair has one row
+    left_resource = models.CharField(max_length=20, choices=RESOURCES)
+    left_id = models.BigIntegerField()
+    right_resource = models.CharField(max_length=20, choices=RESOURCES)
+    right_id = models.BigIntegerField()
+    score = models.FloatField()
+    reasons = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUSES, default='PENDING')
+    found_at = models.DateTimeField(auto_now_add=True)
+    # What the merge overwrote or deleted, {'resource:pk': {field: old value}}, so a wrong merge can be undone
+    replaced = models.JSONField(null=True, blank=True, encoder=ArchiveJSONEncoder)
+    merged_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.left_resource} #{self.left_id} ~ {self.right_resource} #{self.right_id} ({self.score:.2f})"
+    
+    class Meta:
+        ordering = ['-score', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['left_resource', 'left_id', 'right_resource', 'right_id'],
+                                    name='duplicate_pair_unique'),
+        ]
+        indexes = [models.Index(fields=['status', '-score'], name='duplicate_review_idx')]
+
+class SubscriberMerge(models.Model):
+    """A subscriber record merged into another; its payments stay on its old pk (see clients/payments.py)"""
+    # The deleted record's pk, which its Payment rows still carry
+    merged_id = models.BigIntegerField(primary_key=True)
+    kept = models.ForeignKey(ActiveSubscriber, on_delete=models.DO_NOTHING, db_constraint=False,
+                             related_name='merged_records')
+    candidate = models.ForeignKey(DuplicateCandidate, null=True, blank=True, on_delete=models.SET_NULL)
+    merged_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Subscriber #{self.merged_id} merged into #{self.kept_id}"
+
+class QueuedReminder(models.Model):
+    """A reminder asked for from the subscriber list, sent in the background by run_notifier"""
+    subscriber = models.ForeignKey(ActiveSubscriber, on_delete=models.CASCADE, related_name='queued_reminders')
+    # Comma-separated NOTIFICATION_CHANNELS names
+    channels = models.CharField(max_length=100)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Reminder to subscriber #{self.subscriber_id} over {self.channels}"
+    
     class Meta:
-        ordering = ['-order_date', '-created_at']
\ No newline at end of file
+        ordering = ['id']
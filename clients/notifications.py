@@ -0,0 +1,98 @@
+"""
+Due-date reminder scheduling.
+
+Each subscriber carries an indexed ``notify_at`` timestamp derived from its
+next due date. Finding the next reminder is a single index lookup, and
+sending only touches the rows whose time has come, so the notifier never
+rescans the whole subscriber table.
+"""
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from .models import ActiveSubscriber
+
+FROM_EMAIL = 'notifications@starspace.com'
+
+
+def notify_at_for(subscriber):
+    """When the reminder for the subscriber's current due date should go out, or None"""
+    if (subscriber.is_deactivated or not subscriber.is_active or not subscriber.auto_notify
+            or not subscriber.next_subscription_date):
+        return None
+    if subscriber.last_notified_for == subscriber.next_subscription_date:
+        return None
+    if subscriber.next_subscription_date < timezone.localdate():
+        return None
+    hour, minute = map(int, settings.NOTIFY_TIME.split(':'))
+    notify_day = subscriber.next_subscription_date - timedelta(days=settings.NOTIFY_DAYS_BEFORE)
+    return timezone.make_aware(datetime(notify_day.year, notify_day.month, notify_day.day, hour, minute))
+
+
+def next_notify_at():
+    """Earliest pending reminder time (one index lookup)"""
+    return ActiveSubscriber.objects.aggregate(next=Min('notify_at'))['next']
+
+
+def build_message(subscriber):
+    days_left = (subscriber.next_subscription_date - timezone.localdate()).days
+    subject = f'Star Space - Subscription Due in {days_left} Days'
+    message = f"""
+                Dear {subscriber.name},
+
+                Your Starlink subscription ({subscriber.kit_type}) is due in {days_left} days.
+
+                Last subscription: {subscriber.last_subscription_date}
+                Due date: {subscriber.next_subscription_date}
+
+                Please ensure your payment is processed to avoid service interruption.
+
+                Thank you for choosing Star Space!
+                """
+    return EmailMessage(subject, message, FROM_EMAIL, [subscriber.email])
+
+
+def send_due_reminders(now=None, batch_size=100):
+    """Send every reminder whose notify_at has passed, in batches; returns the subscribers notified"""
+    now = now or timezone.now()
+    notified = []
+    while True:
+        batch = list(
+            ActiveSubscriber.objects.filter(notify_at__lte=now)
+            .order_by('notify_at')[:batch_size]
+        )
+        if not batch:
+            break
+        # Re-check each row: the schedule may be stale if the due date has passed since
+        to_send = [subscriber for subscriber in batch if notify_at_for(subscriber) is not None]
+        if to_send:
+            with get_connection() as connection:
+                connection.send_messages([build_message(subscriber) for subscriber in to_send])
+        # Only clear rows that still hold the schedule just read: a payment saved while the
+        # mails went out has moved the due date and notify_at, and must keep its new reminder
+        with transaction.atomic():
+            for subscriber in batch:
+                ActiveSubscriber.objects.filter(
+                    pk=subscriber.pk, notify_at=subscriber.notify_at,
+                    next_subscription_date=subscriber.next_subscription_date,
+                ).update(last_notified_for=subscriber.next_subscription_date, notify_at=None)
+        notified.extend(to_send)
+    return notified
+
+
+def reschedule_all(batch_size=2000):
+    """Recompute notify_at for every subscriber, e.g. after bulk imports that skip save()"""
+    last_pk = 0
+    updated = 0
+    while True:
+        batch = list(ActiveSubscriber.objects.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            break
+        for subscriber in batch:
+            subscriber.notify_at = notify_at_for(subscriber)
+        ActiveSubscriber.objects.bulk_update(batch, ['notify_at'])
+        updated += len(batch)
+        last_pk = batch[-1].pk
+    return updated
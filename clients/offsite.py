@@ -0,0 +1,397 @@
+"""
+Offsite shipping of backup files to an S3-compatible object store.
+
+Each backup file is uploaded as a multipart upload: parts are read and sent
+by a pool of threads, every part carries its SHA-256 (checked by the store),
+and the finished object's composite checksum is compared with the local one.
+A shared bandwidth limit keeps the uploads from starving the site's own
+traffic.
+
+Progress is written to a small state file per upload (``backups/.offsite``),
+so an interrupted upload resumes with the parts the store already has
+instead of starting over. Files the store already holds at the same size and,
+when the store reports one, the same checksum are skipped.
+
+Parts follow S3's limits: at least 5 MiB (only the last part may be smaller)
+and at most 10,000 per object, so the part size grows for very large files.
+
+Stores (``settings.OFFSITE_BACKUP['BACKEND']``):
+    ``s3``          any S3-compatible endpoint (AWS, MinIO, ...), needs boto3
+    ``filesystem``  a directory laid out like a bucket, for tests and NAS mounts
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+STATE_DIR_NAME = '.offsite'
+MB = 1024 * 1024
+# S3 multipart limits
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10_000
+
+
+class UploadNotFound(Exception):
+    pass
+
+
+def sha256_b64(data):
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def composite_checksum(part_checksums):
+    """S3's checksum of a multipart object: the SHA-256 of the parts' digests, with the part count"""
+    digest = hashlib.sha256(b''.join(base64.b64decode(checksum) for checksum in part_checksums)).digest()
+    return f'{base64.b64encode(digest).decode()}-{len(part_checksums)}'
+
+
+def file_checksum(path, part_size):
+    """The composite checksum of ``path`` uploaded in parts of ``part_size``"""
+    part_checksums = []
+    with open(path, 'rb') as f:
+        while data := f.read(part_size):
+            part_checksums.append(sha256_b64(data))
+    # An empty file is one empty part
+    return composite_checksum(part_checksums or [sha256_b64(b'')])
+
+
+def same_checksum(remote, local):
+    """Compare composite checksums; stores differ in whether they append the part count"""
+    return remote.split('-')[0] == local.split('-')[0]
+
+
+def part_size_for(size, part_size):
+    """
+    ``part_size``, grown to whole MiB if a file of ``size`` bytes would need
+    more than MAX_PARTS parts. Raises ValueError below MIN_PART_SIZE.
+    """
+    if part_size < MIN_PART_SIZE:
+        raise ValueError(f'Part size must be at least {MIN_PART_SIZE // MB} MB, got {part_size} bytes')
+    smallest = -(-size // MAX_PARTS)
+    if smallest > part_size:
+        part_size = -(-smallest // MB) * MB
+    return part_size
+
+
+class BandwidthLimiter:
+    """At most ``rate`` bytes per second across every thread that shares it (0 = unlimited)"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.allowance = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, size):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.updated) * self.rate)
+            self.updated = now
+            self.allowance -= size
+            # Whoever overdraws waits for the debt; later callers see the deeper debt and wait longer
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class ThrottledBody(io.BytesIO):
+    """Part body whose reads are paced by a BandwidthLimiter, so parts trickle out instead of bursting"""
+
+    def __init__(self, data, limiter):
+        super().__init__(data)
+        self.limiter = limiter
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.limiter.consume(len(chunk))
+        return chunk
+
+
+# Stores
+
+class FileSystemStore:
+    """Objects under LOCATION, in-progress parts under LOCATION/.uploads/<upload id>/"""
+
+    def __init__(self, **options):
+        self.root = Path(options['LOCATION'])
+        self.uploads = self.root / '.uploads'
+
+    def _meta_path(self, key):
+        return self.root / '.meta' / f'{key}.json'
+
+    def _upload_dir(self, upload_id):
+        path = self.uploads / upload_id
+        if not path.is_dir():
+            raise UploadNotFound(upload_id)
+        return path
+
+    def head(self, key):
+        try:
+            return json.loads(self._meta_path(key).read_text())
+        except FileNotFoundError:
+            return None
+
+    def create_upload(self, key):
+        upload_id = uuid.uuid4().hex
+        (self.uploads / upload_id).mkdir(parents=True)
+        return upload_id
+
+    def upload_part(self, key, upload_id, number, body, checksum):
+        upload_dir = self._upload_dir(upload_id)
+        temp_path = upload_dir / f'{number:05d}.tmp'
+        digest = hashlib.sha256()
+        with open(temp_path, 'wb') as f:
+            while chunk := body.read(256 * 1024):
+                digest.update(chunk)
+                f.write(chunk)
+        if base64.b64encode(digest.digest()).decode() != checksum:
+            temp_path.unlink()
+            raise ValueError(f'Checksum mismatch on part {number} of {key}')
+        os.replace(temp_path, upload_dir / f'{number:05d}')
+        return digest.hexdigest()
+
+    def list_parts(self, key, upload_id):
+        upload_dir = self._upload_dir(upload_id)
+        parts = {}
+        for path in upload_dir.iterdir():
+            if path.name.isdigit():
+                parts[int(path.name)] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return parts
+
+    def complete(self, key, upload_id, parts):
+        upload_dir = self._upload_dir(upload_id)
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(target.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            for part in parts:
+                with open(upload_dir / f"{part['number']:05d}", 'rb') as part_file:
+                    shutil.copyfileobj(part_file, f)
+        os.replace(temp_path, target)
+        meta_path = self._meta_path(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(json.dumps({
+            'size': target.stat().st_size,
+            'checksum': composite_checksum([part['checksum'] for part in parts]),
+        }))
+        shutil.rmtree(upload_dir)
+
+    def abort(self, key, upload_id):
+        shutil.rmtree(self.uploads / upload_id, ignore_errors=True)
+
+
+class S3Store:
+    def __init__(self, **options):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise ImproperlyConfigured("The 's3' offsite backend needs boto3 (pip install boto3)")
+        self.bucket = options['BUCKET']
+        self.client = boto3.client(
+            's3',
+            endpoint_url=options.get('ENDPOINT_URL'),
+            region_name=options.get('REGION'),
+            aws_access_key_id=options.get('ACCESS_KEY'),
+            aws_secret_access_key=options.get('SECRET_KEY'),
+            # Retries are handled per part by ship_file
+            config=Config(retries={'max_attempts': 1}, max_pool_connections=options.get('CONCURRENCY', 4) * 2),
+        )
+
+    def head(self, key):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode='ENABLED')
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return {'size': response['ContentLength'], 'checksum': response.get('ChecksumSHA256')}
+
+    def create_upload(self, key):
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=key, ChecksumAlgorithm='SHA256')
+        return response['UploadId']
+
+    def upload_part(self, key, upload_id, number, body, checksum):
+        response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number,
+                                           Body=body, ChecksumAlgorithm='SHA256', ChecksumSHA256=checksum)
+        return response['ETag']
+
+    def list_parts(self, key, upload_id):
+        parts = {}
+        paginator = self.client.get_paginator('list_parts')
+        try:
+            for page in paginator.paginate(Bucket=self.bucket, Key=key, UploadId=upload_id):
+                parts.update({part['PartNumber']: part['ETag'] for part in page.get('Parts', [])})
+        except self.client.exceptions.NoSuchUpload:
+            raise UploadNotFound(upload_id)
+        return parts
+
+    def complete(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={
+            'Parts': [{'PartNumber': part['number'], 'ETag': part['etag'], 'ChecksumSHA256': part['checksum']}
+                      for part in parts],
+        })
+
+    def abort(self, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+
+STORES = {
+    'filesystem': FileSystemStore,
+    's3': S3Store,
+}
+
+
+def get_store(config=None):
+    config = config if config is not None else settings.OFFSITE_BACKUP
+    options = {key: value for key, value in config.items() if key != 'BACKEND'}
+    return STORES[config['BACKEND']](**options)
+
+
+def backup_files(backup_dir=None):
+    """Every file under the local backups directory, except upload state"""
+    backup_dir = Path(backup_dir or settings.DBBACKUP_STORAGE_OPTIONS['location'])
+    return sorted(
+        path for path in backup_dir.rglob('*')
+        if path.is_file() and not any(part.startswith('.') for part in path.relative_to(backup_dir).parts)
+    )
+
+
+# Uploading
+
+class UploadState:
+    """Parts already accepted by the store, saved after each one so an interrupted upload can resume"""
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, state_dir, key, fingerprint):
+        path = Path(state_dir) / (hashlib.sha1(key.encode()).hexdigest() + '.json')
+        try:
+            data = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            data = None
+        if not data or data.get('fingerprint') != fingerprint:
+            # A different (or rewritten) file under the same key starts over
+            data = {'key': key, 'fingerprint': fingerprint, 'upload_id': None, 'parts': {}}
+        return cls(path, data)
+
+    @property
+    def parts(self):
+        return {int(number): part for number, part in self.data['parts'].items()}
+
+    def save_part(self, number, etag, checksum):
+        with self.lock:
+            self.data['parts'][str(number)] = {'etag': etag, 'checksum': checksum}
+            self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(self.data))
+        os.replace(temp_path, self.path)
+
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+
+
+def ship_file(store, path, key, state_dir, part_size=8 * MB, concurrency=4, limiter=None, max_retries=3):
+    """
+    Upload ``path`` to ``key`` unless the store already has it.
+
+    Returns {'status': 'skipped' | 'uploaded' | 'resumed', 'parts': n, 'sent_parts': n, 'bytes': n}.
+    Raises after ``max_retries`` failed attempts at any part; the parts
+    already sent are kept for the next run.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    part_size = part_size_for(size, part_size)
+    existing = store.head(key)
+    if existing and existing['size'] == size and (
+            not existing.get('checksum') or same_checksum(existing['checksum'], file_checksum(path, part_size))):
+        return {'status': 'skipped', 'parts': 0, 'sent_parts': 0, 'bytes': 0}
+
+    limiter = limiter or BandwidthLimiter(0)
+    part_count = max(1, -(-size // part_size))
+    state = UploadState.load(state_dir, key, [size, path.stat().st_mtime_ns, part_size])
+    done = {}
+    if state.data['upload_id']:
+        try:
+            remote = store.list_parts(key, state.data['upload_id'])
+            done = {number: part for number, part in state.parts.items() if remote.get(number) == part['etag']}
+        except UploadNotFound:
+            state.data.update(upload_id=None, parts={})
+    if not state.data['upload_id']:
+        state.data['upload_id'] = store.create_upload(key)
+        state.save()
+    upload_id = state.data['upload_id']
+
+    def send_part(number):
+        with open(path, 'rb') as f:
+            f.seek((number - 1) * part_size)
+            data = f.read(part_size)
+        checksum = sha256_b64(data)
+        for attempt in range(max_retries + 1):
+            try:
+                etag = store.upload_part(key, upload_id, number, ThrottledBody(data, limiter), checksum)
+                break
+            except Exception:
+                if attempt == max_retries:
+                    raise
+                time.sleep(2 ** attempt)
+        state.save_part(number, etag, checksum)
+        return len(data)
+
+    pending = [number for number in range(1, part_count + 1) if number not in done]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        sent_bytes = sum(pool.map(send_part, pending))
+
+    parts = [dict(part, number=number) for number, part in sorted(state.parts.items())]
+    store.complete(key, upload_id, parts)
+    expected = composite_checksum([part['checksum'] for part in parts])
+    shipped = store.head(key)
+    if shipped['size'] != size or (shipped.get('checksum') and not same_checksum(shipped['checksum'], expected)):
+        raise ValueError(f'{key} does not match the local file after upload')
+    state.discard()
+    return {
+        'status': 'resumed' if done else 'uploaded',
+        'parts': part_count,
+        'sent_parts': len(pending),
+        'bytes': sent_bytes,
+    }
+
+
+def ship_backups(files=None, config=None, **overrides):
+    """Ship every local backup file; yields (path, result or exception) as each one finishes"""
+    config = dict(config if config is not None else settings.OFFSITE_BACKUP, **overrides)
+    store = get_store(config)
+    backup_dir = Path(settings.DBBACKUP_STORAGE_OPTIONS['location'])
+    limiter = BandwidthLimiter(config.get('MAX_BYTES_PER_SECOND', 0))
+    for path in files or backup_files(backup_dir):
+        try:
+            key = config.get('PREFIX', '') + Path(path).resolve().relative_to(backup_dir.resolve()).as_posix()
+            result = ship_file(
+                store, path, key, backup_dir / STATE_DIR_NAME,
+                part_size=config.get('PART_SIZE', 8 * MB),
+                concurrency=config.get('CONCURRENCY', 4),
+                limiter=limiter,
+                max_retries=config.get('MAX_RETRIES', 3),
+            )
+        except Exception as e:
+            yield path, e
+        else:
+            yield path, result
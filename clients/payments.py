@@ -0,0 +1,86 @@
+"""
+Payment ledger.
+
+Every payment is appended to ``Payment`` with one ``bulk_create``. Each
+subscriber's ``PaymentSummary`` row (lifetime total, count, last payment
+date) is updated in the same transaction. Payment history is an index range
+on ``(subscriber, paid_on)``, and per-subscriber totals are a primary key
+lookup, so nothing aggregates over the whole ledger.
+
+Ledger rows are never rewritten, not even when two subscriber records turn
+out to be one customer: the merge (clients/duplicates.py) deletes the
+duplicate but its payments keep its pk, and a ``SubscriberMerge`` row maps
+that pk to the kept subscriber. ``account_payments`` resolves through it.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import Payment, PaymentSummary, SubscriberMerge
+
+
+def payment_amount(kit_type, months):
+    return settings.SUBSCRIPTION_PRICES[kit_type] * months
+
+
+def record_payments(subscribers, payment_date, months=1):
+    """
+    Record a payment of ``months`` for each subscriber and move their dates on.
+
+    Returns the saved subscribers. The ledger, the summaries and the
+    subscription dates commit together or not at all.
+    """
+    next_date = payment_date + timedelta(days=30 * months)
+    with transaction.atomic():
+        subscribers = list(subscribers)
+        if not subscribers:
+            return []
+        Payment.objects.bulk_create([
+            Payment(subscriber=subscriber, paid_on=payment_date, months=months,
+                    amount=payment_amount(subscriber.kit_type, months), kit_type=subscriber.kit_type)
+            for subscriber in subscribers
+        ])
+
+        PaymentSummary.objects.bulk_create(
+            [PaymentSummary(subscriber=subscriber) for subscriber in subscribers], ignore_conflicts=True,
+        )
+        # One UPDATE per distinct amount (i.e. per kit type), not per subscriber
+        by_amount = defaultdict(list)
+        for subscriber in subscribers:
+            by_amount[payment_amount(subscriber.kit_type, months)].append(subscriber.pk)
+        for amount, ids in by_amount.items():
+            PaymentSummary.objects.filter(pk__in=ids).update(
+                lifetime_paid=F('lifetime_paid') + amount,
+                payment_count=F('payment_count') + 1,
+                last_paid_on=Greatest(Coalesce('last_paid_on', Value(payment_date)), Value(payment_date)),
+            )
+
+        for subscriber in subscribers:
+            subscriber.last_subscription_date = payment_date
+            subscriber.next_subscription_date = next_date
+            # save() rather than bulk_update: keeps the reminder schedule and replica counter current
+            subscriber.save()
+    return subscribers
+
+
+def account_payments(subscriber):
+    """Payments of ``subscriber`` (an instance or pk) and of every record merged into it"""
+    pk = getattr(subscriber, 'pk', subscriber)
+    return Payment.objects.filter(
+        Q(subscriber_id=pk) | Q(subscriber_id__in=SubscriberMerge.objects.filter(kept_id=pk).values('merged_id'))
+    )
+
+
+def payment_history(subscriber, limit=12):
+    """Latest payments of one subscriber, merged records included (index range scans)"""
+    return list(account_payments(subscriber)[:limit])
+
+
+def payment_summary(subscriber):
+    """The subscriber's PaymentSummary (select_related it to save the query), or None"""
+    try:
+        return subscriber.payment_summary
+    except PaymentSummary.DoesNotExist:
+        return None
@@ -0,0 +1,157 @@
+"""
+Read-only SQLite replica used by the reporting and list views.
+
+The replica is a full copy of the primary database made with SQLite's online
+backup API. It is refreshed by the ``refresh_replica`` command on a schedule, after
+``migrate`` (so it never has an older schema than the code), and in the
+background after every ``REPLICA_REFRESH_AFTER_WRITES`` writes. A replica
+older than ``REPLICA_MAX_AGE_SECONDS`` is not read from until it has been
+refreshed.
+
+Only reports and browsing lists read from it; the queues staff work through
+(subscribers, overdue) always read the primary.
+"""
+import sqlite3
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from django.conf import settings
+from django.db import connections, transaction
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE_NAME = 'pin_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+_refresh_lock = threading.Lock()
+_write_lock = threading.Lock()
+_writes_since_refresh = 0
+
+
+def replica_is_mirror():
+    """True when the replica alias points at the primary (e.g. TEST MIRROR)"""
+    return connections[REPLICA_ALIAS].settings_dict['NAME'] == connections['default'].settings_dict['NAME']
+
+
+def replica_available():
+    """True when the replica exists and is recent enough to serve reads"""
+    # A test mirror would read through a second connection outside the test transaction
+    if REPLICA_ALIAS not in settings.DATABASES or replica_is_mirror():
+        return False
+    try:
+        refreshed_at = Path(settings.REPLICA_DATABASE_PATH).stat().st_mtime
+    except FileNotFoundError:
+        return False
+    if time.time() - refreshed_at > settings.REPLICA_MAX_AGE_SECONDS:
+        # Too old to serve (a quiet install never reaches the write threshold):
+        # read the primary until the refresh lands
+        refresh_replica_in_background()
+        return False
+    return True
+
+
+def reading_from_replica():
+    return _use_replica.get()
+
+
+def refresh_replica():
+    """Copy the primary database into the replica file with the online backup API"""
+    if replica_is_mirror():
+        return False
+    with _refresh_lock:
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'], timeout=20)
+        target = sqlite3.connect(settings.REPLICA_DATABASE_PATH, timeout=20)
+        try:
+            # The primary runs in WAL mode, so a single-step copy reads a snapshot
+            # without blocking payment writes
+            source.backup(target)
+            # Readers open the replica read-only, so it must not need a -wal/-shm pair
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+    return True
+
+
+def refresh_replica_in_background():
+    if _refresh_lock.locked():
+        return
+    threading.Thread(target=refresh_replica, daemon=True).start()
+
+
+def record_write(count=1):
+    """Count committed writes and refresh the replica every N writes"""
+    global _writes_since_refresh
+    threshold = getattr(settings, 'REPLICA_REFRESH_AFTER_WRITES', 0)
+    if not threshold or not replica_available():
+        return
+    with _write_lock:
+        _writes_since_refresh += count
+        if _writes_since_refresh < threshold:
+            return
+        _writes_since_refresh = 0
+    transaction.on_commit(refresh_replica_in_background)
+
+
+def should_use_replica(request):
+    """Reads only, not right after this browser wrote, and only from a fresh replica"""
+    return (request.method in ('GET', 'HEAD') and not request.COOKIES.get(PIN_COOKIE_NAME)
+            and replica_available())
+
+
+def use_replica(view_func):
+    """Serve a read-only view's queries from the replica unless the user just wrote"""
+    if iscoroutinefunction(view_func):
+        # The flag is copied into the threads that run the async view's queries
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not should_use_replica(request):
+                return await view_func(request, *args, **kwargs)
+            token = _use_replica.set(True)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _use_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not should_use_replica(request):
+            return view_func(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    """After a write request, pin the browser to the primary so it reads its own writes"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI so async views are not pushed through a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,20 @@
+from .replica import REPLICA_ALIAS, reading_from_replica
+
+
+class ReplicaRouter:
+    """Send reads from replica-enabled views to the read-only copy, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'clients' and reading_from_replica():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
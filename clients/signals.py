@@ -0,0 +1,67 @@
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+from .auth import forget_user
+from .models import ActiveSubscriber, InstallationClient, Order, Tombstone
+from .notifications import notify_at_for
+from .replica import record_write, refresh_replica
+from .workload import forget_months
+
+
+@receiver(post_save, sender=InstallationClient)
+@receiver(post_save, sender=ActiveSubscriber)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=InstallationClient)
+@receiver(post_delete, sender=ActiveSubscriber)
+@receiver(post_delete, sender=Order)
+def count_write_for_replica(sender, **kwargs):
+    record_write()
+
+
+@receiver(post_migrate)
+def refresh_replica_after_migrate(sender, using, **kwargs):
+    # Replica-routed views would otherwise query columns the old copy does not have
+    if sender.name == 'clients' and using == 'default' and Path(settings.REPLICA_DATABASE_PATH).exists():
+        refresh_replica()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(pre_save, sender=ActiveSubscriber)
+def schedule_due_reminder(sender, instance, **kwargs):
+    instance.notify_at = notify_at_for(instance)
+
+
+@receiver(post_init, sender=InstallationClient)
+def remember_installation_date(sender, instance, **kwargs):
+    # __dict__ so a deferred field is not loaded just for this
+    instance._loaded_installation_date = instance.__dict__.get('installation_date')
+
+
+@receiver(post_save, sender=InstallationClient)
+@receiver(post_delete, sender=InstallationClient)
+def forget_cached_workload(sender, instance, **kwargs):
+    # Both months when an installation is moved to another date
+    forget_months(instance.installation_date, instance._loaded_installation_date)
+    instance._loaded_installation_date = instance.installation_date
+
+
+# Resource names as used by the JSON API
+TOMBSTONE_RESOURCES = {
+    InstallationClient: 'installations',
+    ActiveSubscriber: 'subscribers',
+    Order: 'orders',
+}
+
+
+@receiver(post_delete, sender=InstallationClient)
+@receiver(post_delete, sender=ActiveSubscriber)
+@receiver(post_delete, sender=Order)
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(resource=TOMBSTONE_RESOURCES[sender], object_id=instance.pk)
@@ -0,0 +1,22 @@
+import hashlib
+from django import template
+from django.conf import settings
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR
+from django.core.cache import cache
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def cached_date_hierarchy(cl):
+    """Django's date hierarchy, cached per model and filters instead of queried on every page"""
+    query_string = cl.get_query_string(remove=[PAGE_VAR, ORDER_VAR])
+    key = 'admin-date-hierarchy:%s:%s' % (
+        cl.opts.label_lower, hashlib.md5(query_string.encode()).hexdigest(),
+    )
+    context = cache.get(key)
+    if context is None:
+        context = date_hierarchy(cl) or {}
+        cache.set(key, context, settings.ADMIN_DATE_HIERARCHY_CACHE_SECONDS)
+    return context
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from ..staticfiles import IMAGE_FORMATS, IMAGE_VARIANTS, variant_name
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def available_formats(image):
+    """Formats whose every width has been generated (checked once per process)"""
+    widths = IMAGE_VARIANTS.get(image)
+    if not widths:
+        return []
+    return [
+        image_format for image_format in IMAGE_FORMATS
+        if all(finders.find(variant_name(image, width, image_format)) for width in widths)
+    ]
+
+
+@register.simple_tag
+def picture(image, alt='', sizes='100vw', **attrs):
+    """<picture> with AVIF/WebP srcsets for the generated widths, falling back to the original"""
+    sources = format_html_join('', '<source type="image/{}" srcset="{}" sizes="{}">', (
+        (image_format, ', '.join(
+            f'{static(variant_name(image, width, image_format))} {width}w'
+            for width in IMAGE_VARIANTS[image]
+        ), sizes)
+        for image_format in available_formats(image)
+    ))
+    img_attrs = format_html_join('', ' {}="{}"', attrs.items())
+    return format_html('<picture>{}<img src="{}" alt="{}"{}></picture>', sources, static(image), alt, img_attrs)
@@ -1,3 +1,1120 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .admin_mixins import EstimatedCountPaginator
+from .auth import clear_user_cache
+from .benchmarks import load_baseline, run_benchmarks
+from .dispatch import Dispatcher, NotificationMessage, StubBackend, send_queued_reminders
+from .models import (InstallationClient, ActiveSubscriber, Order, DailyRollup, ArchivedOrder,
+                     ArchivedSubscriber, DuplicateCandidate, Payment, PaymentSummary, QueuedReminder,
+                     SubscriberMerge, normalize_phone)
+from .notifications import build_message, send_due_reminders
+from .payments import payment_history
+from .projections import project
+from .staticfiles import minify_css
 
-# Create your tests here.
+
+class SeedDataTests(TestCase):
+    def test_seed_data_creates_requested_rows(self):
+        call_command('seed_data', installations=20, subscribers=30, orders=40, stdout=StringIO())
+        self.assertEqual(InstallationClient.objects.count(), 20)
+        self.assertEqual(ActiveSubscriber.objects.count(), 30)
+        self.assertEqual(Order.objects.count(), 40)
+
+    def test_seed_data_fills_phone_digits(self):
+        call_command('seed_data', installations=0, subscribers=10, orders=0, stdout=StringIO())
+        for subscriber in ActiveSubscriber.objects.all():
+            self.assertEqual(subscriber.phone_digits, normalize_phone(subscriber.contact))
+
+
+class ViewBenchmarkTests(TestCase):
+    """
+    Query counts must match the saved baseline: more is a regression, and fewer
+    means the baseline is stale and would hide the next regression
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', installations=50, subscribers=50, orders=50, stdout=StringIO())
+
+    def test_no_query_regressions(self):
+        baseline = load_baseline()
+        results = run_benchmarks(repeat=1)
+        for name, result in results.items():
+            with self.subTest(url=name):
+                self.assertLess(result['status'], 400)
+                self.assertIn(name, baseline, 'not in the baseline: run benchmark_views --save-baseline')
+                self.assertEqual(result['queries'], baseline[name]['queries'])
+
+    def test_benchmark_user_and_session_are_removed(self):
+        from django.contrib.auth.models import User
+        from django.contrib.sessions.models import Session
+        from .benchmarks import BENCHMARK_USERNAME
+
+        with mock.patch('clients.benchmarks.benchmark_urls', return_value={'dashboard': '/'}):
+            results = run_benchmarks(repeat=1)
+        self.assertEqual(results['dashboard']['status'], 200)
+        self.assertFalse(User.objects.filter(username=BENCHMARK_USERNAME).exists())
+        self.assertFalse(Session.objects.exists())
+
+
+class PerformanceInstrumentationTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log_file = Path(tmp.name) / 'perf.jsonl'
+        today = timezone.localdate()
+        self.subscriber = ActiveSubscriber.objects.create(
+            name='Grace', contact='0787768637', email='grace@example.com', kit_type='MINI',
+            last_subscription_date=today - timedelta(days=30), next_subscription_date=today,
+        )
+
+    def test_server_timing_and_log_record_for_a_view(self):
+        from django.test import Client
+        from django.db import connections
+
+        with self.settings(PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=1.0, PERF_LOG_FILE=self.log_file):
+            # A new client loads the middleware chain with instrumentation on
+            client = Client()
+            client.force_login(User.objects.create(username='staff'))
+            with CaptureQueriesContext(connections['default']) as queries:
+                response = client.get(f'/subscribers/{self.subscriber.pk}/')
+
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'^sql;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+
+        records = [json.loads(line) for line in self.log_file.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record['url_name'], 'clients:subscriber_detail')
+        self.assertEqual((record['method'], record['status']), ('GET', 200))
+        self.assertEqual(record['query_count'], len(queries))
+        self.assertGreater(record['template_ms'], 0)
+        self.assertEqual(set(record), {'ts', 'url_name', 'path', 'method', 'status', 'total_ms', 'sql_ms',
+                                       'query_count', 'duplicate_queries', 'n_plus_one', 'template_ms'})
+
+    def test_perf_report_aggregates_percentiles_per_url(self):
+        lines = [json.dumps({'url_name': 'clients:dashboard', 'total_ms': ms, 'sql_ms': ms / 2,
+                             'template_ms': 1, 'query_count': 14}) for ms in range(1, 101)]
+        lines += [json.dumps({'url_name': 'clients:order_list', 'total_ms': 5, 'sql_ms': 1, 'template_ms': 1,
+                              'query_count': 9, 'duplicate_queries': 2}) for _ in range(3)]
+        self.log_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        out = StringIO()
+        call_command('perf_report', log_file=str(self.log_file), stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines()[2:]]
+        # Sorted by p95 total time; nearest-rank percentiles over 1..100 ms
+        self.assertEqual(rows[0], ['clients:dashboard', '100', '50.0', '95.0', '99.0', '47.5', '1.0', '14', '0'])
+        self.assertEqual(rows[1], ['clients:order_list', '3', '5.0', '5.0', '5.0', '1.0', '1.0', '9', '3'])
+
+
+class DailyRollupTests(TestCase):
+    def test_rollups_are_incremental(self):
+        today = timezone.now().date()
+        InstallationClient.objects.create(
+            name='Jean', contact='0787768637', email='jean@example.com',
+            installation_type='CCTV', installation_date=today - timedelta(days=2),
+        )
+        call_command('build_daily_rollups', days_back=5, stdout=StringIO())
+        self.assertEqual(DailyRollup.objects.count(), 5)
+        self.assertEqual(DailyRollup.objects.get(date=today - timedelta(days=2)).cctv_installations, 1)
+
+        # A second run only adds the days since the last rollup
+        call_command('build_daily_rollups', include_today=True, stdout=StringIO())
+        self.assertEqual(DailyRollup.objects.count(), 6)
+
+        # Today was a partial day: the next run rebuilds it
+        InstallationClient.objects.create(
+            name='Marie', contact='0787768637', email='marie@example.com',
+            installation_type='SOLAR', installation_date=today,
+        )
+        call_command('build_daily_rollups', include_today=True, stdout=StringIO())
+        self.assertEqual(DailyRollup.objects.count(), 6)
+        self.assertEqual(DailyRollup.objects.get(date=today).solar_installations, 1)
+
+    def test_only_the_day_ending_gets_a_status_snapshot(self):
+        today = timezone.now().date()
+        # Paid until next week and deactivated today: neither was true on the backfilled days
+        ActiveSubscriber.objects.create(
+            name='Jean', contact='0787768637', email='jean@example.com', kit_type='MINI',
+            last_subscription_date=today - timedelta(days=23), next_subscription_date=today + timedelta(days=7),
+            is_deactivated=True, deactivated_at=timezone.now(),
+        )
+        call_command('build_daily_rollups', days_back=5, stdout=StringIO())
+
+        yesterday = DailyRollup.objects.get(date=today - timedelta(days=1))
+        self.assertEqual(yesterday.deactivated_count, 1)
+        past = DailyRollup.objects.get(date=today - timedelta(days=5))
+        self.assertIsNone(past.deactivated_count)
+        self.assertIsNone(past.mini_count)
+        # The dashboard trend skips days without a snapshot
+        self.client.force_login(User.objects.create(username='staff'))
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+        # Yesterday's snapshot survives the rebuild of the most recent row once it is in the past
+        call_command('build_daily_rollups', include_today=True, stdout=StringIO())
+        self.assertEqual(DailyRollup.objects.get(date=today - timedelta(days=1)).deactivated_count, 1)
+        self.assertEqual(DailyRollup.objects.get(date=today).deactivated_count, 1)
+
+
+class ProjectionTests(TestCase):
+    def test_projection_buckets_and_aging(self):
+        today = timezone.now().date()
+        for offset in (-20, 5, 45):
+            ActiveSubscriber.objects.create(
+                name='Aline', contact='0787768637', email='aline@example.com', kit_type='STANDARD',
+                last_subscription_date=today + timedelta(days=offset - 30),
+                next_subscription_date=today + timedelta(days=offset),
+            )
+        projection = project(months=3)
+        self.assertEqual(projection['active_subscribers'], 3)
+        # Overdue and due-in-5-days renew in period 1, due-in-45-days joins in period 2
+        self.assertEqual([p['renewals'] for p in projection['periods']], [2, 3, 3])
+        self.assertEqual(projection['aging'][1]['count'], 1)
+
+
+class NotificationSchedulerTests(TestCase):
+    def make_subscriber(self, days_until_due):
+        today = timezone.localdate()
+        return ActiveSubscriber.objects.create(
+            name='Grace', contact='0787768637', email='grace@example.com', kit_type='MINI',
+            last_subscription_date=today + timedelta(days=days_until_due - 30),
+            next_subscription_date=today + timedelta(days=days_until_due),
+        )
+
+    def test_notify_at_follows_due_date_on_save(self):
+        subscriber = self.make_subscriber(10)
+        self.assertEqual(timezone.localtime(subscriber.notify_at).date(),
+                         subscriber.next_subscription_date - timedelta(days=settings.NOTIFY_DAYS_BEFORE))
+
+        subscriber.is_deactivated = True
+        subscriber.save()
+        self.assertIsNone(subscriber.notify_at)
+
+    def test_due_reminders_are_sent_once(self):
+        due = self.make_subscriber(2)
+        self.make_subscriber(20)
+
+        sent = send_due_reminders()
+        self.assertEqual([s.pk for s in sent], [due.pk])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(send_due_reminders(), [])
+
+        # Paying moves the due date, which schedules the next reminder
+        due.refresh_from_db()
+        due.next_subscription_date += timedelta(days=30)
+        due.save()
+        self.assertIsNotNone(due.notify_at)
+
+    def test_reschedule_during_sending_is_kept(self):
+        due = self.make_subscriber(2)
+        new_due = due.next_subscription_date + timedelta(days=30)
+
+        def pay_while_sending(subscriber):
+            # Another request records a payment after the batch was read
+            paid = ActiveSubscriber.objects.get(pk=subscriber.pk)
+            paid.next_subscription_date = new_due
+            paid.save()
+            return build_message(subscriber)
+
+        with mock.patch('clients.notifications.build_message', side_effect=pay_while_sending):
+            self.assertEqual([s.pk for s in send_due_reminders()], [due.pk])
+
+        due.refresh_from_db()
+        self.assertEqual(due.next_subscription_date, new_due)
+        self.assertIsNone(due.last_notified_for)
+        self.assertIsNotNone(due.notify_at)
+
+
+class DispatcherTests(TestCase):
+    def setUp(self):
+        StubBackend.sent = []
+
+    def test_retries_until_sent(self):
+        dispatcher = Dispatcher({
+            'sms': {'BACKEND': 'stub', 'FAIL_FIRST': 1, 'RATE': 1000, 'CONCURRENCY': 2, 'RETRY_DELAY': 0.01},
+        })
+        messages = [NotificationMessage('sms', f'26378{i}', 'Hello') for i in range(5)]
+        results = asyncio.run(dispatcher.dispatch(messages))
+        self.assertEqual(len(results['sent']), 5)
+        self.assertTrue(all(message.attempts == 2 for message in results['sent']))
+        self.assertEqual(len(StubBackend.sent), 5)
+
+    def test_gives_up_after_max_retries(self):
+        dispatcher = Dispatcher({
+            'whatsapp': {'BACKEND': 'stub', 'FAIL_FIRST': 10, 'RATE': 1000, 'MAX_RETRIES': 2, 'RETRY_DELAY': 0.01},
+        })
+        results = asyncio.run(dispatcher.dispatch([NotificationMessage('whatsapp', '263787', 'Hello')]))
+        self.assertEqual(len(results['failed']), 1)
+        self.assertEqual(results['failed'][0].attempts, 3)
+
+    def test_token_bucket_limits_rate(self):
+        dispatcher = Dispatcher({'sms': {'BACKEND': 'stub', 'RATE': 50, 'BURST': 1, 'CONCURRENCY': 10}})
+        started = time.monotonic()
+        asyncio.run(dispatcher.dispatch([NotificationMessage('sms', '263787', 'Hi') for _ in range(11)]))
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+
+    @override_settings(NOTIFY_INLINE_LIMIT=2, NOTIFICATION_CHANNELS={
+        'whatsapp': {'BACKEND': 'stub', 'RATE': 1000, 'CONCURRENCY': 2},
+    })
+    def test_large_selections_are_queued_for_the_notifier(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        today = timezone.localdate()
+        subscribers = [
+            ActiveSubscriber.objects.create(
+                name=f'Subscriber {i}', contact=f'078776863{i}', email='s@example.com', kit_type='STANDARD',
+                last_subscription_date=today - timedelta(days=25), next_subscription_date=today + timedelta(days=5),
+            )
+            for i in range(3)
+        ]
+        subscribers[2].is_deactivated = True
+        subscribers[2].save()
+
+        def notify(selected):
+            return self.client.post('/subscribers/bulk-notify/', {'ids': [s.pk for s in selected]},
+                                    content_type='application/json').json()
+
+        # A handful is sent within the request
+        self.assertEqual(notify(subscribers[:1])['sent'], 1)
+        self.assertEqual(len(StubBackend.sent), 1)
+
+        # More than NOTIFY_INLINE_LIMIT only get queued
+        reply = notify(subscribers)
+        self.assertEqual(reply['queued'], 2)
+        self.assertEqual(len(StubBackend.sent), 1)
+
+        results = send_queued_reminders()
+        self.assertEqual(len(results['sent']), 2)
+        self.assertEqual(len(StubBackend.sent), 3)
+        self.assertFalse(QueuedReminder.objects.exists())
+
+
+class AsyncEndpointTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        today = timezone.localdate()
+        self.subscribers = [
+            ActiveSubscriber.objects.create(
+                name=f'Subscriber {i}', contact='0787768637', email='s@example.com', kit_type='STANDARD',
+                last_subscription_date=today - timedelta(days=30 - days),
+                next_subscription_date=today + timedelta(days=days),
+            )
+            for i, days in enumerate([-5, 3, 20])
+        ]
+
+    def test_deactivate_and_reactivate(self):
+        subscriber = self.subscribers[2]
+        response = self.client.post(f'/subscribers/{subscriber.pk}/deactivate/', {'reason': 'Moved'},
+                                    content_type='application/json')
+        self.assertTrue(response.json()['success'])
+        subscriber.refresh_from_db()
+        self.assertTrue(subscriber.is_deactivated)
+        self.assertEqual(subscriber.deactivation_reason, 'Moved')
+        self.assertIsNone(subscriber.notify_at)
+
+        self.client.post(f'/subscribers/{subscriber.pk}/reactivate/')
+        subscriber.refresh_from_db()
+        self.assertFalse(subscriber.is_deactivated)
+        self.assertIsNotNone(subscriber.notify_at)
+
+    def test_bulk_deactivate_and_stats(self):
+        response = self.client.post('/subscribers/bulk-deactivate/',
+                                    {'ids': [self.subscribers[0].pk, self.subscribers[1].pk]},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['count'], 2)
+
+        stats = self.client.get('/subscribers/stats/').json()['stats']
+        self.assertEqual(stats, {'total': 3, 'active': 1, 'due_soon': 0, 'overdue': 0, 'deactivated': 2})
+
+        listing = self.client.get('/subscribers/json/?status=deactivated&limit=1').json()
+        self.assertEqual(listing['count'], 2)
+        self.assertEqual(len(listing['results']), 1)
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+
+    def create_orders(self, count):
+        response = self.client.post('/api/v1/orders/', {'items': [
+            {'name': f'Customer {i}', 'order_details': 'Dish', 'phone': '0787768637', 'order_date': '2025-01-10'}
+            for i in range(count)
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['ids']
+
+    def test_cursor_pagination_and_field_selection(self):
+        ids = self.create_orders(5)
+        page = self.client.get('/api/v1/orders/?limit=2&fields=id,name').json()
+        self.assertEqual([row['id'] for row in page['results']], ids[:2])
+        self.assertEqual(set(page['results'][0]), {'id', 'name'})
+
+        pages = [page]
+        while pages[-1]['next_cursor']:
+            pages.append(self.client.get(f"/api/v1/orders/?limit=2&cursor={pages[-1]['next_cursor']}").json())
+        self.assertEqual([row['id'] for page in pages for row in page['results']], ids)
+
+        self.assertEqual(self.client.get('/api/v1/orders/?fields=secret').status_code, 400)
+
+    def test_etag_changes_with_updated_at(self):
+        order_id = self.create_orders(1)[0]
+        response = self.client.get(f'/api/v1/orders/{order_id}/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get(f'/api/v1/orders/{order_id}/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post('/api/v1/orders/batch-update/', {'items': [{'id': order_id, 'name': 'Renamed'}]},
+                         content_type='application/json')
+        response = self.client.get(f'/api/v1/orders/{order_id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['name'], 'Renamed')
+
+    def test_page_etag_changes_when_a_next_page_appears(self):
+        self.create_orders(1)
+        response = self.client.get('/api/v1/orders/?limit=1')
+        self.assertIsNone(response.json()['next_cursor'])
+        etag = response['ETag']
+
+        self.create_orders(1)
+        response = self.client.get('/api/v1/orders/?limit=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['next_cursor'])
+
+    def test_invalid_batch_creates_nothing(self):
+        response = self.client.post('/api/v1/orders/', {'items': [
+            {'name': 'Good', 'order_details': 'Dish', 'phone': '0787768637', 'order_date': '2025-01-10'},
+            {'name': 'Bad', 'order_details': 'Dish', 'phone': 'not a phone'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('1', response.json()['errors'])
+        self.assertFalse(Order.objects.exists())
+
+    def test_batch_pay_rejects_malformed_bodies(self):
+        for body in ([1, 2], {'ids': ['x']}, {'ids': 5}, {'ids': []}, {'ids': [True]},
+                     {'ids': [1], 'months': -2}, {'ids': [1], 'months': 'two'}, {'ids': [1], 'payment_date': 5}):
+            with self.subTest(body=body):
+                response = self.client.post('/api/v1/subscribers/batch-pay/', body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+
+    def test_batch_pay(self):
+        today = timezone.localdate()
+        subscriber = ActiveSubscriber.objects.create(
+            name='Grace', contact='0787768637', email='grace@example.com', kit_type='MINI',
+            last_subscription_date=today - timedelta(days=40), next_subscription_date=today - timedelta(days=10),
+        )
+        response = self.client.post('/api/v1/subscribers/batch-pay/', {'ids': [subscriber.pk], 'months': 2},
+                                    content_type='application/json')
+        self.assertEqual(response.json()['count'], 1)
+        subscriber.refresh_from_db()
+        self.assertEqual(subscriber.next_subscription_date, today + timedelta(days=60))
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/v1/subscribers/').status_code, 401)
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+
+    def make_order(self, name):
+        return Order.objects.create(name=name, order_details='Dish', phone='0787768637')
+
+    def sync(self, cursor=None, limit=100):
+        pages = []
+        while True:
+            url = f'/api/v1/changes/?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+            page = self.client.get(url).json()
+            pages.append(page)
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                return pages, cursor
+
+    def test_incremental_sync_with_tombstones(self):
+        first, second, third = [self.make_order(name) for name in ('A', 'B', 'C')]
+        pages, cursor = self.sync(limit=2)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual([row['id'] for page in pages for row in page['changes']['orders']],
+                         [first.pk, second.pk, third.pk])
+
+        pages, cursor = self.sync(cursor)
+        self.assertEqual(pages[0]['changes']['orders'], [])
+
+        second.name = 'B2'
+        second.save()
+        deleted_pk = third.pk
+        third.delete()
+        pages, cursor = self.sync(cursor)
+        self.assertEqual([row['name'] for row in pages[0]['changes']['orders']], ['B2'])
+        self.assertEqual([(row['resource'], row['id']) for row in pages[0]['deleted']], [('orders', deleted_pk)])
+
+    def test_since_timestamp(self):
+        self.make_order('Old')
+        Order.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        recent = self.make_order('New')
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get('/api/v1/changes/', {'since': since})
+        self.assertEqual([row['id'] for row in response.json()['changes']['orders']], [recent.pk])
+        self.assertEqual(self.client.get('/api/v1/changes/?since=yesterday').status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        self.order = Order.objects.create(name='Grace', order_details='Dish', phone='0787768637')
+        # The first page sets the CSRF cookie, which is part of the validator
+        self.client.get('/orders/')
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get('/orders/')
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+
+        # Only the validator aggregate: session and user come from caches, no rendering
+        with self.assertNumQueries(1):
+            response = self.client.get('/orders/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.order.delete()
+        self.assertEqual(self.client.get('/orders/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_changes_with_updated_at(self):
+        url = f'/orders/{self.order.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.order.name = 'Grace M'
+        self.order.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get('/orders/999/').status_code, 404)
+
+    def test_pending_messages_skip_the_validator(self):
+        etag = self.client.get('/orders/')['ETag']
+        self.client.post(f'/orders/{self.order.pk}/edit/', {
+            'name': 'Grace', 'order_details': 'Dish', 'phone': '0787768637', 'order_date': '2025-01-10',
+        })
+        response = self.client.get('/orders/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class StaticAssetTests(TestCase):
+    def test_picture_lists_generated_formats(self):
+        html = Template("{% load static_assets %}{% picture 'images/bg.jpeg' alt='Background' %}").render(Context())
+        self.assertIn('<source type="image/avif" srcset="/static/images/optimized/bg-640.avif 640w', html)
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('<img src="/static/images/bg.jpeg" alt="Background">', html)
+
+    def test_minify_css(self):
+        css = '/* sidebar */\n#sidebar {\n    color: #fff;\n    margin: 0 auto;\n}\n'
+        self.assertEqual(minify_css(css), '#sidebar{color:#fff;margin:0 auto}')
+
+    def test_pages_use_vendored_assets(self):
+        html = self.client.get('/login/').content.decode()
+        self.assertNotIn('cdn.jsdelivr.net', html)
+        self.assertIn('/static/vendor/bootstrap/bootstrap.min.css', html)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        caches['fragments'].clear()
+        self.client.force_login(User.objects.create(username='staff'))
+        self.subscriber = ActiveSubscriber.objects.create(
+            name='Amos', contact='0787768637', kit_type='STANDARD',
+            last_subscription_date=timezone.localdate(),
+            next_subscription_date=timezone.localdate() + timedelta(days=30),
+        )
+
+    def test_row_is_rendered_again_when_updated_at_changes(self):
+        self.assertContains(self.client.get('/subscribers/'), 'Amos')
+
+        # update() leaves updated_at alone, so the cached row is reused
+        ActiveSubscriber.objects.filter(pk=self.subscriber.pk).update(name='Amos K')
+        self.assertNotContains(self.client.get('/subscribers/'), 'Amos K')
+
+        self.subscriber.refresh_from_db()
+        self.subscriber.save()
+        self.assertContains(self.client.get('/subscribers/'), 'Amos K')
+
+
+class FastAdminTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        for name, phone in [('Grace', '078-776-8637'), ('Gift', '0771234567'), ('Tendai', '0712345678')]:
+            Order.objects.create(name=name, order_details='Dish', phone=phone)
+
+    def test_prefix_search(self):
+        response = self.client.get('/admin/clients/order/', {'q': 'gr'})
+        self.assertEqual([order.name for order in response.context['cl'].result_list], ['Grace'])
+        response = self.client.get('/admin/clients/order/', {'q': '(078) 776'})
+        self.assertEqual([order.name for order in response.context['cl'].result_list], ['Grace'])
+        response = self.client.get('/admin/clients/order/', {'q': '077'})
+        self.assertEqual([order.name for order in response.context['cl'].result_list], ['Gift'])
+
+    def test_changelists_skip_full_counts_and_cache_date_hierarchy(self):
+        for url in ['/admin/clients/order/', '/admin/clients/activesubscriber/', '/admin/clients/installationclient/']:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/clients/order/')
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    def test_estimated_count(self):
+        Order.objects.filter(name='Gift').delete()
+        # Never analyzed: the highest id
+        self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 100).count, 3)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 100).count, 2)
+        with override_settings(ADMIN_COUNT_LIMIT=2):
+            self.assertEqual(EstimatedCountPaginator(Order.objects.filter(name__gt='A'), 100).count, 2)
+
+
+class SessionAndUserCacheTests(TestCase):
+    def setUp(self):
+        clear_user_cache()
+        self.user = User.objects.create_user('staff', password='pw')
+
+    def test_page_view_needs_no_queries_once_warm(self):
+        self.client.login(username='staff', password='pw')
+        self.client.get('/orders/add/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/orders/add/').status_code, 200)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        self.client.login(username='staff', password='pw')
+        self.client.get('/orders/add/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/orders/add/').status_code, 200)
+
+    def test_saved_user_is_reloaded(self):
+        self.client.login(username='staff', password='pw')
+        self.client.get('/orders/add/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/orders/add/').status_code, 302)
+
+    def test_messages_do_not_touch_the_session(self):
+        self.client.login(username='staff', password='pw')
+        session_key = self.client.session.session_key
+        order = Order.objects.create(name='Grace', order_details='Dish', phone='0787768637')
+        response = self.client.post(f'/orders/{order.pk}/edit/', {
+            'name': 'Grace', 'order_details': 'Dish', 'phone': '0787768637', 'order_date': '2025-01-10',
+        })
+        self.assertIn('messages', response.cookies)
+        self.assertEqual(self.client.session.session_key, session_key)
+        self.assertNotIn('_messages', self.client.session)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        today = timezone.localdate()
+        self.old, self.recent = [
+            ActiveSubscriber.objects.create(
+                name=name, contact='0787768637', email='s@example.com', kit_type='MINI',
+                last_subscription_date=today - timedelta(days=30),
+                next_subscription_date=today + timedelta(days=20),
+                is_deactivated=True, deactivated_at=timezone.now() - timedelta(days=days),
+            )
+            for name, days in [('Old Subscriber', 400), ('Recent Subscriber', 10)]
+        ]
+        self.old_order = Order.objects.create(name='Old Order', order_details='Dish', phone='0787768637',
+                                              order_date=today - timedelta(days=1000))
+        Order.objects.create(name='New Order', order_details='Dish', phone='0787768637')
+        self.created_at = self.old.created_at
+        call_command('archive_records', stdout=StringIO())
+
+    def test_moves_old_rows_only(self):
+        self.assertEqual(list(ActiveSubscriber.objects.values_list('name', flat=True)), ['Recent Subscriber'])
+        self.assertEqual(list(Order.objects.values_list('name', flat=True)), ['New Order'])
+        self.assertEqual(ArchivedSubscriber.objects.get().pk, self.old.pk)
+        self.assertEqual(ArchivedOrder.objects.get().phone_digits, '0787768637')
+
+    def test_detail_and_search_include_archived(self):
+        self.assertContains(self.client.get(f'/subscribers/{self.old.pk}/'), 'Archived on')
+        self.assertContains(self.client.get(f'/orders/{self.old_order.pk}/'), 'archived on')
+
+        lookup = self.client.get('/customers/', {'phone': '078-776-8637'})
+        self.assertEqual(lookup.context['total_records'], 2)
+        lookup = self.client.get('/customers/', {'phone': '078-776-8637', 'include_archived': '1'})
+        self.assertEqual(lookup.context['total_records'], 4)
+
+        listing = self.client.get('/subscribers/json/', {'q': 'old', 'include_archived': '1'}).json()
+        self.assertEqual(listing['count'], 0)
+        self.assertEqual([row['id'] for row in listing['archived']], [self.old.pk])
+
+    def test_reactivation_restores_the_row(self):
+        response = self.client.post(f'/subscribers/{self.old.pk}/reactivate/')
+        self.assertTrue(response.json()['success'])
+        restored = ActiveSubscriber.objects.get(pk=self.old.pk)
+        self.assertFalse(restored.is_deactivated)
+        self.assertEqual(restored.created_at, self.created_at)
+        self.assertFalse(ArchivedSubscriber.objects.exists())
+
+
+class PaymentLedgerTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        today = timezone.localdate()
+        self.standard, self.mini = [
+            ActiveSubscriber.objects.create(
+                name=f'{kit_type.title()} Subscriber', contact='0787768637', email='s@example.com',
+                kit_type=kit_type, last_subscription_date=today - timedelta(days=30), next_subscription_date=today,
+            )
+            for kit_type in ('STANDARD', 'MINI')
+        ]
+
+    def test_single_and_bulk_payments_update_ledger_and_summary(self):
+        prices = settings.SUBSCRIPTION_PRICES
+        self.client.post(f'/subscribers/{self.standard.pk}/mark-paid/',
+                         {'payment_date': '2025-01-10', 'next_subscription_months': '3'})
+        self.client.post('/subscribers/bulk-mark-paid/', {
+            'subscriber_ids': f'{self.standard.pk},{self.mini.pk}', 'payment_date': '2025-04-10',
+        })
+
+        self.assertEqual(Payment.objects.count(), 3)
+        summary = PaymentSummary.objects.get(pk=self.standard.pk)
+        self.assertEqual(summary.payment_count, 2)
+        self.assertEqual(summary.lifetime_paid, prices['STANDARD'] * 4)
+        self.assertEqual(str(summary.last_paid_on), '2025-04-10')
+        self.assertEqual(PaymentSummary.objects.get(pk=self.mini.pk).lifetime_paid, prices['MINI'])
+
+        self.standard.refresh_from_db()
+        self.assertEqual(str(self.standard.last_subscription_date), '2025-04-10')
+
+        response = self.client.get(f'/subscribers/{self.standard.pk}/')
+        self.assertEqual([payment.months for payment in response.context['payments']], [1, 3])
+        self.assertContains(response, '2 payments')
+
+    def test_ledger_is_append_only(self):
+        self.client.post(f'/subscribers/{self.mini.pk}/mark-paid/', {'payment_date': '2025-01-10'})
+        payment = Payment.objects.get()
+        payment.amount = 0
+        with self.assertRaises(ValueError):
+            payment.save()
+        with self.assertRaises(ValueError):
+            payment.delete()
+
+
+class JobRunnerTests(TransactionTestCase):
+    def test_job_host_runs_scheduled_commands_only(self):
+        import socketserver
+        import threading
+        import run_job
+
+        host = run_job.make_host(('127.0.0.1', 0), token='secret')
+        threading.Thread(target=host.serve_forever, daemon=True).start()
+        try:
+            def send(name, args, token='secret'):
+                return run_job.send(name, args, address=host.server_address, token=token)
+
+            reply = send('build_daily_rollups', ['--days-back', '1'])
+            self.assertTrue(reply['ok'], reply['output'])
+            self.assertIn('elapsed_ms', reply)
+
+            reply = send('flush', ['--noinput'])
+            self.assertFalse(reply['ok'])
+            self.assertIn('not a scheduled job', reply['output'])
+
+            reply = send('build_daily_rollups', [], token='guess')
+            self.assertEqual((reply['ok'], reply['output']), (False, 'Invalid job host token\n'))
+
+            for args in (['--settings', 'evil'], ['--days-back'], ['--days-back=x'], ['--rebuild=1']):
+                reply = send('build_daily_rollups', args)
+                self.assertFalse(reply['ok'], args)
+            reply = send('db_maintenance', ['--interval', '60'])
+            self.assertIn('does not accept --interval', reply['output'])
+        finally:
+            host.shutdown()
+            host.server_close()
+        self.assertIsNone(run_job.send('build_daily_rollups', [], address=host.server_address, token='secret'))
+        # Set on the host's own server class only
+        self.assertFalse(socketserver.TCPServer.allow_reuse_address)
+
+    def test_job_args_whitelist_covers_every_job(self):
+        import run_job
+
+        self.assertEqual(set(run_job.JOB_ARGS), set(run_job.JOB_COMMANDS))
+        self.assertIsNone(run_job.check_args('db_maintenance', ['analyze', 'check', '--step-seconds=2.5']))
+        self.assertIsNotNone(run_job.check_args('db_maintenance', ['drop']))
+
+    def test_host_token_is_created_once_and_private(self):
+        import os
+        import tempfile
+        import run_job
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, '.job_host_token')
+            self.assertIsNone(run_job.host_token(path))
+            token = run_job.host_token(path, create=True)
+            self.assertEqual(len(token), 64)
+            self.assertEqual(run_job.host_token(path, create=True), token)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+
+class OffsiteBackupTests(TestCase):
+    def test_interrupted_upload_resumes_and_verifies(self):
+        import tempfile
+        from pathlib import Path
+        from .offsite import MB, FileSystemStore, ship_file
+
+        class FlakyStore(FileSystemStore):
+            fail_part = 3
+
+            def upload_part(self, key, upload_id, number, body, checksum):
+                if number == self.fail_part:
+                    raise ConnectionError('Connection reset')
+                return super().upload_part(key, upload_id, number, body, checksum)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / 'backup-20250131-230000.dump'
+            source.write_bytes(bytes(range(256)) * 43008)  # 10.5 MB: 3 parts of 5 MB
+            store = FlakyStore(LOCATION=Path(tmp) / 'offsite')
+            options = {'state_dir': Path(tmp) / 'state', 'part_size': 5 * MB, 'concurrency': 2, 'max_retries': 0}
+
+            with self.assertRaises(ConnectionError):
+                ship_file(store, source, 'starspace/backup.dump', **options)
+            self.assertIsNone(store.head('starspace/backup.dump'))
+
+            store.fail_part = None
+            result = ship_file(store, source, 'starspace/backup.dump', **options)
+            self.assertEqual((result['status'], result['parts'], result['sent_parts']), ('resumed', 3, 1))
+            self.assertEqual((Path(tmp) / 'offsite/starspace/backup.dump').read_bytes(), source.read_bytes())
+            self.assertEqual(ship_file(store, source, 'starspace/backup.dump', **options)['status'], 'skipped')
+
+            # Same size, different contents: shipped again
+            source.write_bytes(bytes(reversed(range(256))) * 43008)
+            self.assertEqual(ship_file(store, source, 'starspace/backup.dump', **options)['status'], 'uploaded')
+            self.assertEqual((Path(tmp) / 'offsite/starspace/backup.dump').read_bytes(), source.read_bytes())
+
+    def test_part_size_limits(self):
+        from .offsite import MAX_PARTS, MB, part_size_for
+
+        with self.assertRaises(ValueError):
+            part_size_for(100 * MB, 4 * MB)
+        self.assertEqual(part_size_for(100 * MB, 8 * MB), 8 * MB)
+        # 100 GB in 8 MB parts would be 12,800 parts
+        size = 100 * 1024 * MB
+        part_size = part_size_for(size, 8 * MB)
+        self.assertEqual(part_size % MB, 0)
+        self.assertLessEqual(-(-size // part_size), MAX_PARTS)
+        with self.assertRaises(CommandError):
+            call_command('ship_backups', part_size_mb=1, stdout=StringIO())
+
+    def test_bandwidth_limit_is_shared(self):
+        from .offsite import BandwidthLimiter
+
+        limiter = BandwidthLimiter(1000)
+        start = time.monotonic()
+        limiter.consume(1000)
+        limiter.consume(100)
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+
+class RowActionTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        today = timezone.localdate()
+        self.subscriber = ActiveSubscriber.objects.create(
+            name='Overdue Subscriber', contact='0787768637', email='o@example.com', kit_type='STANDARD',
+            last_subscription_date=today - timedelta(days=50), next_subscription_date=today - timedelta(days=20),
+        )
+        self.today = today
+
+    def test_payment_returns_row_and_counters(self):
+        url = f'/subscribers/{self.subscriber.pk}/mark-paid/'
+        response = self.client.post(url, {'payment_date': str(self.today), 'list': 'overdue'})
+        data = response.json()
+        # Paid, so it leaves the overdue list
+        self.assertEqual(data['row'], '')
+        self.assertEqual(data['counters']['subscribers_count'], 0)
+
+        response = self.client.post(url, {'payment_date': str(self.today), 'list': 'subscribers', 'format': 'html'})
+        self.assertContains(response, f'id="row-{self.subscriber.pk}"')
+        self.assertContains(response, '?next=/subscribers/')
+        self.assertEqual(json.loads(response['X-Counters'])['active_count'], 1)
+
+    def test_overdue_severity_bar_is_hooked_to_the_counters(self):
+        import re
+
+        page = self.client.get('/subscribers/overdue/').content.decode()
+        hooked = set(re.findall(r'data-counter(?:-share|-of)?="(\w+)"', page))
+        self.assertIn('subscribers_severe_count', hooked)
+        data = self.client.post(f'/subscribers/{self.subscriber.pk}/mark-paid/',
+                                {'payment_date': str(self.today), 'list': 'overdue'}).json()
+        # Every counter the page shows comes back with an in-place payment
+        self.assertLessEqual(hooked, set(data['counters']))
+
+    def test_edit_from_row(self):
+        url = f'/subscribers/{self.subscriber.pk}/edit/'
+        self.assertContains(self.client.get(url, {'list': 'overdue'}), 'name="list" value="overdue"')
+
+        fields = {
+            'name': 'Renamed', 'contact': '0787768637', 'email': 'o@example.com', 'kit_type': 'MINI',
+            'last_subscription_date': str(self.today - timedelta(days=50)), 'is_active': 'on', 'list': 'overdue',
+        }
+        response = self.client.post(url, dict(fields, next_subscription_date=str(self.today - timedelta(days=60))))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('must be after', response.json()['form'])
+
+        data = self.client.post(url, dict(fields, next_subscription_date=str(self.today - timedelta(days=20)))).json()
+        self.assertIn('Renamed', data['row'])
+        self.assertEqual(data['counters']['subscribers_mini_count'], 1)
+
+
+class InstallationWorkloadTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        caches['default'].clear()
+        for day, installation_type in (('2025-01-30', 'STARLINK'), ('2025-01-30', 'CCTV'),
+                                       ('2025-02-01', 'STARLINK'), ('2025-02-14', 'SOLAR')):
+            InstallationClient.objects.create(name='Client', contact='0787768637', email='c@example.com',
+                                              installation_type=installation_type, installation_date=day)
+
+    def test_counts_per_period_and_type(self):
+        response = self.client.get('/installations/calendar/', {'format': 'json', 'period': 'day', 'start': '2025-01'})
+        self.assertEqual(response.json()['buckets'], [
+            {'date': '2025-01-30', 'STARLINK': 1, 'CCTV': 1, 'NETWORKING': 0, 'SOLAR': 0, 'total': 2},
+        ])
+
+        # The week of Monday 27 January spans both months
+        data = self.client.get('/installations/calendar/', {'format': 'json', 'period': 'week', 'start': '2025-01'}).json()
+        self.assertEqual([(bucket['date'], bucket['total']) for bucket in data['buckets']],
+                         [('2025-01-27', 3), ('2025-02-10', 1)])
+        self.assertEqual(data['totals']['STARLINK'], 2)
+        self.assertContains(self.client.get('/installations/calendar/'), 'Installation Workload')
+
+    def test_past_months_are_cached_until_an_installation_changes(self):
+        from datetime import date
+        from .workload import workload
+
+        today = date(2025, 6, 1)
+        workload(date(2025, 1, 1), 3, 'month', today)
+        with self.assertNumQueries(0):
+            self.assertEqual(workload(date(2025, 1, 1), 3, 'month', today)['totals']['total'], 4)
+
+        installation = InstallationClient.objects.get(installation_type='SOLAR')
+        installation.installation_date = date(2025, 3, 3)
+        installation.save()
+        result = workload(date(2025, 1, 1), 3, 'month', today)
+        self.assertEqual([(str(bucket['date']), bucket['total']) for bucket in result['buckets']],
+                         [('2025-01-01', 2), ('2025-02-01', 1), ('2025-03-01', 1)])
+
+    def test_cache_is_filled_from_the_primary(self):
+        from datetime import date
+        from django.db import connections
+        from .replica import _use_replica
+        from .workload import workload
+
+        token = _use_replica.set(True)
+        try:
+            with CaptureQueriesContext(connections['default']) as queries:
+                workload(date(2025, 1, 1), 1, 'month', date(2025, 6, 1))
+        finally:
+            _use_replica.reset(token)
+        self.assertEqual(len(queries), 1)
+
+
+class DuplicateTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='staff'))
+        today = timezone.localdate()
+        subscriber = dict(kit_type='STANDARD', last_subscription_date=today - timedelta(days=30),
+                          next_subscription_date=today)
+        self.kept = ActiveSubscriber.objects.create(name='Jean Uwimana', contact='0787768637',
+                                                    email='jean@example.com', **subscriber)
+        self.duplicate = ActiveSubscriber.objects.create(name='Uwimana, Jean', contact='(078) 776-8637',
+                                                         email='other@example.com', **subscriber)
+        # One wrong digit: only the name blocks bring this pair together
+        self.order = Order.objects.create(name='Jean Uwimna', phone='0787768673', order_details='Wall mount')
+        InstallationClient.objects.create(name='Marie Uwimana', contact='0787768637', email='marie@example.com',
+                                          installation_date=today)
+
+    def test_finds_variants_across_tables(self):
+        call_command('find_duplicates', stdout=StringIO())
+        pairs = {(candidate.left_resource, candidate.right_resource, candidate.reasons)
+                 for candidate in DuplicateCandidate.objects.all()}
+        self.assertEqual(pairs, {
+            ('subscribers', 'subscribers', 'name, phone'),
+            ('orders', 'subscribers', 'similar name, similar phone'),
+        })
+        self.assertContains(self.client.get('/customers/duplicates/'), 'Uwimana, Jean')
+
+    def test_merging_subscribers_keeps_payments(self):
+        self.client.post(f'/subscribers/{self.duplicate.pk}/mark-paid/', {'payment_date': '2025-01-10'})
+        self.client.post(f'/subscribers/{self.kept.pk}/mark-paid/', {'payment_date': '2025-02-10'})
+        self.kept.refresh_from_db()
+        call_command('find_duplicates', stdout=StringIO())
+        candidates = DuplicateCandidate.objects.all()
+        self.client.post('/customers/duplicates/resolve/', {
+            'action': 'merge', 'candidate_ids': [candidate.pk for candidate in candidates],
+        })
+
+        self.assertFalse(ActiveSubscriber.objects.filter(pk=self.duplicate.pk).exists())
+        summary = PaymentSummary.objects.get(pk=self.kept.pk)
+        self.assertEqual(summary.payment_count, 2)
+        self.assertFalse(PaymentSummary.objects.filter(pk=self.duplicate.pk).exists())
+        # The ledger is untouched; the history resolves through the merge record
+        self.assertEqual(Payment.objects.filter(subscriber_id=self.duplicate.pk).count(), 1)
+        self.assertEqual(SubscriberMerge.objects.get(pk=self.duplicate.pk).kept_id, self.kept.pk)
+        self.assertEqual(len(payment_history(self.kept.pk)), 2)
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.name, self.order.phone), ('Jean Uwimana', '0787768637'))
+        self.assertEqual(set(candidates.values_list('status', flat=True)), {'MERGED'})
+
+        # What the merges replaced is kept on the candidates
+        replaced = {}
+        for values in candidates.values_list('replaced', flat=True):
+            replaced.update(values)
+        self.assertEqual(replaced[f'orders:{self.order.pk}'], {'name': 'Jean Uwimna', 'phone': '0787768673'})
+        self.assertEqual(replaced[f'subscribers:{self.duplicate.pk}']['contact'], '(078) 776-8637')
+        self.assertEqual(replaced[f'subscribers:{self.kept.pk}']['next_subscription_date'],
+                         self.kept.next_subscription_date.isoformat())
+
+        # Decided pairs are not listed again
+        call_command('find_duplicates', stdout=StringIO())
+        self.assertFalse(DuplicateCandidate.objects.filter(status='PENDING').exists())
+
+
+class DatabaseMaintenanceTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        from .maintenance import connect
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # A file of its own: the maintenance connection must not touch the test database
+        self.db = connect(str(Path(self.tmp.name) / 'maintenance.sqlite3'))
+        self.addCleanup(self.db.close)
+        self.db.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)')
+        self.db.execute('CREATE INDEX item_name ON item (name)')
+        with self.db:
+            self.db.execute('BEGIN')
+            self.db.executemany('INSERT INTO item (name) VALUES (?)', [(f'item {i}' * 20,) for i in range(5000)])
+        self.db.execute('DELETE FROM item WHERE id > 1000')
+
+    def test_steps_analyze_release_pages_and_checkpoint(self):
+        from .maintenance import database_stats, run_maintenance
+
+        before = database_stats(self.db)
+        self.assertGreater(before['fragmentation'], 0.5)
+        results = {result['step']: result for result in run_maintenance(self.db, step_seconds=30)}
+        self.assertEqual({result['status'] for result in results.values()}, {'done'})
+        self.assertIn('item', results['analyze']['detail'])
+        self.assertEqual(results['check']['detail'], 'ok')
+        self.assertIn('WAL truncated', results['checkpoint']['detail'])
+
+        after = database_stats(self.db)
+        self.assertEqual(after['free_bytes'], 0)
+        self.assertLess(after['bytes'], before['bytes'])
+        self.assertEqual(after['wal_bytes'], 0)
+        # Statistics are fresh: nothing to analyze until the table grows or shrinks again
+        self.assertEqual(next(run_maintenance(self.db, ['analyze']))['detail'], '0 table(s) analyzed')
+
+    def test_steps_stop_at_their_time_budget(self):
+        from .maintenance import run_maintenance
+
+        result = next(run_maintenance(self.db, ['analyze'], step_seconds=0, full_analyze=True))
+        self.assertEqual(result['status'], 'timeout')
+
+    def test_connections_wait_the_configured_lock_timeout(self):
+        from django.conf import settings
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+        self.assertEqual(busy_timeout, settings.DATABASES['default']['OPTIONS']['timeout'] * 1000)
+
+
+class ReplicaTests(TestCase):
+    def test_router_sends_only_flagged_client_reads_to_the_replica(self):
+        from .replica import _use_replica
+        from .routers import ReplicaRouter
+
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(ActiveSubscriber), 'default')
+        token = _use_replica.set(True)
+        try:
+            self.assertEqual(router.db_for_read(ActiveSubscriber), 'replica')
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_write(ActiveSubscriber), 'default')
+        finally:
+            _use_replica.reset(token)
+        self.assertFalse(router.allow_migrate('replica', 'clients'))
+
+    def test_writes_pin_the_browser_to_the_primary(self):
+        from django.test import RequestFactory
+        from .replica import PIN_COOKIE_NAME, should_use_replica
+
+        self.client.force_login(User.objects.create(username='staff'))
+        response = self.client.post('/orders/add/', {})
+        self.assertEqual(response.cookies[PIN_COOKIE_NAME]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        factory = RequestFactory()
+        with mock.patch('clients.replica.replica_available', return_value=True):
+            self.assertTrue(should_use_replica(factory.get('/')))
+            self.assertFalse(should_use_replica(factory.post('/')))
+            pinned = factory.get('/')
+            pinned.COOKIES[PIN_COOKIE_NAME] = '1'
+            self.assertFalse(should_use_replica(pinned))
+
+    @override_settings(REPLICA_REFRESH_AFTER_WRITES=3)
+    def test_refresh_after_every_n_writes(self):
+        from . import replica
+
+        replica._writes_since_refresh = 0
+        with mock.patch('clients.replica.replica_available', return_value=True), \
+                mock.patch('clients.replica.refresh_replica_in_background') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(7):
+                    replica.record_write()
+        self.assertEqual(refresh.call_count, 2)
+        self.assertEqual(replica._writes_since_refresh, 1)
+
+    def test_old_replica_is_refreshed_before_it_is_read(self):
+        import os
+        import tempfile
+        from pathlib import Path
+        from . import replica
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'replica.sqlite3'
+            path.touch()
+            with override_settings(REPLICA_DATABASE_PATH=path, REPLICA_MAX_AGE_SECONDS=60), \
+                    mock.patch('clients.replica.replica_is_mirror', return_value=False), \
+                    mock.patch('clients.replica.refresh_replica_in_background') as refresh:
+                self.assertTrue(replica.replica_available())
+                old = time.time() - 120
+                os.utime(path, (old, old))
+                self.assertFalse(replica.replica_available())
+                refresh.assert_called_once()
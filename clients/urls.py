@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'clients'
 
@@ -15,6 +15,7 @@ urlpatterns = [
     # Installation URLs
     path('installations/', views.installation_list, name='installation_list'),
     path('installations/add/', views.add_installation, name='add_installation'),
+    path('installations/calendar/', views.installation_calendar, name='installation_calendar'),
     path('installations/<int:pk>/', views.installation_detail, name='installation_detail'),
     path('installations/<int:pk>/edit/', views.edit_installation, name='edit_installation'),
     path('installations/type/<str:installation_type>/', views.installations_by_type, name='installations_by_type'),
@@ -26,6 +27,8 @@ urlpatterns = [
     path('subscribers/<int:pk>/edit/', views.edit_subscriber, name='edit_subscriber'),
     path('subscribers/due-soon/', views.subscribers_due_soon, name='subscribers_due_soon'),
     path('subscribers/overdue/', views.subscribers_overdue, name='subscribers_overdue'),
+    path('subscribers/json/', views.subscriber_list_json, name='subscriber_list_json'),
+    path('subscribers/stats/', views.subscriber_stats, name='subscriber_stats'),
     
     # Payment processing URLs
     path('subscribers/<int:pk>/mark-paid/', views.mark_subscriber_paid, name='mark_subscriber_paid'),
@@ -36,10 +39,33 @@ urlpatterns = [
     path('subscribers/<int:pk>/reactivate/', views.reactivate_subscriber, name='reactivate_subscriber'),
     path('subscribers/bulk-deactivate/', views.bulk_deactivate_subscribers, name='bulk_deactivate_subscribers'),
     
+    # Notification URLs
+    path('subscribers/bulk-notify/', views.bulk_notify_subscribers, name='bulk_notify_subscribers'),
+    
     # My Space URLs
     path('orders/', views.order_list, name='order_list'),
     path('orders/add/', views.add_order, name='add_order'),
     path('orders/<int:pk>/', views.order_detail, name='order_detail'),
     path('orders/<int:pk>/edit/', views.edit_order, name='edit_order'),
     path('orders/<int:pk>/delete/', views.delete_order, name='delete_order'),
-]
\ No newline at end of file
+    
+    # Customer lookup URLs
+    path('customers/', views.customer_lookup, name='customer_lookup'),
+    path('customers/duplicates/', views.duplicate_review, name='duplicate_review'),
+    path('customers/duplicates/resolve/', views.resolve_duplicates, name='resolve_duplicates'),
+    
+    # Report URLs
+    path('reports/projection/', views.revenue_projection, name='revenue_projection'),
+    
+    # JSON API
+    path('api/v1/subscribers/batch-pay/', api.batch_pay, name='api_subscriber_batch_pay'),
+    path('api/v1/changes/', api.changes, name='api_changes'),
+]
+
+for resource, singular in [('installations', 'installation'), ('subscribers', 'subscriber'), ('orders', 'order')]:
+    urlpatterns += [
+        path(f'api/v1/{resource}/', api.collection, {'resource': resource}, name=f'api_{singular}_list'),
+        path(f'api/v1/{resource}/<int:pk>/', api.detail, {'resource': resource}, name=f'api_{singular}_detail'),
+        path(f'api/v1/{resource}/batch-update/', api.batch_update, {'resource': resource},
+             name=f'api_{singular}_batch_update'),
+    ]
\ No newline at end of file
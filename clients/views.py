@@ -1,19 +1,33 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
+from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import timedelta, datetime
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
+from django.db.models import Count, Q
 import json
+from asgiref.sync import sync_to_async
 from .models import InstallationClient, ActiveSubscriber
 from .forms import InstallationClientForm, ActiveSubscriberForm
-from .models import Order
+from .models import Order, DailyRollup, DuplicateCandidate, normalize_phone
 from .forms import OrderForm
+from .admin_mixins import PHONE_TERM
+from .archive import archived_instance, restore, search_archive
+from .dispatch import queue_reminders, send_reminders
+from .duplicates import load_pairs, merge, suggested_keep
+from .notifications import notify_at_for
+from .payments import payment_history, payment_summary, record_payments
+from .conditional import conditional_page, detail_state, list_state, page_object
+from .replica import record_write, use_replica
+from .workload import PERIODS, workload
 
 # Login view
 def login_view(request):
@@ -67,6 +81,7 @@ def register_view(request):
 
 # Add login required decorator to all protected views
 @login_required(login_url='clients:login')
+@use_replica
 def dashboard(request):
     # Get statistics for dashboard
     total_installations = InstallationClient.objects.count()
@@ -94,6 +109,26 @@ def dashboard(request):
     # Deactivated count
     deactivated_count = ActiveSubscriber.objects.filter(is_deactivated=True).count()
     
+    # Trends read the precomputed daily rollups instead of scanning history: one query covers
+    # the last 30 days and both months of the month-over-month table
+    today = timezone.now().date()
+    this_month = today.replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    rollups = list(DailyRollup.objects.filter(date__gte=min(last_month, today - timedelta(days=30)))
+                   .order_by('date'))
+    trend = rollups[-30:]
+    trend_max = max([max(day.overdue_count or 0, day.payments_recorded) for day in trend] or [0])
+    monthly = {}
+    for day in rollups:
+        if day.date >= last_month:
+            month = monthly.setdefault(day.date.replace(day=1),
+                                       {'payments': 0, 'revenue': 0, 'orders': 0, 'installations': 0})
+            month['payments'] += day.payments_recorded
+            month['revenue'] += day.revenue_collected
+            month['orders'] += day.orders_count
+            month['installations'] += (day.starlink_installations + day.cctv_installations
+                                       + day.networking_installations + day.solar_installations)
+    
     context = {
         'total_installations': total_installations,
         'recent_installations': recent_installations,
@@ -110,11 +145,19 @@ def dashboard(request):
         'kit_type_stats': {
             'standard': active_subscribers.filter(kit_type='STANDARD').count(),
             'mini': active_subscribers.filter(kit_type='MINI').count(),
-        }
+        },
+        'trend': trend,
+        'trend_max': trend_max,
+        'month_over_month': {
+            'this_month': monthly.get(this_month, {}),
+            'last_month': monthly.get(last_month, {}),
+        },
     }
     return render(request, 'clients/dashboard.html', context)
 
 @login_required(login_url='clients:login')
+@use_replica
+@conditional_page(list_state(InstallationClient))
 def installation_list(request):
     installations = InstallationClient.objects.all()
     
@@ -128,6 +171,39 @@ def installation_list(request):
     }
     return render(request, 'clients/installation_list.html', context)
 
+# Months shown at once by the installation calendar, per period
+CALENDAR_WINDOWS = {'day': 1, 'week': 3, 'month': 12}
+
+@login_required(login_url='clients:login')
+def installation_calendar(request):
+    """Installations per day, week or month and type; the page loads each window as JSON"""
+    period = request.GET.get('period', 'day')
+    if period not in PERIODS:
+        period = 'day'
+    today = timezone.localdate()
+    try:
+        start = datetime.strptime(request.GET['start'], '%Y-%m').date()
+    except (KeyError, ValueError):
+        # Month view pages by year, the others start at the current month
+        start = today.replace(month=1, day=1) if period == 'month' else today.replace(day=1)
+    
+    if request.GET.get('format') != 'json':
+        return render(request, 'clients/installation_calendar.html', {
+            'period': period,
+            'start': start,
+            'installation_types': InstallationClient.INSTALLATION_TYPES,
+        })
+    
+    months = CALENDAR_WINDOWS[period]
+    data = workload(start, months, period, today)
+    return JsonResponse({
+        'success': True,
+        'period': period,
+        'start': start.strftime('%Y-%m'),
+        'months': months,
+        **data,
+    })
+
 @login_required(login_url='clients:login')
 def add_installation(request):
     if request.method == 'POST':
@@ -141,8 +217,11 @@ def add_installation(request):
     return render(request, 'clients/installation_form.html', {'form': form, 'type': 'Installation'})
 
 @login_required(login_url='clients:login')
+@conditional_page(detail_state(InstallationClient))
 def installation_detail(request, pk):
-    installation = get_object_or_404(InstallationClient, pk=pk)
+    installation = page_object(request, InstallationClient.objects, pk)
+    if installation is None:
+        raise Http404('No installation client matches the given query.')
     return render(request, 'clients/installation_detail.html', {'installation': installation})
 
 @login_required(login_url='clients:login')
@@ -159,29 +238,14 @@ def edit_installation(request, pk):
     return render(request, 'clients/installation_form.html', {'form': form, 'type': 'Installation'})
 
 @login_required(login_url='clients:login')
+@conditional_page(list_state(ActiveSubscriber))
 def subscriber_list(request):
     subscribers = ActiveSubscriber.objects.all()
     
-    # Calculate counts
-    total_count = subscribers.count()
-    active_count = subscribers.filter(is_deactivated=False, next_subscription_date__gte=timezone.now().date()).count()
-    due_soon_count = subscribers.filter(
-        is_deactivated=False,
-        next_subscription_date__lte=timezone.now().date() + timedelta(days=7),
-        next_subscription_date__gte=timezone.now().date()
-    ).count()
-    overdue_count = subscribers.filter(
-        is_deactivated=False,
-        next_subscription_date__lt=timezone.now().date()
-    ).count()
-    deactivated_count = subscribers.filter(is_deactivated=True).count()
-    
+    # All the tab counts in one aggregate query
     context = {
         'subscribers': subscribers,
-        'active_count': active_count,
-        'due_soon_count': due_soon_count,
-        'overdue_count': overdue_count,
-        'deactivated_count': deactivated_count,
+        **list_counters('subscribers', timezone.now().date()),
     }
     return render(request, 'clients/subscriber_list.html', context)
 
@@ -198,36 +262,67 @@ def add_subscriber(request):
     return render(request, 'clients/subscriber_form.html', {'form': form, 'type': 'Subscriber'})
 
 @login_required(login_url='clients:login')
+@conditional_page(detail_state(ActiveSubscriber, 'payment_summary'))
 def subscriber_detail(request, pk):
-    subscriber = get_object_or_404(ActiveSubscriber, pk=pk)
-    return render(request, 'clients/subscriber_detail.html', {'subscriber': subscriber})
+    # The payment summary row comes along in the same query
+    subscriber = (page_object(request, ActiveSubscriber.objects.select_related('payment_summary'), pk)
+                  or archived_instance(ActiveSubscriber, pk))
+    if subscriber is None:
+        raise Http404('No subscriber matches the given query.')
+    return render(request, 'clients/subscriber_detail.html', {
+        'subscriber': subscriber,
+        'payments': payment_history(pk),
+        'payment_summary': payment_summary(subscriber),
+    })
 
 @login_required(login_url='clients:login')
 def edit_subscriber(request, pk):
     subscriber = get_object_or_404(ActiveSubscriber, pk=pk)
+    # Opened from a list row (?list=...): a bare form, then the updated row instead of a redirect
+    list_name = request.POST.get('list') or request.GET.get('list')
+    from_row = list_name in ROW_LISTS
     if request.method == 'POST':
         form = ActiveSubscriberForm(request.POST, instance=subscriber)
         if form.is_valid():
             form.save()
+            if from_row:
+                return row_response(request, subscriber, list_name, 'Subscriber updated successfully!')
             messages.success(request, 'Subscriber updated successfully!')
             return redirect('clients:subscriber_detail', pk=subscriber.pk)
+        if from_row:
+            return JsonResponse({
+                'success': False,
+                'form': render_to_string(ROW_EDIT_FORM, {'form': form, 'row_list': list_name}, request),
+            }, status=400)
     else:
         form = ActiveSubscriberForm(instance=subscriber)
+        if from_row:
+            return render(request, ROW_EDIT_FORM, {'form': form, 'row_list': list_name})
     return render(request, 'clients/subscriber_form.html', {'form': form, 'type': 'Subscriber'})
 
 # Deactivation Views
+# These are async so a burst of JSON actions does not hold a worker thread each
+# under ASGI; each is a single UPDATE, so the replica write counter is bumped by hand.
 @login_required(login_url='clients:login')
 @require_POST
-def deactivate_subscriber(request, pk):
+async def deactivate_subscriber(request, pk):
     """Deactivate a subscriber"""
     try:
-        subscriber = get_object_or_404(ActiveSubscriber, pk=pk)
+        subscriber = await ActiveSubscriber.objects.only('pk', 'name').aget(pk=pk)
         
         # Get reason from POST data if available
         data = json.loads(request.body) if request.body else {}
         reason = data.get('reason', '')
         
-        subscriber.deactivate(reason)
+        now = timezone.now()
+        await ActiveSubscriber.objects.filter(pk=pk).aupdate(
+            is_deactivated=True,
+            deactivated_at=now,
+            deactivation_reason=reason,
+            notify_at=None,
+            updated_at=now,
+        )
+        await sync_to_async(record_write)()
         
         return JsonResponse({
             'success': True,
@@ -241,11 +336,25 @@ def deactivate_subscriber(request, pk):
 
 @login_required(login_url='clients:login')
 @require_POST
-def reactivate_subscriber(request, pk):
+async def reactivate_subscriber(request, pk):
     """Reactivate a subscriber"""
     try:
-        subscriber = get_object_or_404(ActiveSubscriber, pk=pk)
-        subscriber.reactivate()
+        try:
+            subscriber = await ActiveSubscriber.objects.aget(pk=pk)
+        except ActiveSubscriber.DoesNotExist:
+            # Archived: move the row back into the subscriber table first
+            subscriber = await sync_to_async(restore)(ActiveSubscriber, pk)
+        subscriber.is_deactivated = False
+        
+        now = timezone.now()
+        await ActiveSubscriber.objects.filter(pk=pk).aupdate(
+            is_deactivated=False,
+            deactivated_at=None,
+            deactivation_reason="",
+            notify_at=notify_at_for(subscriber),
+            updated_at=now,
+        )
+        await sync_to_async(record_write)()
         
         return JsonResponse({
             'success': True,
@@ -259,7 +368,7 @@ def reactivate_subscriber(request, pk):
 
 @login_required(login_url='clients:login')
 @require_POST
-def bulk_deactivate_subscribers(request):
+async def bulk_deactivate_subscribers(request):
     """Bulk deactivate subscribers"""
     try:
         data = json.loads(request.body)
@@ -272,13 +381,16 @@ def bulk_deactivate_subscribers(request):
                 'error': 'No subscriber IDs provided'
             }, status=400)
         
-        # Update all selected subscribers
-        subscribers = ActiveSubscriber.objects.filter(pk__in=ids)
-        count = 0
-        
-        for subscriber in subscribers:
-            subscriber.deactivate(reason)
-            count += 1
+        # Update all selected subscribers in one statement
+        now = timezone.now()
+        count = await ActiveSubscriber.objects.filter(pk__in=ids).aupdate(
+            is_deactivated=True,
+            deactivated_at=now,
+            deactivation_reason=reason,
+            notify_at=None,
+            updated_at=now,
+        )
+        await sync_to_async(record_write)(count)
         
         return JsonResponse({
             'success': True,
@@ -291,6 +403,190 @@ def bulk_deactivate_subscribers(request):
             'error': str(e)
         }, status=400)
 
+SUBSCRIBER_JSON_FIELDS = (
+    'id', 'name', 'contact', 'email', 'kit_type',
+    'last_subscription_date', 'next_subscription_date', 'is_deactivated',
+)
+
+def subscriber_status_filter(status, today):
+    """Q for the status tabs on the subscriber list"""
+    if status == 'active':
+        return Q(is_deactivated=False, next_subscription_date__gte=today)
+    if status == 'due_soon':
+        return Q(is_deactivated=False, next_subscription_date__gte=today,
+                 next_subscription_date__lte=today + timedelta(days=7))
+    if status == 'overdue':
+        return Q(is_deactivated=False, next_subscription_date__lt=today)
+    if status == 'deactivated':
+        return Q(is_deactivated=True)
+    return Q()
+
+# List pages whose rows can be updated in place: row template and page URL
+ROW_LISTS = {
+    'subscribers': ('clients/rows/subscriber_row.html', 'clients:subscriber_list'),
+    'due_soon': ('clients/rows/due_soon_row.html', 'clients:subscribers_due_soon'),
+    'overdue': ('clients/rows/overdue_row.html', 'clients:subscribers_overdue'),
+}
+ROW_EDIT_FORM = 'clients/rows/subscriber_edit_form.html'
+
+def list_counters(list_name, today):
+    """The counters shown above a subscriber list, in one aggregate query"""
+    if list_name == 'subscribers':
+        return ActiveSubscriber.objects.aggregate(
+            subscribers_count=Count('pk'),
+            **{f'{status}_count': Count('pk', filter=subscriber_status_filter(status, today))
+               for status in ('active', 'due_soon', 'overdue', 'deactivated')},
+        )
+    
+    counts = {
+        'subscribers_count': Count('pk'),
+        'subscribers_standard_count': Count('pk', filter=Q(kit_type='STANDARD')),
+        'subscribers_mini_count': Count('pk', filter=Q(kit_type='MINI')),
+    }
+    if list_name == 'overdue':
+        # By severity
+        counts.update(
+            subscribers_severe_count=Count('pk', filter=Q(next_subscription_date__lte=today - timedelta(days=30))),
+            subscribers_moderate_count=Count('pk', filter=Q(next_subscription_date__gt=today - timedelta(days=30),
+                                                            next_subscription_date__lte=today - timedelta(days=15))),
+            subscribers_mild_count=Count('pk', filter=Q(next_subscription_date__gt=today - timedelta(days=15))),
+        )
+    counters = ActiveSubscriber.objects.filter(subscriber_status_filter(list_name, today)).aggregate(**counts)
+    if list_name == 'overdue':
+        # Estimated revenue from the per-kit subscription prices
+        prices = settings.SUBSCRIPTION_PRICES
+        counters['estimated_revenue'] = (counters['subscribers_standard_count'] * prices['STANDARD']
+                                         + counters['subscribers_mini_count'] * prices['MINI'])
+    return counters
+
+def row_in_list(subscriber, list_name, today):
+    if list_name == 'subscribers':
+        return True
+    if subscriber.is_deactivated:
+        return False
+    if list_name == 'overdue':
+        return subscriber.next_subscription_date < today
+    return today <= subscriber.next_subscription_date <= today + timedelta(days=7)
+
+def row_response(request, subscriber, list_name, message):
+    """
+    The subscriber's re-rendered row (empty if it has left the list) and the
+    list's counters: JSON by default, or the bare row HTML with the counters
+    in an X-Counters header for ``format=html``.
+    """
+    today = timezone.now().date()
+    row_template, list_url = ROW_LISTS[list_name]
+    row = ''
+    if row_in_list(subscriber, list_name, today):
+        row = render_to_string(row_template, {'subscriber': subscriber, 'list_path': reverse(list_url)})
+    counters = list_counters(list_name, today)
+    
+    if request.POST.get('format') == 'html':
+        response = HttpResponse(row)
+        response['X-Counters'] = json.dumps(counters)
+        return response
+    return JsonResponse({
+        'success': True,
+        'message': message,
+        'row': row,
+        'counters': counters,
+    })
+
+@login_required(login_url='clients:login')
+async def subscriber_list_json(request):
+    """Subscriber list as JSON (?status=, ?q=, ?limit=, ?offset=)"""
+    today = timezone.now().date()
+    subscribers = ActiveSubscriber.objects.filter(
+        subscriber_status_filter(request.GET.get('status'), today)
+    )
+    query = request.GET.get('q', '').strip()
+    if query:
+        subscribers = subscribers.filter(Q(name__icontains=query) | Q(contact__icontains=query))
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 500)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'limit and offset must be integers'
+        }, status=400)
+    
+    results = [row async for row in subscribers.values(*SUBSCRIBER_JSON_FIELDS)[offset:offset + limit]]
+    data = {
+        'success': True,
+        'count': await subscribers.acount(),
+        'limit': limit,
+        'offset': offset,
+        'results': results,
+    }
+    if query and request.GET.get('include_archived') == '1':
+        # Archived matches by name prefix or phone digits, listed separately
+        lookup = {'phone_digits': normalize_phone(query)} if PHONE_TERM.fullmatch(query) else {'name': query}
+        archived = await sync_to_async(search_archive)(ActiveSubscriber, limit=limit, **lookup)
+        data['archived'] = [
+            dict({field: getattr(subscriber, field) for field in SUBSCRIBER_JSON_FIELDS},
+                 archived_at=subscriber.archived_at)
+            for subscriber in archived
+        ]
+    return JsonResponse(data)
+
+@login_required(login_url='clients:login')
+@use_replica
+async def subscriber_stats(request):
+    """Subscriber counts for the list tabs and dashboard cards"""
+    today = timezone.now().date()
+    subscribers = ActiveSubscriber.objects.all()
+    stats = {'total': await subscribers.acount()}
+    for status in ('active', 'due_soon', 'overdue', 'deactivated'):
+        stats[status] = await subscribers.filter(subscriber_status_filter(status, today)).acount()
+    return JsonResponse({'success': True, 'stats': stats})
+
+@login_required(login_url='clients:login')
+@require_POST
+def bulk_notify_subscribers(request):
+    """Send reminders to the selected subscribers over one or more channels"""
+    try:
+        data = json.loads(request.body)
+        ids = data.get('ids', [])
+        channels = data.get('channels') or [data.get('channel', 'whatsapp')]
+        
+        if not ids:
+            return JsonResponse({
+                'success': False,
+                'error': 'No subscriber IDs provided'
+            }, status=400)
+        
+        unknown = [channel for channel in channels if channel not in settings.NOTIFICATION_CHANNELS]
+        if unknown:
+            return JsonResponse({
+                'success': False,
+                'error': f'Unknown channel: {", ".join(unknown)}'
+            }, status=400)
+        
+        subscribers = ActiveSubscriber.objects.filter(pk__in=ids, is_deactivated=False)
+        if len(ids) > settings.NOTIFY_INLINE_LIMIT:
+            # Too many to send at the channels' rates within a request: run_notifier sends them
+            queued = queue_reminders(subscribers.values_list('pk', flat=True), channels)
+            return JsonResponse({
+                'success': True,
+                'queued': queued,
+                'message': f'{queued} reminder(s) queued, they go out in the background'
+            })
+        results = send_reminders(subscribers, channels)
+        
+        return JsonResponse({
+            'success': True,
+            'sent': len(results['sent']),
+            'failed': len(results['failed']),
+            'message': f"{len(results['sent'])} reminder(s) sent"
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
 # Payment processing for overdue/due soon subscribers
 @login_required(login_url='clients:login')
 def mark_subscriber_paid(request, pk):
@@ -307,12 +603,16 @@ def mark_subscriber_paid(request, pk):
         else:
             payment_date = timezone.now().date()
         
-        # Update subscription dates
-        subscriber.last_subscription_date = payment_date
-        subscriber.next_subscription_date = payment_date + timedelta(days=30 * next_subscription_months)
-        subscriber.save()
+        # Ledger entry, summary and subscription dates in one transaction
+        record_payments([subscriber], payment_date, next_subscription_months)
+        
+        message = f'Payment recorded for {subscriber.name}. Next subscription due: {subscriber.next_subscription_date.strftime("%d %b %Y")}'
+        # From a list row: send back just that row and the list's counters
+        list_name = request.POST.get('list')
+        if list_name in ROW_LISTS:
+            return row_response(request, subscriber, list_name, message)
         
-        messages.success(request, f'Payment recorded for {subscriber.name}. Next subscription due: {subscriber.next_subscription_date.strftime("%d %b %Y")}')
+        messages.success(request, message)
         
         # Redirect back to the page they came from
         next_url = request.POST.get('next', 'clients:subscriber_list')
@@ -348,14 +648,9 @@ def bulk_mark_paid(request):
             return redirect(request.POST.get('next', 'clients:subscriber_list'))
         
         subscribers = ActiveSubscriber.objects.filter(id__in=subscriber_ids, is_deactivated=False)
-        count = 0
         
-        for subscriber in subscribers:
-            subscriber.last_subscription_date = payment_date
-            # Calculate next subscription date correctly
-            subscriber.next_subscription_date = payment_date + timedelta(days=30 * next_subscription_months)
-            subscriber.save()
-            count += 1
+        # One write transaction and one ledger insert for the whole batch
+        count = len(record_payments(subscribers, payment_date, next_subscription_months))
         
         messages.success(request, f'{count} subscriber(s) marked as paid successfully!')
         
@@ -366,53 +661,29 @@ def bulk_mark_paid(request):
 
 @login_required(login_url='clients:login')
 def subscribers_due_soon(request):
+    today = timezone.now().date()
     due_soon = ActiveSubscriber.objects.filter(
-        is_deactivated=False,
-        next_subscription_date__lte=timezone.now().date() + timedelta(days=7),
-        next_subscription_date__gte=timezone.now().date()
+        subscriber_status_filter('due_soon', today)
     ).order_by('next_subscription_date')
     
-    # Add counts for standard and mini kits
-    subscribers_standard_count = due_soon.filter(kit_type='STANDARD').count()
-    subscribers_mini_count = due_soon.filter(kit_type='MINI').count()
-    
+    # Total and per-kit counts in one aggregate query
     context = {
         'subscribers': due_soon,
-        'subscribers_standard_count': subscribers_standard_count,
-        'subscribers_mini_count': subscribers_mini_count,
+        **list_counters('due_soon', today),
     }
     return render(request, 'clients/due_soon.html', context)
 
 @login_required(login_url='clients:login')
 def subscribers_overdue(request):
+    today = timezone.now().date()
     overdue = ActiveSubscriber.objects.filter(
-        is_deactivated=False,
-        next_subscription_date__lt=timezone.now().date()
+        subscriber_status_filter('overdue', today)
     ).order_by('next_subscription_date')
     
-    # Count by severity
-    severe_count = overdue.filter(next_subscription_date__lte=timezone.now().date() - timedelta(days=30)).count()
-    moderate_count = overdue.filter(
-        next_subscription_date__gt=timezone.now().date() - timedelta(days=30),
-        next_subscription_date__lte=timezone.now().date() - timedelta(days=15)
-    ).count()
-    mild_count = overdue.filter(next_subscription_date__gt=timezone.now().date() - timedelta(days=15)).count()
-    
-    # Kit type counts
-    standard_count = overdue.filter(kit_type='STANDARD').count()
-    mini_count = overdue.filter(kit_type='MINI').count()
-    
-    # Estimated revenue (assuming $100 per subscription)
-    estimated_revenue = overdue.count() * 100
-    
+    # Severity, kit type and revenue counts in one aggregate query
     context = {
         'subscribers': overdue,
-        'subscribers_severe_count': severe_count,
-        'subscribers_moderate_count': moderate_count,
-        'subscribers_mild_count': mild_count,
-        'subscribers_standard_count': standard_count,
-        'subscribers_mini_count': mini_count,
-        'estimated_revenue': estimated_revenue,
+        **list_counters('overdue', today),
     }
     return render(request, 'clients/overdue.html', context)
 
@@ -429,6 +700,8 @@ def installations_by_type(request, installation_type):
 
 # Order views for My Space section
 @login_required(login_url='clients:login')
+@use_replica
+@conditional_page(list_state(Order))
 def order_list(request):
     """View all orders"""
     orders = Order.objects.all()
@@ -454,9 +727,12 @@ def add_order(request):
     return render(request, 'clients/order_form.html', {'form': form, 'type': 'Order'})
 
 @login_required(login_url='clients:login')
+@conditional_page(detail_state(Order))
 def order_detail(request, pk):
     """View order details"""
-    order = get_object_or_404(Order, pk=pk)
+    order = page_object(request, Order.objects, pk) or archived_instance(Order, pk)
+    if order is None:
+        raise Http404('No order matches the given query.')
     return render(request, 'clients/order_detail.html', {'order': order})
 
 @login_required(login_url='clients:login')
@@ -484,4 +760,97 @@ def delete_order(request, pk):
         messages.success(request, f'Order for {order_name} deleted successfully!')
         return redirect('clients:order_list')
     
-    return render(request, 'clients/order_confirm_delete.html', {'order': order})
\ No newline at end of file
+    return render(request, 'clients/order_confirm_delete.html', {'order': order})
+
+# Customer 360 lookup across installations, subscriptions and orders
+@login_required(login_url='clients:login')
+def customer_lookup(request):
+    """Gather everything recorded against a phone number, whatever format it was typed in"""
+    phone = request.GET.get('phone', '').strip()
+    phone_digits = normalize_phone(phone)
+    include_archived = request.GET.get('include_archived') == '1'
+    
+    installations = subscribers = orders = []
+    if phone_digits:
+        # One indexed equality lookup per table
+        installations = list(InstallationClient.objects.filter(phone_digits=phone_digits))
+        subscribers = list(ActiveSubscriber.objects.filter(phone_digits=phone_digits))
+        orders = list(Order.objects.filter(phone_digits=phone_digits))
+        if include_archived:
+            subscribers += search_archive(ActiveSubscriber, phone_digits=phone_digits)
+            orders += search_archive(Order, phone_digits=phone_digits)
+    
+    context = {
+        'phone': phone,
+        'phone_digits': phone_digits,
+        'include_archived': include_archived,
+        'installations': installations,
+        'subscribers': subscribers,
+        'orders': orders,
+        'total_records': len(installations) + len(subscribers) + len(orders),
+    }
+    return render(request, 'clients/customer_lookup.html', context)
+
+# Duplicate customers found by the find_duplicates command
+@login_required(login_url='clients:login')
+def duplicate_review(request):
+    """Pending duplicate pairs, best match first, a page at a time"""
+    page = Paginator(DuplicateCandidate.objects.filter(status='PENDING'), 25).get_page(request.GET.get('page'))
+    pairs = load_pairs(page.object_list)
+    for candidate in pairs:
+        candidate.keep = suggested_keep(candidate)
+    return render(request, 'clients/duplicate_review.html', {'page': page, 'pairs': pairs})
+
+@login_required(login_url='clients:login')
+@require_POST
+def resolve_duplicates(request):
+    """Merge or dismiss the selected pairs; each pair keeps the side picked on the review page"""
+    action = request.POST.get('action')
+    candidate_ids = [pk for pk in request.POST.getlist('candidate_ids') if pk.isdigit()]
+    next_url = request.POST.get('next') or reverse('clients:duplicate_review')
+    if not candidate_ids or action not in ('merge', 'dismiss'):
+        messages.warning(request, 'No duplicates selected.')
+        return redirect(next_url)
+    
+    candidates = DuplicateCandidate.objects.filter(pk__in=candidate_ids, status='PENDING').order_by('-score')
+    if action == 'dismiss':
+        count = candidates.update(status='DISMISSED')
+        messages.success(request, f'{count} pair(s) marked as not duplicates.')
+        return redirect(next_url)
+    
+    merged = 0
+    removed = set()
+    for candidate in candidates:
+        # An earlier merge in this batch may have deleted one of the records
+        if {(candidate.left_resource, candidate.left_id), (candidate.right_resource, candidate.right_id)} & removed:
+            continue
+        try:
+            deleted = merge(candidate, request.POST.get(f'keep_{candidate.pk}'))
+        except ValueError as e:
+            messages.error(request, str(e))
+            continue
+        if deleted:
+            removed.add(deleted)
+        merged += 1
+    if merged:
+        messages.success(request, f'{merged} pair(s) merged successfully!')
+    return redirect(next_url)
+
+
+# Cash-flow and churn projection
+@login_required(login_url='clients:login')
+@use_replica
+def revenue_projection(request):
+    """Expected renewals and revenue for the coming months"""
+    # NumPy is only needed here, so import it lazily with the projection engine
+    from .projections import project
+    
+    try:
+        months = min(max(int(request.GET.get('months', 12)), 1), 24)
+    except ValueError:
+        months = 12
+    projection = project(months=months)
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse(projection)
+    return render(request, 'clients/revenue_projection.html', {'projection': projection, 'months': months})
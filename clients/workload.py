@@ -0,0 +1,100 @@
+"""
+Installation calendar and crew workload.
+
+Installations are counted per day, week or month and type by the database
+(``Trunc*`` and ``GROUP BY`` over the ``(installation_date,
+installation_type)`` index), one calendar month at a time, so a window only
+reads the index entries it shows.
+
+Months that are over are cached for ``WORKLOAD_CACHE_SECONDS``: paging back
+through history costs a cache lookup, and only the current and future months
+are counted on every request. Saving or deleting an installation drops the
+cached months it touches (see signals.py).
+"""
+from datetime import date
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import InstallationClient
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _cache_key(period, month):
+    return f'workload:{period}:{month:%Y-%m}'
+
+
+def forget_months(*dates):
+    """Drop the cached counts of the months these installation dates fall in"""
+    # Dates assigned in code may still be strings
+    field = InstallationClient._meta.get_field('installation_date')
+    months = {field.to_python(installation_date).replace(day=1) for installation_date in dates if installation_date}
+    cache.delete_many([_cache_key(period, month) for month in months for period in PERIODS])
+
+
+def _count_months(months, period):
+    """{month: [(bucket, type, count), ...]} for ``months`` (in order), in one query"""
+    # Always the primary: these counts are cached for a day, and a stale replica would
+    # put back the counts an installation's save just dropped
+    rows = (InstallationClient.objects.using('default')
+            .filter(installation_date__gte=months[0], installation_date__lt=add_months(months[-1], 1))
+            .annotate(month=TruncMonth('installation_date'), bucket=PERIODS[period]('installation_date'))
+            .order_by()
+            .values('month', 'bucket', 'installation_type')
+            .annotate(count=Count('pk')))
+    counts = {month: [] for month in months}
+    for row in rows:
+        # Months between the first and last that were not asked for (already cached) are skipped
+        if row['month'] in counts:
+            counts[row['month']].append((row['bucket'], row['installation_type'], row['count']))
+    return counts
+
+
+def workload(start, months=1, period='day', today=None):
+    """
+    Installations per ``period`` and type over ``months`` calendar months from ``start``.
+
+    Returns {'buckets': [{'date': date, 'total': n, <type>: n, ...}, ...],
+    'totals': {'total': n, <type>: n, ...}}, buckets in date order.
+    """
+    today = today or timezone.localdate()
+    this_month = today.replace(day=1)
+    window = [add_months(start.replace(day=1), offset) for offset in range(months)]
+
+    past = [month for month in window if month < this_month]
+    counts = {}
+    cached = cache.get_many([_cache_key(period, month) for month in past])
+    for month in past:
+        if _cache_key(period, month) in cached:
+            counts[month] = cached[_cache_key(period, month)]
+    missing = [month for month in window if month not in counts]
+    if missing:
+        counts.update(_count_months(missing, period))
+        cache.set_many({_cache_key(period, month): counts[month] for month in missing if month < this_month},
+                       settings.WORKLOAD_CACHE_SECONDS)
+
+    buckets = {}
+    totals = dict.fromkeys(dict(InstallationClient.INSTALLATION_TYPES), 0)
+    totals['total'] = 0
+    for month in window:
+        # A week that spans two months is counted in both and added up here
+        for bucket, installation_type, count in counts[month]:
+            row = buckets.get(bucket)
+            if row is None:
+                row = buckets[bucket] = dict(dict.fromkeys(totals, 0), date=bucket)
+            row[installation_type] += count
+            row['total'] += count
+            totals[installation_type] += count
+            totals['total'] += count
+    return {'buckets': [buckets[bucket] for bucket in sorted(buckets)], 'totals': totals}
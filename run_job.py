@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+Fast-start runner for scheduled management commands.
+
+    python run_job.py send_due_notifications
+    python run_job.py --timing build_daily_rollups
+    python run_job.py --importtime send_due_notifications
+    python run_job.py --serve
+    python run_job.py --via-host send_due_notifications
+
+A job runs under the slim ``starspace.settings_jobs`` profile and skips the
+system checks. ``--timing`` reports how long setup (imports included) and the
+command took. ``--importtime`` runs the job under ``python -X importtime`` and lists
+the slowest imports.
+
+``--serve`` starts a resident job host on localhost. It sets Django up once
+and then runs jobs on request, one at a time. ``--via-host`` hands the job to
+that host, which only costs starting a bare Python process. If no host is
+running, the job runs locally instead.
+
+Requests to the host carry a per-install secret, which ``--serve`` writes to
+``.job_host_token`` (readable by its owner only) the first time it starts.
+The host only runs the commands in ``JOB_COMMANDS``, with the options in
+``JOB_ARGS``.
+"""
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import time
+
+# Commands the runner accepts, with any apps they need on top of the slim profile
+JOB_COMMANDS = {
+    'send_due_notifications': [],
+    'send_campaign': [],
+    'build_daily_rollups': [],
+    'archive_records': [],
+    'refresh_replica': [],
+    'dbbackup': ['dbbackup'],
+    'mediabackup': ['dbbackup'],
+    'ship_backups': [],
+    'db_maintenance': [],
+}
+# What the job host lets a request pass: option -> value type (None for a flag); 'positional' lists
+# the accepted positional values. Options that loop (--interval) would tie up the host and are left out
+JOB_ARGS = {
+    'send_due_notifications': {},
+    'send_campaign': {'--segment': str, '--channels': str},
+    'build_daily_rollups': {'--days-back': int, '--include-today': None, '--rebuild': None},
+    'archive_records': {'--subscribers-days': int, '--orders-days': int, '--batch-size': int, '--dry-run': None},
+    'refresh_replica': {},
+    'dbbackup': {'--clean': None, '--compress': None},
+    'mediabackup': {'--clean': None, '--compress': None},
+    'ship_backups': {'--concurrency': int, '--part-size-mb': int, '--limit-kbps': int, '--dry-run': None},
+    'db_maintenance': {'--step-seconds': float, '--full-analyze': None,
+                       'positional': ('analyze', 'vacuum', 'check', 'checkpoint')},
+}
+HOST_ADDRESS = ('127.0.0.1', int(os.environ.get('STARSPACE_JOB_HOST_PORT', 8765)))
+TOKEN_FILE = os.environ.get('STARSPACE_JOB_HOST_TOKEN_FILE',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), '.job_host_token'))
+
+
+def setup(apps):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'starspace.settings_jobs')
+    os.environ.setdefault('STARSPACE_JOB_APPS', ','.join(apps))
+    import django
+    django.setup()
+
+
+def run_command(name, args):
+    """Run a job in this process; returns (ok, output)"""
+    from io import StringIO
+    from django.core.management import call_command
+    from django.db import close_old_connections
+
+    if name not in JOB_COMMANDS:
+        return False, f'{name} is not a scheduled job; use manage.py\n'
+    output = StringIO()
+    try:
+        # call_command does not run the system checks
+        call_command(name, *args, stdout=output, stderr=output)
+        return True, output.getvalue()
+    except Exception as e:
+        return False, output.getvalue() + f'{type(e).__name__}: {e}\n'
+    finally:
+        close_old_connections()
+
+
+def host_token(path=TOKEN_FILE, create=False):
+    """The job host's secret, written (owner-only) on first use with ``create``; None if there is none"""
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def check_args(name, args):
+    """None if ``args`` only use the options JOB_ARGS allows for job ``name``, otherwise the reason"""
+    allowed = JOB_ARGS.get(name)
+    if allowed is None:
+        return f'{name} is not a scheduled job; use manage.py'
+    args = iter(args)
+    for arg in args:
+        option, has_value, value = arg.partition('=')
+        if not option.startswith('-'):
+            if arg not in allowed.get('positional', ()):
+                return f'{name} does not accept {arg!r} through the job host'
+            continue
+        if option not in allowed:
+            return f'{name} does not accept {option} through the job host'
+        kind = allowed[option]
+        if kind is None:
+            if has_value:
+                return f'{option} takes no value'
+            continue
+        value = value if has_value else next(args, None)
+        if value is None:
+            return f'{option} needs a value'
+        try:
+            kind(value)
+        except ValueError:
+            return f'{option} expects {kind.__name__}, got {value!r}'
+    return None
+
+
+def make_host(address=HOST_ADDRESS, token=None):
+    """TCP server that runs one JSON-encoded job per connection, one job at a time, for holders of ``token``"""
+    import socketserver
+
+    token = token or host_token(create=True)
+
+    class JobHandler(socketserver.StreamRequestHandler):
+        def reply(self, ok, output, **extra):
+            self.wfile.write(json.dumps({'ok': ok, 'output': output, **extra}).encode() + b'\n')
+
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+                name, args = request['command'], [str(arg) for arg in request.get('args', [])]
+                given = str(request.get('token', ''))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.reply(False, 'Malformed request\n')
+                return
+            if not hmac.compare_digest(given.encode(), token.encode()):
+                self.reply(False, 'Invalid job host token\n')
+                return
+            problem = check_args(name, args)
+            if problem:
+                self.reply(False, problem + '\n')
+                return
+            start = time.perf_counter()
+            ok, output = run_command(name, args)
+            self.reply(ok, output, elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    class JobServer(socketserver.TCPServer):
+        # A restarted host can bind again while the old socket is in TIME_WAIT
+        allow_reuse_address = True
+
+    return JobServer(address, JobHandler)
+
+
+def send(name, args, address=HOST_ADDRESS, timeout=3600, token=None):
+    """Run a job on the job host; returns its reply, or None if no host is listening"""
+    token = token or host_token()
+    if token is None:
+        # No host has ever been started on this install
+        return None
+    try:
+        connection = socket.create_connection(address, timeout=timeout)
+    except OSError:
+        return None
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps({'command': name, 'args': args, 'token': token}).encode() + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def slowest_imports(argv, count=15):
+    """Re-run the job under -X importtime and return the slowest (cumulative µs, module) imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', __file__, *argv],
+                            capture_output=True, text=True)
+    sys.stdout.write(result.stdout)
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, module = line.split('|')
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative), module.rstrip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Run a scheduled management command with a fast start')
+    parser.add_argument('--timing', action='store_true', help='Report setup and run time')
+    parser.add_argument('--importtime', action='store_true', help='List the slowest imports of this job')
+    parser.add_argument('--serve', action='store_true', help='Run the resident job host')
+    parser.add_argument('--via-host', action='store_true', help='Send the job to the job host if it is running')
+    parser.add_argument('command', nargs='?')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    options = parser.parse_args(argv)
+
+    if options.serve:
+        setup(sorted({app for apps in JOB_COMMANDS.values() for app in apps}))
+        host = make_host()
+        print(f'✅ Job host listening on {HOST_ADDRESS[0]}:{HOST_ADDRESS[1]} (token in {TOKEN_FILE})', flush=True)
+        host.serve_forever()
+        return 0
+
+    if not options.command:
+        parser.error('a command is required')
+    if options.command not in JOB_COMMANDS:
+        parser.error(f'{options.command} is not a scheduled job ({", ".join(JOB_COMMANDS)})')
+
+    if options.importtime:
+        plain_argv = [arg for arg in argv if arg != '--importtime']
+        imports = slowest_imports(plain_argv)
+        print('📊 Slowest imports (cumulative ms):')
+        for microseconds, module in imports:
+            print(f'{microseconds / 1000:>9.1f}  {module}')
+        return 0
+
+    if options.via_host:
+        reply = send(options.command, options.args)
+        if reply is not None:
+            sys.stdout.write(reply['output'])
+            if options.timing:
+                print(f"📊 Ran on job host in {reply['elapsed_ms']}ms")
+            return 0 if reply['ok'] else 1
+        print('⏭️ No job host running, running locally', file=sys.stderr)
+
+    start = time.perf_counter()
+    setup(JOB_COMMANDS[options.command])
+    ready = time.perf_counter()
+    ok, output = run_command(options.command, options.args)
+    done = time.perf_counter()
+    sys.stdout.write(output)
+    if options.timing:
+        print(f'📊 Setup {(ready - start) * 1000:.0f}ms, job {(done - ready) * 1000:.0f}ms')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'clients.instrumentation.PerformanceInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,15 +34,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'clients.replica.PrimaryPinMiddleware',
 ]
 
+# Per-request SQL/template instrumentation (Server-Timing header + JSONL log for perf_report)
+PERF_INSTRUMENTATION = False
+PERF_SAMPLE_RATE = 0.1
+PERF_LOG_FILE = BASE_DIR / 'perf_requests.jsonl'
+
 ROOT_URLCONF = 'starspace.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -49,6 +55,16 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory; in development they are re-read on every request
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ] if DEBUG else [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -56,13 +72,51 @@ TEMPLATES = [
 WSGI_APPLICATION = 'starspace.wsgi.application'
 
 # Database
+# SQLite performance profile, applied as PRAGMAs on every new connection. The WAL journal
+# (readers no longer block the writer) is stored in the database file and set once by
+# migration 0019, so opening a connection never rewrites the file
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',        # safe with WAL, far fewer fsyncs
+    'mmap_size': 134217728,         # 128 MB memory-mapped reads
+    'cache_size': -20000,           # ~20 MB page cache per connection
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Keep connections open between requests so the PRAGMAs are paid once
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN so transactions never fail on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+            # Wait up to 20s for a lock instead of failing (sets SQLite's busy timeout, so no
+            # busy_timeout PRAGMA: it would silently replace this value)
+            'timeout': 20,
+        },
+    },
+    # Read-only copy of the primary for reporting and list views, see clients/replica.py
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': (BASE_DIR / 'db_replica.sqlite3').as_uri() + '?mode=ro',
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['clients.routers.ReplicaRouter']
+REPLICA_DATABASE_PATH = BASE_DIR / 'db_replica.sqlite3'
+REPLICA_REFRESH_AFTER_WRITES = 50   # background refresh after this many writes (0 disables)
+REPLICA_PIN_SECONDS = 10            # read from the primary for this long after a write
+REPLICA_MAX_AGE_SECONDS = 120       # an older replica is refreshed before it is read again
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -79,6 +133,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Sessions: 'cached_db' reads them from the 'sessions' cache and only falls back to the
+# database on a miss; 'signed_cookies' keeps them in the browser with no server storage
+# (a logout cannot revoke a copied cookie); 'db' is Django's default
+SESSION_STORE = 'cached_db'
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Logged-in users are cached per process (clients/auth.py) and dropped when saved or deleted
+AUTHENTICATION_BACKENDS = ['clients.auth.CachedModelBackend']
+USER_CACHE_SECONDS = 300
+
+# Flash messages travel in a signed cookie instead of being written to the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -90,6 +162,36 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')  # For production
 
+# In production collectstatic fingerprints, minifies and precompresses (clients/staticfiles.py);
+# during development files are served unhashed straight from STATICFILES_DIRS
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': ('django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+                    else 'clients.staticfiles.CompressedManifestStaticFilesStorage'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Session data for the cached_db session engine
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'TIMEOUT': None,
+    },
+    # Rendered table rows of the big list pages, keyed on pk + updated_at (see {% cache %} in
+    # subscriber_list, installation_list, overdue and due_soon). Sized to hold every row.
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'TIMEOUT': 86400,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
 # Media files (Uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -97,6 +199,58 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Monthly subscription price per kit type, used for revenue estimates and projections
+SUBSCRIPTION_PRICES = {
+    'STANDARD': 100,
+    'MINI': 100,
+}
+
+# Due-date reminders: sent this many days before next_subscription_date, at this local time
+NOTIFY_DAYS_BEFORE = 3
+NOTIFY_TIME = '09:00'
+
+# Change feed (api/v1/changes/) only returns rows at least this old, so writes still
+# committing with an earlier updated_at are not skipped by a client's cursor
+CHANGE_FEED_SETTLE_SECONDS = 2
+
+# Hot/cold archival (clients/archive.py, archive_records command): deactivated subscribers
+# and orders older than this move to the compact archive tables
+ARCHIVE_SUBSCRIBERS_AFTER_DAYS = 180
+ARCHIVE_ORDERS_AFTER_DAYS = 730
+
+# Admin changelists (see clients/admin_mixins.py): filtered counts stop at this many rows,
+# and the date hierarchy links are cached for this long
+ADMIN_COUNT_LIMIT = 10000
+ADMIN_DATE_HIERARCHY_CACHE_SECONDS = 600
+
+# Installation calendar (see clients/workload.py): counts for months that are over are cached
+# this long; saving or deleting an installation drops its month sooner
+WORKLOAD_CACHE_SECONDS = 24 * 60 * 60
+
+# Duplicate customers (see clients/duplicates.py, find_duplicates command): pairs scoring at
+# least this are listed for review; blocking keys shared by more records than this are skipped
+DUPLICATE_MIN_SCORE = 0.85
+DUPLICATE_MAX_BLOCK_SIZE = 50
+
+# SQLite housekeeping (see clients/maintenance.py, db_maintenance command): each step stops after
+# this many seconds, and ANALYZE samples about this many rows per index
+DB_MAINTENANCE_STEP_SECONDS = 10
+DB_MAINTENANCE_ANALYSIS_LIMIT = 1000
+
+# Notification fan-out channels (see clients/dispatch.py). RATE is messages per second.
+# SMS and WhatsApp write to a local outbox until a provider webhook is configured:
+#   {'BACKEND': 'webhook', 'URL': 'https://gateway.example/send', 'TOKEN': '...', ...}
+NOTIFICATION_OUTBOX = BASE_DIR / 'notification_outbox.jsonl'
+NOTIFICATION_COUNTRY_CODE = '263'
+NOTIFICATION_CHANNELS = {
+    'email': {'BACKEND': 'email', 'RATE': 5, 'CONCURRENCY': 2, 'MAX_RETRIES': 3},
+    'sms': {'BACKEND': 'file', 'PATH': NOTIFICATION_OUTBOX, 'RATE': 10, 'CONCURRENCY': 4, 'MAX_RETRIES': 3},
+    'whatsapp': {'BACKEND': 'file', 'PATH': NOTIFICATION_OUTBOX, 'RATE': 20, 'CONCURRENCY': 8, 'MAX_RETRIES': 3},
+}
+# Bulk reminders from the subscriber list for more subscribers than this are queued for run_notifier
+# instead of holding the request while every channel's rate limit paces them
+NOTIFY_INLINE_LIMIT = 10
+
 # Email configuration (for notifications)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -117,4 +271,19 @@ DBBACKUP_STORAGE_OPTIONS = {'location': os.path.join(BASE_DIR, 'backups')}
 DBBACKUP_CLEANUP_KEEP = 30  # Keep last 30 backups
 DBBACKUP_CLEANUP_KEEP_MEDIA = 30  # Keep last 30 media backups
 DBBACKUP_FILENAME_TEMPLATE = 'backup-{datetime}.{extension}'
-DBBACKUP_DATE_FORMAT = '%Y%m%d-%H%M%S'
\ No newline at end of file
+DBBACKUP_DATE_FORMAT = '%Y%m%d-%H%M%S'
+
+# Offsite copies of everything in backups/ (see clients/offsite.py, ship_backups command).
+# For an S3-compatible store (AWS, MinIO, ...; needs boto3):
+#   {'BACKEND': 's3', 'BUCKET': 'starspace-backups', 'ENDPOINT_URL': 'https://minio.example:9000',
+#    'ACCESS_KEY': '...', 'SECRET_KEY': '...', ...}
+# S3 needs parts of at least 5 MB. MAX_BYTES_PER_SECOND is shared by all parallel parts (0 = unlimited).
+OFFSITE_BACKUP = {
+    'BACKEND': 'filesystem',
+    'LOCATION': os.path.join(BASE_DIR, 'offsite_backups'),
+    'PREFIX': 'starspace/',
+    'PART_SIZE': 8 * 1024 * 1024,
+    'CONCURRENCY': 4,
+    'MAX_BYTES_PER_SECOND': 4 * 1024 * 1024,
+    'MAX_RETRIES': 3,
+}
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+ASGI deployment profile.
+
+One uvicorn process serves many concurrent dashboard users: async views wait
+on the database without holding a thread, and the sync views run in
+Django's thread pool. Start it with ``start_asgi_server.bat`` or:
+
+    uvicorn starspace.asgi:application --host 0.0.0.0 --port 8000
+"""
+from .settings import *  # noqa: F401,F403
+
+# Under ASGI every request runs its queries in its own thread, so a kept-open
+# connection would never be reused; close it at the end of each request.
+DATABASES['default']['CONN_MAX_AGE'] = 0
+DATABASES['replica']['CONN_MAX_AGE'] = 0
+
+# The instrumentation middleware is sync-only and would force every request
+# through a thread
+PERF_INSTRUMENTATION = False
@@ -0,0 +1,17 @@
+"""
+Slim profile for scheduled management commands (see run_job.py).
+
+Loads only the apps the jobs use: no admin, sessions, messages, static files
+or humanize, and no middleware. ``dbbackup`` is only added for the backup
+commands, which ``run_job.py`` passes in ``STARSPACE_JOB_APPS``.
+"""
+import os
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',      # clients.signals listens to User saves
+    'clients',
+] + [app for app in os.environ.get('STARSPACE_JOB_APPS', '').split(',') if app]
+
+MIDDLEWARE = []
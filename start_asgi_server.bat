@@ -0,0 +1,23 @@
+@echo off
+title Star Space ASGI Server
+cd /d C:\Users\User1\starspace
+
+echo ========================================
+echo   STAR SPACE ASGI SERVER
+echo ========================================
+echo.
+
+:: Check if virtual environment exists and activate it
+if exist venv\Scripts\activate (
+    echo Activating virtual environment...
+    call venv\Scripts\activate
+)
+
+:: Async views share one process; sync views run in its thread pool
+echo Starting uvicorn on http://0.0.0.0:8000 ...
+echo Settings: starspace.settings_asgi
+echo.
+
+python -m uvicorn starspace.asgi:application --host 0.0.0.0 --port 8000
+
+pause
\ No newline at end of file
@@ -0,0 +1,30 @@
+@echo off
+title Star Space Database Maintenance
+cd /d C:\Users\User1\starspace
+
+echo ========================================
+echo   STAR SPACE DATABASE MAINTENANCE
+echo ========================================
+echo.
+
+:: Check if virtual environment exists and activate it
+if exist venv\Scripts\activate (
+    echo Activating virtual environment...
+    call venv\Scripts\activate
+)
+
+:: Start the maintenance service
+echo Starting database maintenance...
+echo ANALYZE, free page release, integrity check and WAL checkpoint every 6 hours
+echo Log file: maintenance_service.log
+echo.
+
+:: Run in background (minimized window)
+start /MIN cmd /c "python manage.py db_maintenance --interval 6 >> maintenance_service.log 2>&1"
+
+echo Service started successfully!
+echo.
+echo The service is running in the background.
+echo To stop it, close its window or end the python.exe running db_maintenance.
+echo.
+pause
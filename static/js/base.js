@@ -0,0 +1,34 @@
+// Sidebar toggle functionality
+document.getElementById('sidebarCollapse').addEventListener('click', function() {
+    document.getElementById('sidebar').classList.toggle('active');
+});
+
+// Highlight active menu item
+document.addEventListener('DOMContentLoaded', function() {
+    const currentUrl = window.location.pathname;
+    const menuItems = document.querySelectorAll('#sidebar ul li a');
+
+    menuItems.forEach(item => {
+        if (item.getAttribute('href') === currentUrl) {
+            item.parentElement.classList.add('active');
+        }
+    });
+
+    // Keep parent menu expanded if child is active
+    const activeItems = document.querySelectorAll('#sidebar ul li.active');
+    activeItems.forEach(item => {
+        const parentCollapse = item.closest('.collapse');
+        if (parentCollapse) {
+            parentCollapse.classList.add('show');
+        }
+    });
+});
+
+// Auto-hide messages after 5 seconds
+setTimeout(function() {
+    const alerts = document.querySelectorAll('.alert');
+    alerts.forEach(alert => {
+        alert.classList.remove('show');
+        setTimeout(() => alert.remove(), 300);
+    });
+}, 5000);